@@ -0,0 +1,29 @@
+"""add peer_messages thread_id/sent_at index
+
+Revision ID: 3c9d41e7a2b8
+Revises: a60b3a11a85c
+Create Date: 2026-10-18 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d41e7a2b8'
+down_revision: Union[str, Sequence[str], None] = 'a60b3a11a85c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves keyset pagination of thread history on (sent_at, message_id)
+    op.create_index('ix_peer_messages_thread_id_sent_at', 'peer_messages', ['thread_id', 'sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_peer_messages_thread_id_sent_at', table_name='peer_messages')
@@ -0,0 +1,96 @@
+"""add story feature keys and inverted index
+
+Revision ID: 5e8b2d7a1c93
+Revises: 9a4f1c3e8b27
+Create Date: 2026-10-18 12:20:51.873310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import collections
+import re
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b2d7a1c93'
+down_revision: Union[str, Sequence[str], None] = '9a4f1c3e8b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Feature extraction as of this revision (services/story_index.py), frozen here so
+# later changes to the app cannot change what this migration writes
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]{3,15}\b')
+STOPWORDS = {
+    "the", "and", "for", "that", "this", "with", "was", "but", "are", "not", "you",
+    "have", "had", "has", "just", "all", "its", "it's", "can", "from", "they", "them",
+    "what", "when", "been", "were", "about", "would", "could", "there", "their", "then",
+    "than", "into", "out", "our", "his", "her", "she", "him", "who", "how", "too",
+    "very", "really", "some", "because", "feel", "felt", "like", "today",
+}
+ROLE_KEYWORDS = {
+    "burnout": ["exhaust", "tired", "burnout", "overwhelmed", "drain", "sleep", "pressure"],
+    "exam season": ["exam", "study", "midterm", "test", "grade", "fail", "stress", "pressure", "anxious"],
+    "placement prep": ["interview", "job", "career", "resume", "intern", "prep", "future", "placement"],
+    "relationship stress": ["breakup", "fight", "friend", "relationship", "love", "lonely", "heartbroken", "argument"],
+    "identity & belonging": ["identity", "belong", "fit in", "imposter", "lonely", "who am i", "diverse", "accept"],
+    "first-year": ["transition", "dorm", "new", "freshman", "campus", "home", "adjust", "lost"]
+}
+MAX_TERMS_PER_STORY = 64
+
+
+def build_feature_keys(excerpt, mood, theme, resonance_hook):
+    keys = []
+    story_mood = (mood or "").strip().lower()
+    if story_mood:
+        keys.append(f"mood:{story_mood}")
+
+    role_text = f"{(theme or '').lower()} {(excerpt or '').lower()}"
+    for role, words in ROLE_KEYWORDS.items():
+        if role in role_text:
+            keys.append(f"role_exact:{role}")
+        if any(word in role_text for word in words):
+            keys.append(f"role:{role}")
+
+    text = f"{(theme or '')} {(resonance_hook or '')} {excerpt or ''}".lower()
+    counts = collections.Counter(w for w in WORD_PATTERN.findall(text) if w not in STOPWORDS)
+    keys.extend(f"term:{t}" for t in sorted(counts, key=counts.get, reverse=True)[:MAX_TERMS_PER_STORY])
+    return keys
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shared_stories', sa.Column('feature_keys', postgresql.ARRAY(sa.String()), nullable=True))
+    op.create_table('story_index_terms',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('story_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['story_id'], ['shared_stories.story_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('key', 'story_id')
+    )
+    op.create_index(op.f('ix_story_index_terms_story_id'), 'story_index_terms', ['story_id'], unique=False)
+
+    # Backfill existing stories with the same feature extraction used at share time
+    conn = op.get_bind()
+    stories = conn.execute(sa.text(
+        "SELECT story_id, excerpt, mood, theme, resonance_hook FROM shared_stories"
+    )).fetchall()
+    for story in stories:
+        keys = build_feature_keys(story.excerpt, story.mood, story.theme, story.resonance_hook)
+        conn.execute(
+            sa.text("UPDATE shared_stories SET feature_keys = :keys WHERE story_id = :story_id"),
+            {"keys": keys, "story_id": story.story_id}
+        )
+        if keys:
+            conn.execute(
+                sa.text("INSERT INTO story_index_terms (key, story_id) VALUES (:key, :story_id) ON CONFLICT DO NOTHING"),
+                [{"key": key, "story_id": story.story_id} for key in keys]
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_story_index_terms_story_id'), table_name='story_index_terms')
+    op.drop_table('story_index_terms')
+    op.drop_column('shared_stories', 'feature_keys')
@@ -0,0 +1,45 @@
+"""add story_index_terms published_at and (key, published_at) index
+
+Revision ID: 7a3e9c1d5f28
+Revises: d2a7c4f9e150
+Create Date: 2026-10-18 22:07:31.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e9c1d5f28'
+down_revision: Union[str, Sequence[str], None] = 'd2a7c4f9e150'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('story_index_terms', sa.Column('published_at', sa.DateTime(), nullable=True))
+
+    # Removed stories keep no postings (services/story_index.py unindex_story)
+    op.execute("""
+        DELETE FROM story_index_terms t
+        USING shared_stories s
+        WHERE s.story_id = t.story_id AND NOT s.active
+    """)
+    op.execute("""
+        UPDATE story_index_terms t
+        SET published_at = s.published_at
+        FROM shared_stories s
+        WHERE s.story_id = t.story_id
+    """)
+
+    op.alter_column('story_index_terms', 'published_at', nullable=False)
+    op.create_index('ix_story_index_terms_key_published_at', 'story_index_terms', ['key', 'published_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_story_index_terms_key_published_at', table_name='story_index_terms')
+    op.drop_column('story_index_terms', 'published_at')
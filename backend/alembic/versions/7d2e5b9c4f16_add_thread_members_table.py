@@ -0,0 +1,65 @@
+"""add thread_members table and migrate participants_anon_ids
+
+Revision ID: 7d2e5b9c4f16
+Revises: 3c9d41e7a2b8
+Create Date: 2026-10-18 11:02:37.550914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e5b9c4f16'
+down_revision: Union[str, Sequence[str], None] = '3c9d41e7a2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('thread_members',
+    sa.Column('thread_id', sa.UUID(), nullable=False),
+    sa.Column('anon_id', sa.String(), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('role', sa.String(), server_default='member', nullable=False),
+    sa.Column('last_read_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['thread_id'], ['chat_threads.thread_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('thread_id', 'anon_id')
+    )
+    op.create_index('ix_thread_members_anon_id_thread_id', 'thread_members', ['anon_id', 'thread_id'], unique=False)
+
+    # One row per array element; the first participant of a support circle is its creator
+    op.execute("""
+        INSERT INTO thread_members (thread_id, anon_id, joined_at, role)
+        SELECT t.thread_id,
+               p.anon_id,
+               t.created_at,
+               CASE WHEN p.position = 1 AND t.thread_type::text IN ('SUPPORT_CIRCLE', 'support_circle')
+                    THEN 'owner' ELSE 'member' END
+        FROM chat_threads t
+        CROSS JOIN LATERAL unnest(t.participants_anon_ids) WITH ORDINALITY AS p(anon_id, position)
+        ON CONFLICT (thread_id, anon_id) DO NOTHING
+    """)
+
+    op.drop_column('chat_threads', 'participants_anon_ids')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('chat_threads', sa.Column('participants_anon_ids', postgresql.ARRAY(sa.String()), nullable=True))
+    op.execute("""
+        UPDATE chat_threads t
+        SET participants_anon_ids = COALESCE(
+            (SELECT array_agg(m.anon_id ORDER BY m.joined_at)
+             FROM thread_members m
+             WHERE m.thread_id = t.thread_id),
+            ARRAY[]::varchar[]
+        )
+    """)
+    op.alter_column('chat_threads', 'participants_anon_ids', nullable=False)
+    op.drop_index('ix_thread_members_anon_id_thread_id', table_name='thread_members')
+    op.drop_table('thread_members')
@@ -0,0 +1,57 @@
+"""add chat_threads participant_key for 1-on-1 lookup
+
+Revision ID: 9a4f1c3e8b27
+Revises: 7d2e5b9c4f16
+Create Date: 2026-10-18 11:41:09.204376
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f1c3e8b27'
+down_revision: Union[str, Sequence[str], None] = '7d2e5b9c4f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_threads', sa.Column('participant_key', sa.String(length=64), nullable=True))
+
+    # Same key as api.v1.peer_chat.participant_key: sha256 of the anon_ids sorted
+    # bytewise and joined with \x1f. If duplicate 1-on-1 threads already exist for
+    # a pair, only the oldest one gets the key.
+    op.execute("""
+        WITH keyed AS (
+            SELECT t.thread_id,
+                   encode(sha256(convert_to(
+                       string_agg(m.anon_id, E'\\x1f' ORDER BY m.anon_id COLLATE "C"), 'UTF8'
+                   )), 'hex') AS participant_key,
+                   t.created_at
+            FROM chat_threads t
+            JOIN thread_members m ON m.thread_id = t.thread_id
+            WHERE t.thread_type::text IN ('PEER_1ON1', 'peer_1on1')
+            GROUP BY t.thread_id, t.created_at
+        ),
+        ranked AS (
+            SELECT thread_id, participant_key,
+                   row_number() OVER (PARTITION BY participant_key ORDER BY created_at, thread_id) AS rn
+            FROM keyed
+        )
+        UPDATE chat_threads t
+        SET participant_key = r.participant_key
+        FROM ranked r
+        WHERE r.thread_id = t.thread_id AND r.rn = 1
+    """)
+
+    op.create_unique_constraint('uq_chat_threads_participant_key', 'chat_threads', ['participant_key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_chat_threads_participant_key', 'chat_threads', type_='unique')
+    op.drop_column('chat_threads', 'participant_key')
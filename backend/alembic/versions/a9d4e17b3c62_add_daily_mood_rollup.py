@@ -0,0 +1,92 @@
+"""add daily mood rollup
+
+Revision ID: a9d4e17b3c62
+Revises: c3f92d6e8a17
+Create Date: 2026-10-18 17:35:26.580144
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e17b3c62'
+down_revision: Union[str, Sequence[str], None] = 'c3f92d6e8a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# moodenum values as of this revision
+MOODS = ('calm', 'anxious', 'sad', 'frustrated', 'hopeful', 'numb', 'grateful', 'overwhelmed')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_mood_rollup',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('journal_entries', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_calm', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_anxious', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_sad', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_frustrated', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_hopeful', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_numb', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_grateful', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('mood_overwhelmed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('checkins', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('phq2_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('phq2_max', sa.Integer(), nullable=True),
+    sa.Column('exercises', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('exercise_seconds', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_activity_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_index('ix_daily_mood_rollup_day', 'daily_mood_rollup', ['day'], unique=False)
+    # Seed from existing history so readers of the rollup see every student's activity
+    # (the same rollup services/mood_rollup.py rebuild_mood_rollups computes)
+    mood_columns = [f"mood_{mood}" for mood in MOODS]
+    journal_moods = ", ".join(
+        f"count(*) FILTER (WHERE mood_selected = '{mood}') AS mood_{mood}" for mood in MOODS
+    )
+    zero_moods = ", ".join(f"0 AS mood_{mood}" for mood in MOODS)
+    op.execute(f"""
+        INSERT INTO daily_mood_rollup (
+            user_id, day, journal_entries, {", ".join(mood_columns)},
+            checkins, phq2_sum, phq2_max, exercises, exercise_seconds, last_activity_at
+        )
+        SELECT
+            user_id, day, sum(journal_entries), {", ".join(f"sum({c})" for c in mood_columns)},
+            sum(checkins), sum(phq2_sum), max(phq2_max), sum(exercises), sum(exercise_seconds),
+            max(last_activity_at)
+        FROM (
+            SELECT user_id, CAST(created_at AS DATE) AS day, count(*) AS journal_entries, {journal_moods},
+                0 AS checkins, 0 AS phq2_sum, CAST(NULL AS INTEGER) AS phq2_max,
+                0 AS exercises, 0 AS exercise_seconds, max(created_at) AS last_activity_at
+            FROM journal_entries
+            GROUP BY user_id, CAST(created_at AS DATE)
+            UNION ALL
+            SELECT users.user_id, CAST(timezone('UTC', check_ins.created_at) AS DATE), 0, {zero_moods},
+                count(*), sum(check_ins.score), max(check_ins.score),
+                0, 0, max(timezone('UTC', check_ins.created_at))
+            FROM check_ins JOIN users ON users.id = check_ins.user_id
+            GROUP BY users.user_id, CAST(timezone('UTC', check_ins.created_at) AS DATE)
+            UNION ALL
+            SELECT users.user_id, CAST(timezone('UTC', exercise_completions.completed_at) AS DATE), 0, {zero_moods},
+                0, 0, CAST(NULL AS INTEGER),
+                count(*), coalesce(sum(exercise_completions.duration_seconds), 0),
+                max(timezone('UTC', exercise_completions.completed_at))
+            FROM exercise_completions JOIN users ON users.id = exercise_completions.user_id
+            GROUP BY users.user_id, CAST(timezone('UTC', exercise_completions.completed_at) AS DATE)
+        ) AS activity
+        GROUP BY user_id, day
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_mood_rollup_day', table_name='daily_mood_rollup')
+    op.drop_table('daily_mood_rollup')
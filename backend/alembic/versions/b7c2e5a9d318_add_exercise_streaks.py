@@ -0,0 +1,52 @@
+"""add exercise_streaks and exercise_completions user/completed index
+
+Revision ID: b7c2e5a9d318
+Revises: f61b8e2d9a45
+Create Date: 2026-10-18 19:04:27.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c2e5a9d318'
+down_revision: Union[str, Sequence[str], None] = 'f61b8e2d9a45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('exercise_streaks',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('longest_streak', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_active_date', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_exercise_completions_user_id_completed_at', 'exercise_completions', ['user_id', 'completed_at'], unique=False)
+    # Seed streaks from existing history (the same runs services/exercise_streaks.py computes)
+    op.execute("""
+        INSERT INTO exercise_streaks (user_id, current_streak, longest_streak, last_active_date)
+        SELECT user_id, (array_agg(length ORDER BY last_day DESC))[1], max(length), max(last_day)
+        FROM (
+            SELECT user_id, count(*) AS length, max(day) AS last_day
+            FROM (
+                SELECT user_id, day, day - CAST(row_number() OVER (PARTITION BY user_id ORDER BY day) AS INTEGER) AS island
+                FROM (SELECT DISTINCT user_id, CAST(timezone('UTC', completed_at) AS DATE) AS day FROM exercise_completions) AS days
+            ) AS islands
+            GROUP BY user_id, island
+        ) AS runs
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exercise_completions_user_id_completed_at', table_name='exercise_completions')
+    op.drop_table('exercise_streaks')
@@ -0,0 +1,43 @@
+"""add weekly insight runs
+
+Revision ID: c3f92d6e8a17
+Revises: e4a81f6c2b09
+Create Date: 2026-10-18 16:48:03.274915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f92d6e8a17'
+down_revision: Union[str, Sequence[str], None] = 'e4a81f6c2b09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('weekly_insight_runs',
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('eligible_students', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('generated', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('chunks', sa.Integer(), nullable=False),
+    sa.Column('last_user_id', sa.UUID(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('week_start')
+    )
+    op.create_index('ix_journal_entries_user_id_created_at', 'journal_entries', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_journal_entries_user_id_created_at', table_name='journal_entries')
+    op.drop_table('weekly_insight_runs')
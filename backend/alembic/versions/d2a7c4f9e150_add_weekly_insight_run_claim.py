@@ -0,0 +1,28 @@
+"""add weekly_insight_runs claimed_at
+
+Revision ID: d2a7c4f9e150
+Revises: b7c2e5a9d318
+Create Date: 2026-10-18 20:41:09.552817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c4f9e150'
+down_revision: Union[str, Sequence[str], None] = 'b7c2e5a9d318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('weekly_insight_runs', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('weekly_insight_runs', 'claimed_at')
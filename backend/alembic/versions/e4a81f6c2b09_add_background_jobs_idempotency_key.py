@@ -0,0 +1,32 @@
+"""add background jobs idempotency key
+
+Revision ID: e4a81f6c2b09
+Revises: b7e3c9a1d452
+Create Date: 2026-10-18 15:32:47.106551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a81f6c2b09'
+down_revision: Union[str, Sequence[str], None] = 'b7e3c9a1d452'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('background_jobs', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    op.create_unique_constraint('uq_background_jobs_idempotency_key', 'background_jobs', ['idempotency_key'])
+    op.create_index('ix_background_jobs_job_type_status', 'background_jobs', ['job_type', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_background_jobs_job_type_status', table_name='background_jobs')
+    op.drop_constraint('uq_background_jobs_idempotency_key', 'background_jobs', type_='unique')
+    op.drop_column('background_jobs', 'idempotency_key')
@@ -0,0 +1,28 @@
+"""add check_ins user/created index
+
+Revision ID: f61b8e2d9a45
+Revises: a9d4e17b3c62
+Create Date: 2026-10-18 18:12:40.913527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f61b8e2d9a45'
+down_revision: Union[str, Sequence[str], None] = 'a9d4e17b3c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_check_ins_user_id_created_at', 'check_ins', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_check_ins_user_id_created_at', table_name='check_ins')
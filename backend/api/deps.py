@@ -1,12 +1,14 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, WebSocket, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.session import get_db
 from models.user import User
 from config.settings import settings
-from sqlalchemy import select
+from core.security import decode_access_token
+from core.principal_cache import get_principal_cache, build_detached_user
+from sqlalchemy import inspect, select
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -26,19 +28,40 @@ async def get_current_user(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
+        # users.id claim; tokens issued before it was added are never served from the cache
+        principal_id = payload.get("user_id")
     except JWTError:
         raise credentials_exception
 
+    cache = get_principal_cache()
+    if principal_id is not None:
+        cached = await cache.get(principal_id)
+        if cached is not None:
+            # Attach to this request's session without a SELECT (authorization fields only)
+            return await db.merge(build_detached_user(cached), load=False)
+
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
 
     if user is None:
         raise credentials_exception
+    if principal_id is not None and user.id == principal_id:
+        await cache.set(principal_id, user)
     return user
 
 
-async def get_current_active_user(
+async def get_current_user_profile(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+) -> User:
+    """The current user with every column loaded (a cached principal only has PRINCIPAL_COLUMNS)"""
+    if inspect(current_user).unloaded:
+        await db.refresh(current_user)
+    return current_user
+
+
+async def get_current_active_user(
+    current_user: User = Depends(get_current_user_profile),
 ) -> User:
     if not current_user.is_available:
         # Note: "is_available" in User model might mean something different (counsellor availability),
@@ -47,3 +70,37 @@ async def get_current_active_user(
         # likely for counsellors. We'll use it as "enabled" for now or just pass through.
         pass
     return current_user
+
+
+# Close code for rejected WebSocket handshakes ("Policy Violation")
+WS_POLICY_VIOLATION = 1008
+
+
+async def authenticate_websocket(websocket: WebSocket) -> Optional[dict]:
+    """
+    Validate the JWT sent on a WebSocket handshake and return its claims.
+
+    Browsers cannot set headers on WebSocket requests, so the token is read
+    from the ``token`` query parameter (an ``Authorization: Bearer`` header is
+    accepted too). Identity comes from the signed claims alone - no database
+    round trip per connection. On failure the handshake is closed with 1008
+    and None is returned.
+    """
+    token = websocket.query_params.get("token")
+    if not token:
+        auth_header = websocket.headers.get("authorization", "")
+        if auth_header.lower().startswith("bearer "):
+            token = auth_header[7:]
+
+    claims = None
+    if token:
+        try:
+            claims = decode_access_token(token)
+        except JWTError:
+            claims = None
+
+    # Tokens issued before identity claims were added must be refreshed by logging in again
+    if not claims or not claims.get("anon_id") or claims.get("user_id") is None:
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return None
+    return claims
\ No newline at end of file
@@ -1,19 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timedelta
 from db.session import get_db
 from models.user import User
 from schemas.user import UserCreate, UserLogin, Token, VerifyEmail
-from core.security import get_password_hash, verify_password, create_access_token
+from core.security import get_password_hash, verify_password, create_access_token, build_token_claims
 from utils.email import send_verification_email
 import random
 import string
 import json
 import logging
 import redis
-from jose import JWTError, jwt
 from utils.anon_id import generate_anon_id
 
 logger = logging.getLogger(__name__)
@@ -284,7 +282,7 @@ async def login(
         )
 
     token = create_access_token(
-        data={"sub": user.email, "role": user.role}
+        data=build_token_claims(user)
     )
 
     return {
@@ -299,43 +297,5 @@ async def login(
 # =========================
 # CURRENT USER
 # =========================
-oauth2_scheme = OAuth2PasswordBearer(
-    tokenUrl="/api/v1/auth/login"
-)
-
-
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Invalid authentication",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-
-        email = payload.get("sub")
-        if not email:
-            raise credentials_exception
-
-    except JWTError:
-        raise credentials_exception
-
-    result = await db.execute(
-        select(User).where(User.email == email)
-    )
-
-    user = result.scalars().first()
-
-    if not user:
-        raise credentials_exception
-
-    return user
\ No newline at end of file
+# Kept importable from here; the cached implementation lives in api.deps
+from api.deps import get_current_user  # noqa: E402
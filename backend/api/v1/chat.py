@@ -2,58 +2,93 @@ from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisco
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import aliased
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
+import functools
 from db.session import get_db
 from models.chat_session import ChatSession
 from models.chat_message import ChatMessage
 from models.user import User
 from schemas.chat import ChatSessionCreate, ChatSessionResponse, ChatMessageCreate, ChatMessageResponse
-from api.deps import get_current_user
+from api.deps import get_current_user, get_current_user_profile, authenticate_websocket, WS_POLICY_VIOLATION
+from services.backplane import Backplane, get_backplane
 
 router = APIRouter()
 
 class ConnectionManager:
-    def __init__(self):
+    """
+    Per-worker socket registry. Each connected user has a backplane channel,
+    so a message sent from any worker reaches the worker holding the socket.
+    """
+
+    def __init__(self, backplane: Optional[Backplane] = None):
         self.active_connections: Dict[str, WebSocket] = {}
+        self._backplane = backplane
+
+    @property
+    def backplane(self) -> Backplane:
+        if self._backplane is None:
+            self._backplane = get_backplane()
+        return self._backplane
+
+    @staticmethod
+    def user_channel(user_id) -> str:
+        return f"chat:user:{user_id}"
 
     async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections[str(user_id)] = websocket
+        u_id = str(user_id)
+        self.active_connections[u_id] = websocket
+        await self.backplane.subscribe(
+            self.user_channel(u_id),
+            functools.partial(self._deliver_local, u_id)
+        )
 
-    def disconnect(self, user_id: int):
+    async def disconnect(self, user_id: int):
         u_id = str(user_id)
         if u_id in self.active_connections:
             del self.active_connections[u_id]
+            await self.backplane.unsubscribe(self.user_channel(u_id))
 
-    async def send_personal_message(self, message: dict, user_id: int):
-        u_id = str(user_id)
+    async def _deliver_local(self, u_id: str, message: dict):
         if u_id in self.active_connections:
             try:
                 await self.active_connections[u_id].send_json(message)
-                return True
             except Exception:
-                return False
-        return False
+                pass
+
+    async def send_personal_message(self, message: dict, user_id: int):
+        try:
+            await self.backplane.publish(self.user_channel(user_id), message)
+            return True
+        except Exception:
+            return False
 
 manager = ConnectionManager()
 
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: int):
+    claims = await authenticate_websocket(websocket)
+    if claims is None:
+        return
+    if claims["user_id"] != user_id:
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return
+
     await manager.connect(user_id, websocket)
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        await manager.disconnect(user_id)
     except Exception:
-        manager.disconnect(user_id)
+        await manager.disconnect(user_id)
 
 @router.post("/sessions", response_model=ChatSessionResponse)
 async def create_session(
     session: ChatSessionCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_profile),
 ):
     stmt = select(ChatSession).where(
         ChatSession.student_id == session.student_id,
@@ -4,8 +4,9 @@ from sqlalchemy import select, desc
 from db.session import get_db
 from models.checkin import CheckIn
 from schemas.wellness import CheckInCreate, CheckInResponse
-from api.v1.auth import get_current_user
+from api.deps import get_current_user
 from models.user import User
+from services.mood_rollup import record_checkin
 from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
@@ -102,6 +103,9 @@ async def create_checkin(
     )
     
     db.add(new_checkin)
+    # Flush first so the rollup is keyed on the row's own created_at
+    await db.flush()
+    await record_checkin(db, current_user.user_id, total_score, new_checkin.created_at)
     await db.commit()
     await db.refresh(new_checkin)
     
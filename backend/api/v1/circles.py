@@ -2,21 +2,24 @@
 Circles API Router - support circle creation, joining, recommendations, and search
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from typing import List, Optional
+from sqlalchemy import delete, exists, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict, List, Optional, Tuple
+import base64
 import uuid
 import datetime
 
 from db.session import get_db
-from api.deps import get_current_user
+from api.deps import get_current_user, get_current_user_profile
 from models.user import User
 from models.circle import Circle
-from models.peer_message import ChatThread, ChatThreadTypeEnum
+from models.peer_message import ChatThread, ChatThreadTypeEnum, ThreadMember
 from services.circle_generator import get_circle_generator
 from services.circle_recommender import get_circle_recommender
+from api.v1.peer_chat import manager as peer_chat_manager
 
 from pydantic import BaseModel
 
@@ -56,11 +59,89 @@ class CircleResponse(BaseModel):
     created_at: datetime.datetime
     participants_count: int
     is_member: bool
+    cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+# ===== LISTING HELPERS =====
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_circle_cursor(created_at: datetime.datetime, circle_id) -> str:
+    """Opaque keyset cursor for a circle position: (created_at, circle_id)"""
+    raw = f"{created_at.isoformat()}|{circle_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_circle_cursor(cursor: str) -> Tuple[datetime.datetime, uuid.UUID]:
+    try:
+        created_at, circle_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(circle_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def thread_stats_columns(anon_id: str):
+    """participants_count and is_member for Circle rows, answered from the thread_members index"""
+    participants_count = (
+        select(func.count())
+        .select_from(ThreadMember)
+        .where(ThreadMember.thread_id == Circle.thread_id)
+        .scalar_subquery()
+    )
+    is_member = exists().where(
+        ThreadMember.thread_id == Circle.thread_id,
+        ThreadMember.anon_id == anon_id
+    )
+    return participants_count.label("participants_count"), is_member.label("is_member")
+
+
+async def load_thread_stats(db: AsyncSession, thread_ids: List, anon_id: str) -> Dict:
+    """thread_id -> (participants_count, is_member) for many threads in one query"""
+    if not thread_ids:
+        return {}
+    stmt = (
+        select(
+            ThreadMember.thread_id,
+            func.count().label("participants_count"),
+            func.bool_or(ThreadMember.anon_id == anon_id).label("is_member")
+        )
+        .where(ThreadMember.thread_id.in_(thread_ids))
+        .group_by(ThreadMember.thread_id)
+    )
+    res = await db.execute(stmt)
+    return {row.thread_id: (row.participants_count, row.is_member) for row in res.all()}
+
+
+async def count_members(db: AsyncSession, thread_id) -> int:
+    stmt = select(func.count()).select_from(ThreadMember).where(ThreadMember.thread_id == thread_id)
+    res = await db.execute(stmt)
+    return res.scalar_one()
+
+
+def circle_to_response(circle: Circle, participants_count: int, is_member: bool, cursor: Optional[str] = None) -> dict:
+    return {
+        "circle_id": str(circle.circle_id),
+        "thread_id": str(circle.thread_id),
+        "name": circle.name,
+        "tagline": circle.tagline,
+        "welcome_message": circle.welcome_message,
+        "rules": circle.rules,
+        "opening_prompt": circle.opening_prompt,
+        "sensitivity_level": circle.sensitivity_level,
+        "theme": circle.theme,
+        "type": circle.type,
+        "created_at": circle.created_at,
+        "participants_count": participants_count,
+        "is_member": is_member,
+        "cursor": cursor
+    }
+
+
 # ===== ENDPOINTS =====
 
 @router.post("/generate")
@@ -107,10 +188,15 @@ async def create_circle(
         new_thread = ChatThread(
             thread_id=uuid.uuid4(),
             thread_type=ChatThreadTypeEnum.SUPPORT_CIRCLE,
-            participants_anon_ids=[current_user.anon_id],
             created_at=datetime.datetime.utcnow()
         )
         db.add(new_thread)
+        db.add(ThreadMember(
+            thread_id=new_thread.thread_id,
+            anon_id=current_user.anon_id,
+            role="owner",
+            joined_at=new_thread.created_at
+        ))
         
         # 2. Create the Circle record referencing this thread
         new_circle = Circle(
@@ -131,6 +217,7 @@ async def create_circle(
         
         await db.commit()
         await db.refresh(new_circle)
+        await peer_chat_manager.add_thread_members(str(new_thread.thread_id), [current_user.anon_id])
         
         return {
             "circle_id": str(new_circle.circle_id),
@@ -160,7 +247,7 @@ async def create_circle(
 @router.get("/recommendations", response_model=List[CircleResponse])
 async def get_recommended_circles(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_profile)
 ):
     """Retrieve personalized Support Circle recommendations for the student"""
     if current_user.role != "student":
@@ -168,73 +255,78 @@ async def get_recommended_circles(
         
     recommender = get_circle_recommender()
     recommended_list = await recommender.get_recommendations(current_user, db)
-    
+
+    # Membership & counts for every recommended circle in one query
+    stats = await load_thread_stats(db, [c.thread_id for c in recommended_list], current_user.anon_id)
+
     results = []
     for circle in recommended_list:
-        # Load thread to check membership & count
-        stmt_thread = select(ChatThread).where(ChatThread.thread_id == circle.thread_id)
-        res_thread = await db.execute(stmt_thread)
-        thread = res_thread.scalars().first()
-        
-        is_member = current_user.anon_id in thread.participants_anon_ids if thread else False
-        p_count = len(thread.participants_anon_ids) if thread else 0
-        
-        results.append({
-            "circle_id": str(circle.circle_id),
-            "thread_id": str(circle.thread_id),
-            "name": circle.name,
-            "tagline": circle.tagline,
-            "welcome_message": circle.welcome_message,
-            "rules": circle.rules,
-            "opening_prompt": circle.opening_prompt,
-            "sensitivity_level": circle.sensitivity_level,
-            "theme": circle.theme,
-            "type": circle.type,
-            "created_at": circle.created_at,
-            "participants_count": p_count,
-            "is_member": is_member
-        })
-        
+        p_count, is_member = stats.get(circle.thread_id, (0, False))
+        results.append(circle_to_response(circle, p_count, is_member))
+
     return results
 
 
 @router.get("/all", response_model=List[CircleResponse])
 async def get_all_circles(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all support circles on the platform"""
-    stmt = select(Circle).order_by(Circle.created_at.desc())
+    """
+    Get one page of support circles on the platform, newest first
+    - Circles, participant counts and membership come from one joined query
+    - limit/cursor: pass the last returned item's `cursor` for the next page
+    """
+    stmt = (
+        select(Circle, *thread_stats_columns(current_user.anon_id))
+        .order_by(Circle.created_at.desc(), Circle.circle_id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        created_at, circle_id = decode_circle_cursor(cursor)
+        stmt = stmt.where(tuple_(Circle.created_at, Circle.circle_id) < tuple_(created_at, circle_id))
+
     res = await db.execute(stmt)
-    circles = res.scalars().all()
-    
-    results = []
-    for circle in circles:
-        # Check thread membership
-        stmt_thread = select(ChatThread).where(ChatThread.thread_id == circle.thread_id)
-        res_thread = await db.execute(stmt_thread)
-        thread = res_thread.scalars().first()
-        
-        is_member = current_user.anon_id in thread.participants_anon_ids if thread else False
-        p_count = len(thread.participants_anon_ids) if thread else 0
-        
-        results.append({
-            "circle_id": str(circle.circle_id),
-            "thread_id": str(circle.thread_id),
-            "name": circle.name,
-            "tagline": circle.tagline,
-            "welcome_message": circle.welcome_message,
-            "rules": circle.rules,
-            "opening_prompt": circle.opening_prompt,
-            "sensitivity_level": circle.sensitivity_level,
-            "theme": circle.theme,
-            "type": circle.type,
-            "created_at": circle.created_at,
-            "participants_count": p_count,
-            "is_member": is_member
-        })
-        
-    return results
+
+    return [
+        circle_to_response(
+            circle,
+            p_count,
+            is_member,
+            cursor=encode_circle_cursor(circle.created_at, circle.circle_id)
+        )
+        for circle, p_count, is_member in res.all()
+    ]
+
+
+@router.get("/by-thread", response_model=List[CircleResponse])
+async def get_circles_by_thread(
+    thread_ids: str = Query(..., description="Comma-separated chat thread ids"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Look up the circles behind specific chat threads (e.g. the user's open circle rooms)
+    - At most MAX_PAGE_SIZE thread ids per request
+    """
+    try:
+        ids = [uuid.UUID(t) for t in thread_ids.split(",") if t.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid thread id")
+    if len(ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} thread ids per request")
+    if not ids:
+        return []
+
+    stmt = (
+        select(Circle, *thread_stats_columns(current_user.anon_id))
+        .where(Circle.thread_id.in_(ids))
+    )
+    res = await db.execute(stmt)
+
+    return [circle_to_response(circle, p_count, is_member) for circle, p_count, is_member in res.all()]
 
 
 @router.post("/{circle_id}/join", response_model=CircleResponse)
@@ -243,7 +335,7 @@ async def join_circle(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Join an anonymous Support Circle (add to ChatThread participants)"""
+    """Join an anonymous Support Circle (add a thread_members row)"""
     if current_user.role != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -260,40 +352,18 @@ async def join_circle(
             detail="Support circle not found"
         )
         
-    stmt_thread = select(ChatThread).where(ChatThread.thread_id == circle.thread_id)
-    res_thread = await db.execute(stmt_thread)
-    thread = res_thread.scalars().first()
-    
-    if not thread:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Associated chat thread not found"
-        )
-        
-    # Join logic
-    participants = list(thread.participants_anon_ids)
-    if current_user.anon_id not in participants:
-        participants.append(current_user.anon_id)
-        # SQLAlchemy array mutation notice
-        thread.participants_anon_ids = participants
-        await db.commit()
-        await db.refresh(thread)
-        
-    return {
-        "circle_id": str(circle.circle_id),
-        "thread_id": str(circle.thread_id),
-        "name": circle.name,
-        "tagline": circle.tagline,
-        "welcome_message": circle.welcome_message,
-        "rules": circle.rules,
-        "opening_prompt": circle.opening_prompt,
-        "sensitivity_level": circle.sensitivity_level,
-        "theme": circle.theme,
-        "type": circle.type,
-        "created_at": circle.created_at,
-        "participants_count": len(thread.participants_anon_ids),
-        "is_member": True
-    }
+    # Join logic: single-row insert, concurrent joins never overwrite each other
+    stmt_join = (
+        pg_insert(ThreadMember)
+        .values(thread_id=circle.thread_id, anon_id=current_user.anon_id, role="member")
+        .on_conflict_do_nothing(index_elements=["thread_id", "anon_id"])
+    )
+    res_join = await db.execute(stmt_join)
+    await db.commit()
+    if res_join.rowcount:
+        await peer_chat_manager.add_thread_members(str(circle.thread_id), [current_user.anon_id])
+
+    return circle_to_response(circle, await count_members(db, circle.thread_id), True)
 
 
 @router.post("/{circle_id}/leave", response_model=CircleResponse)
@@ -302,7 +372,7 @@ async def leave_circle(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Leave an anonymous Support Circle (remove from ChatThread participants)"""
+    """Leave an anonymous Support Circle (delete the thread_members row)"""
     stmt_circle = select(Circle).where(Circle.circle_id == uuid.UUID(circle_id))
     res_circle = await db.execute(stmt_circle)
     circle = res_circle.scalars().first()
@@ -313,39 +383,17 @@ async def leave_circle(
             detail="Support circle not found"
         )
         
-    stmt_thread = select(ChatThread).where(ChatThread.thread_id == circle.thread_id)
-    res_thread = await db.execute(stmt_thread)
-    thread = res_thread.scalars().first()
-    
-    if not thread:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Associated chat thread not found"
-        )
-        
     # Leave logic
-    participants = list(thread.participants_anon_ids)
-    if current_user.anon_id in participants:
-        participants.remove(current_user.anon_id)
-        thread.participants_anon_ids = participants
-        await db.commit()
-        await db.refresh(thread)
-        
-    return {
-        "circle_id": str(circle.circle_id),
-        "thread_id": str(circle.thread_id),
-        "name": circle.name,
-        "tagline": circle.tagline,
-        "welcome_message": circle.welcome_message,
-        "rules": circle.rules,
-        "opening_prompt": circle.opening_prompt,
-        "sensitivity_level": circle.sensitivity_level,
-        "theme": circle.theme,
-        "type": circle.type,
-        "created_at": circle.created_at,
-        "participants_count": len(thread.participants_anon_ids),
-        "is_member": False
-    }
+    stmt_leave = delete(ThreadMember).where(
+        ThreadMember.thread_id == circle.thread_id,
+        ThreadMember.anon_id == current_user.anon_id
+    )
+    res_leave = await db.execute(stmt_leave)
+    await db.commit()
+    if res_leave.rowcount:
+        await peer_chat_manager.remove_thread_member(str(circle.thread_id), current_user.anon_id)
+
+    return circle_to_response(circle, await count_members(db, circle.thread_id), False)
 
 
 @router.get("/{circle_id}", response_model=CircleResponse)
@@ -355,35 +403,18 @@ async def get_circle_details(
     current_user: User = Depends(get_current_user)
 ):
     """Get single Support Circle parameters"""
-    stmt_circle = select(Circle).where(Circle.circle_id == uuid.UUID(circle_id))
+    stmt_circle = (
+        select(Circle, *thread_stats_columns(current_user.anon_id))
+        .where(Circle.circle_id == uuid.UUID(circle_id))
+    )
     res_circle = await db.execute(stmt_circle)
-    circle = res_circle.scalars().first()
+    row = res_circle.first()
     
-    if not circle:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Support circle not found"
         )
-        
-    stmt_thread = select(ChatThread).where(ChatThread.thread_id == circle.thread_id)
-    res_thread = await db.execute(stmt_thread)
-    thread = res_thread.scalars().first()
-    
-    is_member = current_user.anon_id in thread.participants_anon_ids if thread else False
-    p_count = len(thread.participants_anon_ids) if thread else 0
-    
-    return {
-        "circle_id": str(circle.circle_id),
-        "thread_id": str(circle.thread_id),
-        "name": circle.name,
-        "tagline": circle.tagline,
-        "welcome_message": circle.welcome_message,
-        "rules": circle.rules,
-        "opening_prompt": circle.opening_prompt,
-        "sensitivity_level": circle.sensitivity_level,
-        "theme": circle.theme,
-        "type": circle.type,
-        "created_at": circle.created_at,
-        "participants_count": p_count,
-        "is_member": is_member
-    }
+
+    circle, p_count, is_member = row
+    return circle_to_response(circle, p_count, is_member)
@@ -10,10 +10,11 @@ from typing import Optional, List
 import uuid
 
 from db.session import get_db
-from api.deps import get_current_user
+from api.deps import get_current_user, get_current_user_profile
 from models.user import User
 from models.counselling_session import CounsellingSession, SessionStatusEnum
 from core.encryption import encrypt_string, decrypt_string
+from services.scheduler import schedule_post_session_mood_check
 
 from pydantic import BaseModel
 
@@ -142,7 +143,7 @@ async def get_session_join_info(
     session_id: str,
     join_request: JoinSessionRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_profile)
 ):
     """
     Get session join information
@@ -254,25 +255,12 @@ async def end_session(
         
         session.status = SessionStatusEnum.COMPLETED
         session.ended_at = datetime.utcnow()
-        session.mood_check_sent = False  # Will be sent by scheduled task after 30 min
+        session.mood_check_sent = False  # Will be sent by a background job after 30 min
         
-        await db.commit()
+        # The check-in job commits with the status change, so a restart cannot lose it
+        await schedule_post_session_mood_check(db, session.session_id)
         
-        # Schedule the post-session check-in task
-        try:
-            from services.scheduler import scheduler, send_post_session_mood_check
-            run_time = datetime.utcnow() + timedelta(minutes=30)
-            scheduler.add_job(
-                send_post_session_mood_check,
-                trigger="date",
-                run_date=run_time,
-                args=[str(session.session_id)],
-                id=f"mood_check_{session.session_id}",
-                replace_existing=True
-            )
-            print(f"[SCHEDULER] Scheduled mood check for session {session.session_id} at {run_time}")
-        except Exception as se:
-            print(f"[SCHEDULER] Failed to schedule background check-in: {se}")
+        await db.commit()
         
         return {
             "success": True,
@@ -14,7 +14,7 @@ from db.session import get_db
 from api.deps import get_current_user
 from models.user import User
 from models.crisis_event import CrisisEvent, RiskLevelEnum
-from core.encryption import decrypt_string
+from core.encryption import decrypt_string, decrypt_many
 
 from pydantic import BaseModel
 
@@ -200,17 +200,18 @@ async def get_flagged_messages(
         stmt = select(PeerMessage).where(PeerMessage.flagged == True).order_by(desc(PeerMessage.sent_at))
         res = await db.execute(stmt)
         flagged = res.scalars().all()
+        contents = decrypt_many(msg.content for msg in flagged)
         
         return [
             {
                 "message_id": str(msg.message_id),
                 "thread_id": str(msg.thread_id),
                 "sender_anon_id": msg.sender_anon_id,
-                "content": decrypt_string(msg.content) if msg.content else "",
+                "content": content or "",
                 "flag_reason": msg.flag_reason,
                 "sent_at": msg.sent_at
             }
-            for msg in flagged
+            for msg, content in zip(flagged, contents)
         ]
     
     except Exception as e:
@@ -1,58 +1,54 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from datetime import datetime, timedelta, timezone, date
+from sqlalchemy import select, desc, tuple_
+from datetime import datetime, timezone
+from typing import Optional, Tuple
 from db.session import get_db
 from models.exercise import ExerciseCompletion
 from schemas.wellness import ExerciseCompletionCreate, ExerciseCompletionResponse
-from api.v1.auth import get_current_user
+from api.deps import get_current_user
 from models.user import User
+from services.mood_rollup import record_exercise
+from services.exercise_streaks import current_streak, get_streak, get_streak_state, record_completion
+import base64
 
 router = APIRouter()
 
+MAX_HISTORY_PAGE_SIZE = 200
 
-async def get_streak(db: AsyncSession, user_id: int) -> int:
-    stmt = (
-        select(ExerciseCompletion.completed_at)
-        .where(ExerciseCompletion.user_id == user_id)
-        .order_by(desc(ExerciseCompletion.completed_at))
-    )
-    res = await db.execute(stmt)
-    completions = res.scalars().all()
-    if not completions:
-        return 0
-        
-    unique_dates = sorted(list(set(c.date() for c in completions)), reverse=True)
-    
-    today = date.today()
-    yesterday = today - timedelta(days=1)
-    
-    if unique_dates[0] not in (today, yesterday):
-        return 0
-        
-    streak = 0
-    current_check_date = unique_dates[0]
-    
-    for d in unique_dates:
-        if d == current_check_date:
-            streak += 1
-            current_check_date = current_check_date - timedelta(days=1)
-        else:
-            break
-            
-    return streak
+
+def encode_history_cursor(completion: ExerciseCompletion) -> str:
+    """Opaque keyset cursor for a history position: (completed_at, id)"""
+    raw = f"{completion.completed_at.isoformat()}|{completion.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        completed_at, completion_id = raw.split("|", 1)
+        return datetime.fromisoformat(completed_at), int(completion_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.get("/history", response_model=list[ExerciseCompletionResponse])
 async def get_exercise_history(
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    before: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    stmt = (
-        select(ExerciseCompletion)
-        .where(ExerciseCompletion.user_id == current_user.id)
-        .order_by(desc(ExerciseCompletion.completed_at))
-    )
+    """
+    Completions, newest first, one page at a time
+    - before: the last returned completion's cursor, for the next (older) page
+    """
+    stmt = select(ExerciseCompletion).where(ExerciseCompletion.user_id == current_user.id)
+    if before:
+        stmt = stmt.where(
+            tuple_(ExerciseCompletion.completed_at, ExerciseCompletion.id) < tuple_(*decode_history_cursor(before))
+        )
+    stmt = stmt.order_by(desc(ExerciseCompletion.completed_at), desc(ExerciseCompletion.id)).limit(limit)
     res = await db.execute(stmt)
     completions = res.scalars().all()
     streak = await get_streak(db, current_user.id)
@@ -61,6 +57,7 @@ async def get_exercise_history(
     for c in completions:
         resp = ExerciseCompletionResponse.model_validate(c)
         resp.streak = streak
+        resp.cursor = encode_history_cursor(c)
         items.append(resp)
     return items
 
@@ -70,8 +67,12 @@ async def get_current_streak(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    streak = await get_streak(db, current_user.id)
-    return {"streak": streak}
+    state = await get_streak_state(db, current_user.id)
+    return {
+        "streak": current_streak(state),
+        "longest_streak": state.longest_streak if state else 0,
+        "last_active_date": state.last_active_date if state else None
+    }
 
 
 @router.post("/complete", response_model=ExerciseCompletionResponse)
@@ -80,12 +81,16 @@ async def complete_exercise(
     db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
+    completed_at = datetime.now(timezone.utc)
     new_completion = ExerciseCompletion(
         user_id=current_user.id,
         exercise_type=exercise.exercise_type,
-        duration_seconds=exercise.duration_seconds
+        duration_seconds=exercise.duration_seconds,
+        completed_at=completed_at
     )
     db.add(new_completion)
+    await record_exercise(db, current_user.user_id, exercise.duration_seconds, completed_at)
+    await record_completion(db, current_user.id, completed_at)
     await db.commit()
     await db.refresh(new_completion)
     
@@ -5,7 +5,7 @@ Weekly Insights API v1 - Emotional pattern analysis and recommendations (Async v
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from datetime import datetime, timedelta, date
 from typing import List, Optional
 import uuid
@@ -13,9 +13,11 @@ import uuid
 from db.session import get_db
 from api.deps import get_current_user
 from models.user import User
-from models.weekly_insight import WeeklyInsight
-from models.journal_entry import JournalEntry
-from services.insight_generator import get_insight_generator
+from models.weekly_insight import WeeklyInsight, WeeklyInsightRun
+from models.daily_mood_rollup import DailyMoodRollup
+from services.insight_analytics import MIN_INSIGHT_ENTRIES, lookback_start
+from services.job_queue import enqueue_job, notify_job_worker
+from services.scheduler import USER_WEEKLY_INSIGHT_JOB, weekly_insight_run_progress
 
 from pydantic import BaseModel
 
@@ -126,7 +128,7 @@ async def generate_weekly_insight(
     """
     Manually trigger weekly insight generation
     Analyzes last 30 days of journal entries
-    Detects patterns and generates AI insights
+    Detects patterns and generates AI insights (queued as a background job)
     """
     try:
         # Calculate week range
@@ -148,73 +150,53 @@ async def generate_weekly_insight(
                 "insight_id": str(existing.insight_id)
             }
         
-        # Get entries from last 30 days
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        # Count entries from last 30 days (one rollup row per active day)
         stmt_entries = (
-            select(JournalEntry)
+            select(func.coalesce(func.sum(DailyMoodRollup.journal_entries), 0))
             .where(
-                JournalEntry.user_id == current_user.user_id,
-                JournalEntry.created_at >= thirty_days_ago
+                DailyMoodRollup.user_id == current_user.user_id,
+                DailyMoodRollup.day >= lookback_start().date()
             )
         )
         res_entries = await db.execute(stmt_entries)
-        entries = res_entries.scalars().all()
         
-        if len(entries) < 3:
+        if res_entries.scalar() < MIN_INSIGHT_ENTRIES:
             return {
                 "success": False,
                 "message": "Need at least 3 entries in the past 30 days for insight generation"
             }
         
-        # Extract data
-        moods = [entry.mood_selected.value for entry in entries]
-        timestamps = [entry.created_at for entry in entries]
-        categories = [entry.prompt_category.value for entry in entries]
-        
-        # Generate insights
-        generator = get_insight_generator()
-        insights_data = await generator.generate_weekly_insights(
-            moods=moods,
-            timestamps=timestamps,
-            categories=categories
-        )
-        
-        if not insights_data:
-            return {
-                "success": False,
-                "message": "Error generating insights"
-            }
-        
-        # Store insight
-        insight = WeeklyInsight(
-            insight_id=uuid.uuid4(),
-            user_id=current_user.user_id,
-            week_start=week_start,
-            observation=insights_data["observation"],
-            reframe=insights_data["reframe"],
-            micro_action=insights_data["micro_action"],
-            mood_frequency_data=insights_data.get("mood_frequency_data"),
-            trigger_categories=insights_data.get("trigger_categories"),
-            time_of_day_pattern=insights_data.get("time_of_day_pattern"),
-            positive_streaks=insights_data.get("positive_streaks"),
-            generated_at=datetime.utcnow()
+        # The LLM call runs as a background job; the card shows up in /insights/weekly
+        job_id = await enqueue_job(
+            db,
+            USER_WEEKLY_INSIGHT_JOB,
+            {"user_id": str(current_user.user_id), "week_start": week_start.isoformat()},
+            idempotency_key=f"weekly_insight:{current_user.user_id}:{week_start.isoformat()}"
         )
-        
-        db.add(insight)
         await db.commit()
+        notify_job_worker()
         
         return {
             "success": True,
-            "insight_id": str(insight.insight_id),
-            "insight": {
-                "observation": insight.observation,
-                "reframe": insight.reframe,
-                "micro_action": insight.micro_action,
-                "week_start": week_start
-            }
+            "queued": job_id is not None,
+            "message": "Your weekly insight is being generated." if job_id else "Your weekly insight is already being generated."
         }
     
     except Exception as e:
         await db.rollback()
         print(f"Error generating insight: {e}")
         raise HTTPException(status_code=500, detail="Error generating insight")
+
+
+@router.get("/weekly/runs")
+async def get_weekly_insight_runs(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Admin view of recent weekly digest runs: progress, failures, throughput and ETA"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access only")
+    
+    stmt = select(WeeklyInsightRun).order_by(desc(WeeklyInsightRun.week_start)).limit(10)
+    res = await db.execute(stmt)
+    return [weekly_insight_run_progress(run) for run in res.scalars().all()]
@@ -8,19 +8,22 @@ from sqlalchemy.future import select
 from sqlalchemy import desc
 from datetime import datetime
 from typing import List, Optional
+import asyncio
 import uuid
 
 from db.session import get_db
 from api.deps import get_current_user
 from models.user import User
 from models.journal_entry import JournalEntry, MoodEnum, PromptCategoryEnum
-from models.shared_story import SharedStory
-from core.encryption import encrypt_string, decrypt_string
+from core.encryption import encrypt_string, decrypt_many
 from services.mood_companion import get_mood_companion
 from services.crisis_detector import get_crisis_detector
 from models.crisis_event import CrisisEvent
 from services.content_moderator import get_content_moderator
-from services.story_engine import get_story_engine
+from services.job_queue import enqueue_job, notify_job_worker
+from services.story_jobs import SHARE_STORY_JOB
+from services.crisis_jobs import JOURNAL_CRISIS_JOB
+from services.mood_rollup import record_journal_entry
 
 from pydantic import BaseModel, Field
 
@@ -58,6 +61,15 @@ class PromptResponse(BaseModel):
     text: str
 
 
+# ===== AI STEP DEADLINES =====
+
+# Reflection is best-effort; crisis assessment gets the longer budget and is
+# never cancelled because the reflection ran slow. An assessment that misses its
+# deadline or fails is retried by a durable job instead of being dropped.
+REFLECTION_TIMEOUT_SECONDS = 8.0
+CRISIS_TIMEOUT_SECONDS = 15.0
+
+
 # ===== PROMPTS BY CATEGORY =====
 
 PROMPTS = {
@@ -101,8 +113,8 @@ async def create_journal_entry(
     - Mood wheel selection
     - Prompt category
     - Free-text entry (min 50 chars)
-    - Generates AI reflection
-    - Runs crisis detection
+    - Generates AI reflection and runs crisis detection concurrently
+    - If crisis detection fails, the entry is saved with a job that retries it
     """
     try:
         # Encrypt entry text
@@ -122,26 +134,50 @@ async def create_journal_entry(
         db.add(entry)
         await db.flush()
         
-        # Generate AI reflection
+        # Generate AI reflection and run crisis detection in parallel
         companion = get_mood_companion()
-        ai_reflection = await companion.generate_reflection(
-            entry_data.mood_selected.value,
-            entry_data.entry_text
+        detector = get_crisis_detector()
+        ai_reflection, crisis_result = await asyncio.gather(
+            asyncio.wait_for(
+                companion.generate_reflection(
+                    entry_data.mood_selected.value,
+                    entry_data.entry_text,
+                    timeout=REFLECTION_TIMEOUT_SECONDS
+                ),
+                timeout=REFLECTION_TIMEOUT_SECONDS
+            ),
+            detector.assess_risk(
+                entry_data.entry_text,
+                source_type="journal",
+                timeout=CRISIS_TIMEOUT_SECONDS
+            ),
+            return_exceptions=True
         )
         
+        # A slow or failed reflection never blocks crisis persistence
+        if isinstance(ai_reflection, BaseException):
+            print(f"Reflection step failed: {ai_reflection!r}")
+            ai_reflection = None
+        
         if ai_reflection:
             entry.ai_reflection = ai_reflection
         
-        # Crisis detection
-        detector = get_crisis_detector()
-        crisis_result = await detector.assess_risk(
-            entry_data.entry_text,
-            source_type="journal"
-        )
+        if isinstance(crisis_result, BaseException):
+            print(f"Crisis assessment step failed: {crisis_result!r}")
+            crisis_result = None
         
         crisis_detected = False
         crisis_level = None
-        if crisis_result["requires_intervention"]:
+        crisis_pending = crisis_result is None or bool(crisis_result.get("error"))
+        if crisis_pending:
+            # Never record a fallback LOW: the job re-assesses the entry until it succeeds
+            await enqueue_job(
+                db,
+                JOURNAL_CRISIS_JOB,
+                {"entry_id": str(entry.entry_id)},
+                idempotency_key=f"crisis:journal:{entry.entry_id}"
+            )
+        elif crisis_result["requires_intervention"]:
             crisis_detected = True
             crisis_level = crisis_result["risk_level"]
             crisis_event = CrisisEvent(
@@ -157,7 +193,11 @@ async def create_journal_entry(
             )
             db.add(crisis_event)
         
+        # Upsert the rollup last: it locks the student's row for the day until commit
+        await record_journal_entry(db, current_user.user_id, entry.mood_selected, entry.created_at)
         await db.commit()
+        if crisis_pending:
+            notify_job_worker()
         
         return {
             "entry_id": str(entry.entry_id),
@@ -166,7 +206,8 @@ async def create_journal_entry(
             "ai_reflection": ai_reflection,
             "created_at": entry.created_at,
             "crisis_detected": crisis_detected,
-            "crisis_level": crisis_level
+            "crisis_level": crisis_level,
+            "crisis_assessment_pending": crisis_pending
         }
     
     except Exception as e:
@@ -193,14 +234,15 @@ async def list_journal_entries(
         )
         res = await db.execute(stmt)
         entries = res.scalars().all()
+        texts = decrypt_many(entry.entry_text for entry in entries)
         
         result = []
-        for entry in entries:
+        for entry, text in zip(entries, texts):
             result.append({
                 "entry_id": str(entry.entry_id),
                 "mood_selected": entry.mood_selected.value,
                 "prompt_category": entry.prompt_category.value,
-                "entry_text": decrypt_string(entry.entry_text) if entry.entry_text else "",
+                "entry_text": text or "",
                 "ai_reflection": entry.ai_reflection,
                 "shared_anonymously": entry.shared_anonymously,
                 "created_at": entry.created_at
@@ -235,7 +277,7 @@ async def share_entry_anonymously(
 ):
     """
     Share a journal entry anonymously to the story feed
-    - AI content moderation check
+    - AI content moderation check (background job)
     - Only excerpt stored (max 120 chars)
     - No identifiable info
     """
@@ -254,42 +296,32 @@ async def share_entry_anonymously(
         if entry.shared_anonymously:
             raise HTTPException(status_code=400, detail="Entry already shared")
         
-        # Decrypt entry for processing
-        decrypted_text = decrypt_string(entry.entry_text)
-        
-        # Process through Story Engine 3-step pipeline
-        story_engine = get_story_engine()
-        engine_result = await story_engine.process_entry(decrypted_text)
-        
-        if not engine_result["is_safe"]:
+        # Story Engine processing runs as a background job queued in this commit;
+        # an unsafe entry is un-shared there and the author is notified
+        entry.shared_anonymously = True
+        job_id = await enqueue_job(
+            db,
+            SHARE_STORY_JOB,
+            {
+                "entry_id": str(entry.entry_id),
+                "user_id": current_user.id,
+                "author_anon_id": current_user.anon_id
+            },
+            idempotency_key=f"share_story:{entry.entry_id}"
+        )
+        if job_id is None:
+            # Reviewed once already and turned down; entries are not re-submitted
+            await db.rollback()
             return {
                 "success": False,
-                "message": engine_result.get("rejection_message") or "This entry is a bit too personal to share — your words are safe with us."
+                "message": "This entry was already reviewed for sharing."
             }
-        
-        # Create story storing the reformatted text in excerpt
-        reformatted_text = engine_result.get("reformatted_text") or decrypted_text
-        story = SharedStory(
-            story_id=uuid.uuid4(),
-            journal_entry_id=entry.entry_id,
-            author_anon_id=current_user.anon_id,
-            excerpt=reformatted_text,
-            mood=engine_result.get("mood") or entry.mood_selected.value,
-            theme=engine_result.get("theme"),
-            resonance_hook=engine_result.get("resonance_hook"),
-            moderated=True,
-            published_at=datetime.utcnow()
-        )
-        
-        entry.shared_anonymously = True
-        
-        db.add(story)
         await db.commit()
+        notify_job_worker()
         
         return {
             "success": True,
-            "story_id": str(story.story_id),
-            "message": "Shared anonymously! Your story might help someone feel less alone."
+            "message": "Shared anonymously! Your story will appear in the feed once it has been reviewed."
         }
     
     except Exception as e:
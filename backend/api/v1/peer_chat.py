@@ -2,22 +2,33 @@
 Peer Chat API v1 - Anonymous group and 1-on-1 peer messaging with WebSocket support
 """
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy import and_, desc, func, update, tuple_
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import base64
+import functools
+import hashlib
+import time
 import uuid
 import json
 
-from db.session import get_db
-from api.deps import get_current_user
+from db.session import get_db, SessionLocal
+from api.deps import get_current_user, authenticate_websocket, WS_POLICY_VIOLATION
 from models.user import User
-from models.peer_message import PeerMessage, ChatThread, ChatThreadTypeEnum
-from models.crisis_event import CrisisEvent
-from core.encryption import encrypt_string, decrypt_string
-from services.crisis_detector import get_crisis_detector
+from models.peer_message import PeerMessage, ChatThread, ChatThreadTypeEnum, ThreadMember
+from core.encryption import encrypt_string, decrypt_many
+from services.backplane import PEER_DIRECT_CHANNEL, Backplane, get_backplane
+from services.presence import PRESENCE_HEARTBEAT_SECONDS, Presence, PresenceStore, get_presence_store
+from services.crisis_jobs import PEER_MESSAGE_CRISIS_JOB, peer_message_crisis_payload
+from services.job_queue import enqueue_job, notify_job_worker
+from services.moderation_cache import get_moderation_cache
+from services.message_moderator import get_message_moderator
 
 from pydantic import BaseModel
 
@@ -56,6 +67,7 @@ class PeerMessageResponse(BaseModel):
     flagged: bool
     moderation_status: str
     moderation_reason: Optional[str] = None
+    cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -65,62 +77,476 @@ class ReportMessageRequest(BaseModel):
     reason: str
 
 
+class MemberPresence(BaseModel):
+    anon_id: str
+    status: str
+    last_seen: Optional[datetime]
+
+
+class ThreadPresenceResponse(BaseModel):
+    thread_id: str
+    online_count: int
+    members: List[MemberPresence]
+
+
+# ===== HISTORY CURSORS =====
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_message_cursor(sent_at: datetime, message_id) -> str:
+    """Opaque keyset cursor for a message position: (sent_at, message_id)"""
+    raw = f"{sent_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_message_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sent_at, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(sent_at), uuid.UUID(message_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 # ===== WEBSOCKET CONNECTION MANAGER =====
 
+# Outbound back-pressure: each socket gets a bounded queue drained by its own
+# writer task. A full queue, or a backlog above the lag threshold for longer
+# than the grace period, evicts the socket instead of slowing everyone else.
+OUTBOUND_QUEUE_SIZE = 256
+LAG_THRESHOLD = 64
+LAG_GRACE_SECONDS = 10.0
+SEND_TIMEOUT_SECONDS = 5.0
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "Try Again Later"
+
+# Presence: a socket reports inbound activity to the shared store at most this often
+PRESENCE_TOUCH_SECONDS = 15.0
+
+
+class PeerConnection:
+    """One accepted socket with its bounded outbound queue and writer task"""
+
+    def __init__(self, anon_id: str, websocket: WebSocket, on_evict):
+        self.anon_id = anon_id
+        self.connection_id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.activity_reported_at: Optional[float] = None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+        self.lagging_since: Optional[float] = None
+        self.closed = False
+        self._socket_closed = False
+        self._on_evict = on_evict
+        self._writer = asyncio.create_task(self._drain())
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def touch(self) -> bool:
+        """Note inbound activity from the client; True when it is due to be reported"""
+        now = time.monotonic()
+        if self.activity_reported_at is not None and now - self.activity_reported_at < PRESENCE_TOUCH_SECONDS:
+            return False
+        self.activity_reported_at = now
+        return True
+
+    def enqueue(self, text: str) -> bool:
+        """Queue pre-encoded text without waiting on the network"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self._evict("outbound queue full")
+            return False
+
+        if self.depth > LAG_THRESHOLD:
+            now = time.monotonic()
+            if self.lagging_since is None:
+                self.lagging_since = now
+            elif now - self.lagging_since > LAG_GRACE_SECONDS:
+                self._evict(f"lagging over {LAG_THRESHOLD} messages for {LAG_GRACE_SECONDS}s")
+                return False
+        else:
+            self.lagging_since = None
+        return True
+
+    async def _drain(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._evict(f"send failed: {e!r}")
+
+    def _evict(self, reason: str):
+        if self.closed:
+            return
+        self.closed = True
+        print(f"[WS] Evicting {self.anon_id}: {reason}")
+        asyncio.create_task(self._on_evict(self))
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+        if self._socket_closed:
+            return
+        self._socket_closed = True
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
 class PeerConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+    """
+    Per-worker socket registry. Thread broadcasts go through the backplane:
+    a worker subscribes to a thread channel while at least one local socket
+    belongs to that thread, and fans each event out to those sockets only.
+
+    An anon_id may hold several sockets (phone, laptop, extra tabs); every one
+    of them receives thread events. Presence lives in the shared presence store:
+    each socket is registered there and refreshed by this worker's heartbeat, so
+    the identity counts as present while any worker holds one of its sockets.
+    """
 
-    async def connect(self, anon_id: str, websocket: WebSocket):
+    MEMBERSHIP_CHANNEL = "peer_chat:membership"
+    DIRECT_CHANNEL = PEER_DIRECT_CHANNEL
+
+    def __init__(self, backplane: Optional[Backplane] = None):
+        # anon_id -> connection_id -> connection
+        self.active_connections: Dict[str, Dict[str, PeerConnection]] = {}
+        # thread_id -> anon_ids connected to this worker (who it fans thread events out to)
+        self.thread_members: Dict[str, Set[str]] = {}
+        # anon_id -> thread_ids tracked for it on this worker
+        self.member_threads: Dict[str, Set[str]] = {}
+        self._backplane = backplane
+        self._presence: Optional[PresenceStore] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.dropped_sockets = 0
+        self.dropped_messages = 0
+
+    @property
+    def backplane(self) -> Backplane:
+        if self._backplane is None:
+            self._backplane = get_backplane()
+        return self._backplane
+
+    @property
+    def presence_store(self) -> PresenceStore:
+        if self._presence is None:
+            self._presence = get_presence_store()
+        return self._presence
+
+    @staticmethod
+    def thread_channel(thread_id: str) -> str:
+        return f"peer_chat:thread:{thread_id}"
+
+    async def connect(self, anon_id: str, websocket: WebSocket, thread_ids: List[str] = ()) -> PeerConnection:
         await websocket.accept()
-        self.active_connections[anon_id] = websocket
-        print(f"[WS] User {anon_id} connected. Active connections: {list(self.active_connections.keys())}")
-
-    def disconnect(self, anon_id: str):
+        connection = PeerConnection(anon_id, websocket, self._evict)
+        sockets = self.active_connections.setdefault(anon_id, {})
+        first_socket = not sockets
+        sockets[connection.connection_id] = connection
+        await self._report(self.presence_store.add_socket(anon_id, connection.connection_id))
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        if not self.backplane.is_subscribed(self.MEMBERSHIP_CHANNEL):
+            await self.backplane.subscribe(self.MEMBERSHIP_CHANNEL, self._on_membership_event)
+        if not self.backplane.is_subscribed(self.DIRECT_CHANNEL):
+            await self.backplane.subscribe(self.DIRECT_CHANNEL, self._on_direct_event)
+        if first_socket:
+            for thread_id in thread_ids:
+                await self._track(str(thread_id), anon_id)
+        print(f"[WS] User {anon_id} connected ({len(sockets)} sockets). Active users: {len(self.active_connections)}")
+        return connection
+
+    async def disconnect(self, anon_id: str, connection: Optional[PeerConnection] = None):
+        """Close one socket, or every socket of anon_id when connection is None"""
+        sockets = self.active_connections.get(anon_id)
+        if not sockets:
+            return
+        if connection is None:
+            closing = list(sockets.values())
+        elif sockets.get(connection.connection_id) is connection:
+            closing = [connection]
+        else:
+            return
+        for conn in closing:
+            del sockets[conn.connection_id]
+            await conn.close()
+            await self._report(self.presence_store.remove_socket(anon_id, conn.connection_id))
+        if sockets:
+            return
+
+        del self.active_connections[anon_id]
+        for thread_id in list(self.member_threads.get(anon_id, ())):
+            await self._untrack(thread_id, anon_id)
+        print(f"[WS] User {anon_id} disconnected.")
+
+    async def _evict(self, connection: PeerConnection):
+        self.dropped_sockets += 1
+        self.dropped_messages += connection.depth
+        await connection.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        await self.disconnect(connection.anon_id, connection)
+
+    async def _track(self, thread_id: str, anon_id: str):
+        members = self.thread_members.setdefault(thread_id, set())
+        if not members:
+            await self.backplane.subscribe(
+                self.thread_channel(thread_id),
+                functools.partial(self._on_thread_event, thread_id)
+            )
+        members.add(anon_id)
+        self.member_threads.setdefault(anon_id, set()).add(thread_id)
+
+    async def _untrack(self, thread_id: str, anon_id: str):
+        members = self.thread_members.get(thread_id)
+        if members is not None:
+            members.discard(anon_id)
+            if not members:
+                del self.thread_members[thread_id]
+                await self.backplane.unsubscribe(self.thread_channel(thread_id))
+        threads = self.member_threads.get(anon_id)
+        if threads is not None:
+            threads.discard(thread_id)
+            if not threads:
+                del self.member_threads[anon_id]
+
+    async def _on_thread_event(self, thread_id: str, message: dict):
+        # Serialize once per event, then hand the same text to every local socket
+        text = json.dumps(message, default=str)
+        for anon_id in list(self.thread_members.get(thread_id, ())):
+            self.send_text(text, anon_id)
+
+    async def _on_membership_event(self, event: dict):
+        anon_id = event.get("anon_id")
+        if anon_id not in self.active_connections:
+            return
+        if event.get("action") == "join":
+            await self._track(event["thread_id"], anon_id)
+        elif event.get("action") == "leave":
+            await self._untrack(event["thread_id"], anon_id)
+
+    async def _on_direct_event(self, event: dict):
+        # Events for one anon_id (e.g. CRISIS_ALERT from the job worker); only its worker delivers
+        anon_id = event.get("anon_id")
         if anon_id in self.active_connections:
-            del self.active_connections[anon_id]
-            print(f"[WS] User {anon_id} disconnected.")
+            await self.send_personal_message(event["message"], anon_id)
+
+    async def _publish(self, channel: str, message: dict) -> bool:
+        try:
+            await self.backplane.publish(channel, message)
+            return True
+        except Exception as e:
+            print(f"[WS] Backplane publish to {channel} failed: {e}")
+            return False
+
+    async def add_thread_members(self, thread_id: str, anon_ids: List[str]):
+        """Announce new thread members so whichever worker holds their socket subscribes"""
+        for anon_id in anon_ids:
+            await self._publish(
+                self.MEMBERSHIP_CHANNEL,
+                {"action": "join", "thread_id": str(thread_id), "anon_id": anon_id}
+            )
+
+    async def remove_thread_member(self, thread_id: str, anon_id: str):
+        await self._publish(
+            self.MEMBERSHIP_CHANNEL,
+            {"action": "leave", "thread_id": str(thread_id), "anon_id": anon_id}
+        )
+
+    def send_text(self, text: str, anon_id: str) -> bool:
+        """Queue text on every socket of anon_id; True if at least one accepted it"""
+        delivered = False
+        for connection in list(self.active_connections.get(anon_id, {}).values()):
+            if connection.enqueue(text):
+                delivered = True
+            else:
+                self.dropped_messages += 1
+        return delivered
 
     async def send_personal_message(self, message: dict, anon_id: str):
-        if anon_id in self.active_connections:
-            try:
-                await self.active_connections[anon_id].send_json(message)
-                return True
-            except Exception as e:
-                print(f"[WS] Failed to send to {anon_id}: {e}")
-                return False
-        return False
+        return self.send_text(json.dumps(message, default=str), anon_id)
+
+    # ----- presence -----
+
+    async def _report(self, update) -> bool:
+        """Await a presence store write; presence is best-effort and never breaks chat"""
+        try:
+            await update
+            return True
+        except Exception as e:
+            print(f"[WS] Presence update failed: {e}")
+            return False
+
+    async def _heartbeat_loop(self):
+        while self.active_connections:
+            await asyncio.sleep(PRESENCE_HEARTBEAT_SECONDS)
+            sockets = {anon_id: list(conns) for anon_id, conns in self.active_connections.items() if conns}
+            await self._report(self.presence_store.heartbeat(sockets))
+
+    async def touch(self, anon_id: str, connection: Optional[PeerConnection] = None):
+        """Record inbound activity for anon_id (a socket frame, or a message sent over REST)"""
+        if connection is None or connection.touch():
+            await self._report(self.presence_store.touch(anon_id))
+
+    async def presence(self, anon_ids: List[str]) -> Dict[str, Presence]:
+        """anon_id -> (status, last_seen) across every worker; offline if the store is unreachable"""
+        try:
+            return await self.presence_store.lookup(anon_ids)
+        except Exception as e:
+            print(f"[WS] Presence lookup failed: {e}")
+            return {anon_id: ("offline", None) for anon_id in anon_ids}
+
+    def metrics(self) -> dict:
+        depths = [c.depth for sockets in self.active_connections.values() for c in sockets.values()]
+        return {
+            "connections": len(depths),
+            "users": len(self.active_connections),
+            "subscribed_threads": len(self.thread_members),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "lagging_connections": sum(1 for d in depths if d > LAG_THRESHOLD),
+            "dropped_sockets": self.dropped_sockets,
+            "dropped_messages": self.dropped_messages,
+        }
 
-    async def broadcast_to_thread(self, thread_id: str, message: dict, participants: List[str]):
-        print(f"[WS] Broadcasting message to thread {thread_id} for participants {participants}")
-        for p in participants:
-            await self.send_personal_message(message, p)
+    async def broadcast_to_thread(self, thread_id: str, message: dict):
+        """Publish to the thread channel; every subscribed worker delivers locally"""
+        return await self._publish(self.thread_channel(str(thread_id)), message)
 
 
 manager = PeerConnectionManager()
 
 
+async def load_thread_ids(anon_id: str) -> List[str]:
+    """Thread ids an anon_id belongs to, used to subscribe its socket on connect"""
+    async with SessionLocal() as db:
+        stmt = select(ThreadMember.thread_id).where(ThreadMember.anon_id == anon_id)
+        res = await db.execute(stmt)
+        return [str(t) for t in res.scalars().all()]
+
+
+# ===== MEMBERSHIP HELPERS =====
+
+def participants_column():
+    """Correlated array_agg of a thread's members, ordered by join time"""
+    # Aliased so it stays independent of any thread_members join in the outer query
+    member = aliased(ThreadMember)
+    return (
+        select(func.array_agg(aggregate_order_by(member.anon_id, member.joined_at)))
+        .where(member.thread_id == ChatThread.thread_id)
+        .scalar_subquery()
+    )
+
+
+async def is_thread_member(db: AsyncSession, thread_id: uuid.UUID, anon_id: str) -> bool:
+    """Primary-key point lookup on thread_members"""
+    stmt = select(ThreadMember.anon_id).where(
+        ThreadMember.thread_id == thread_id,
+        ThreadMember.anon_id == anon_id
+    )
+    res = await db.execute(stmt)
+    return res.first() is not None
+
+
+async def load_thread_for_member(
+    db: AsyncSession,
+    thread_id: uuid.UUID,
+    anon_id: str
+) -> Tuple[Optional[ChatThread], bool]:
+    """Fetch a thread and whether anon_id belongs to it in one query"""
+    stmt = (
+        select(ChatThread, ThreadMember.anon_id)
+        .outerjoin(
+            ThreadMember,
+            and_(ThreadMember.thread_id == ChatThread.thread_id, ThreadMember.anon_id == anon_id)
+        )
+        .where(ChatThread.thread_id == thread_id)
+    )
+    res = await db.execute(stmt)
+    row = res.first()
+    if row is None:
+        return None, False
+    return row[0], row[1] is not None
+
+
+async def get_participants(db: AsyncSession, thread_id: uuid.UUID) -> List[str]:
+    stmt = (
+        select(ThreadMember.anon_id)
+        .where(ThreadMember.thread_id == thread_id)
+        .order_by(ThreadMember.joined_at)
+    )
+    res = await db.execute(stmt)
+    return list(res.scalars().all())
+
+
+def participant_key(anon_ids: List[str]) -> str:
+    """Canonical key of a participant set (order-independent); matches migration 9a4f1c3e8b27"""
+    return hashlib.sha256("\x1f".join(sorted(set(anon_ids))).encode()).hexdigest()
+
+
+def thread_to_response(thread: ChatThread, participants: List[str]) -> dict:
+    return {
+        "thread_id": str(thread.thread_id),
+        "thread_type": thread.thread_type.value if hasattr(thread.thread_type, "value") else str(thread.thread_type),
+        "participants_anon_ids": participants or [],
+        "created_at": thread.created_at,
+        "last_message_at": thread.last_message_at
+    }
+
+
 # ===== ENDPOINTS =====
 
 @router.websocket("/ws/{anon_id}")
 async def websocket_endpoint(websocket: WebSocket, anon_id: str):
     """
     WebSocket endpoint for real-time peer chat
-    Connections are mapped by anon_id
+    Connections are mapped by anon_id (several sockets per id are allowed)
+    and subscribed to the user's threads
     """
-    await manager.connect(anon_id, websocket)
+    claims = await authenticate_websocket(websocket)
+    if claims is None:
+        return
+    if claims["anon_id"] != anon_id:
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return
+
+    thread_ids = await load_thread_ids(anon_id)
+    connection = await manager.connect(anon_id, websocket, thread_ids)
     try:
         while True:
             # Keep connection alive, listen for incoming messages if any
             data = await websocket.receive_text()
+            await manager.touch(anon_id, connection)
             # If front-end sends a ping, reply with pong
             if data == "ping":
-                await websocket.send_text("pong")
+                connection.enqueue("pong")
     except WebSocketDisconnect:
-        manager.disconnect(anon_id)
+        await manager.disconnect(anon_id, connection)
     except Exception as e:
         print(f"[WS] Connection error for {anon_id}: {e}")
-        manager.disconnect(anon_id)
+        await manager.disconnect(anon_id, connection)
+
+
+@router.get("/metrics")
+async def get_connection_metrics(
+    current_user: User = Depends(get_current_user)
+):
+    """Admin view of this worker's WebSocket queue depth, dropped sockets and moderation stages"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access only")
+    return {
+        **manager.metrics(),
+        "moderation": get_message_moderator().stats(),
+        "moderation_cache": get_moderation_cache().stats(),
+    }
 
 
 @router.post("/threads", response_model=ChatThreadResponse)
@@ -145,27 +571,60 @@ async def get_or_create_thread(
             if len(participants) != 2:
                 raise HTTPException(status_code=400, detail="1-on-1 chat must have exactly 2 participants")
 
-            # Check if 1-on-1 thread exists
-            stmt = select(ChatThread).where(
-                ChatThread.thread_type == ChatThreadTypeEnum.PEER_1ON1
+            # Idempotent upsert on the pair key: concurrent requests converge on one thread
+            key = participant_key(participants)
+            now = datetime.utcnow()
+            stmt_insert = (
+                pg_insert(ChatThread)
+                .values(
+                    thread_id=uuid.uuid4(),
+                    thread_type=ChatThreadTypeEnum.PEER_1ON1,
+                    participant_key=key,
+                    created_at=now
+                )
+                .on_conflict_do_nothing(index_elements=["participant_key"])
+                .returning(ChatThread.thread_id)
             )
-            res = await db.execute(stmt)
-            threads = res.scalars().all()
-            for t in threads:
-                if sorted(t.participants_anon_ids) == participants:
-                    return t
+            res = await db.execute(stmt_insert)
+            created_id = res.scalar_one_or_none()
+
+            if created_id is not None:
+                await db.execute(
+                    pg_insert(ThreadMember)
+                    .values([
+                        {"thread_id": created_id, "anon_id": anon_id, "joined_at": now, "role": "member"}
+                        for anon_id in participants
+                    ])
+                    .on_conflict_do_nothing(index_elements=["thread_id", "anon_id"])
+                )
+                await db.commit()
+                await manager.add_thread_members(str(created_id), participants)
+
+            res = await db.execute(select(ChatThread).where(ChatThread.participant_key == key))
+            return thread_to_response(res.scalars().one(), participants)
 
         # Create new thread
+        now = datetime.utcnow()
         new_thread = ChatThread(
             thread_id=uuid.uuid4(),
             thread_type=request.thread_type,
-            participants_anon_ids=participants,
-            created_at=datetime.utcnow()
+            created_at=now
         )
         db.add(new_thread)
+        await db.flush()
+        db.add_all([
+            ThreadMember(
+                thread_id=new_thread.thread_id,
+                anon_id=anon_id,
+                joined_at=now,
+                role="owner" if anon_id == current_user.anon_id else "member"
+            )
+            for anon_id in participants
+        ])
         await db.commit()
         await db.refresh(new_thread)
-        return new_thread
+        await manager.add_thread_members(str(new_thread.thread_id), participants)
+        return thread_to_response(new_thread, participants)
 
     except HTTPException as he:
         raise he
@@ -182,58 +641,137 @@ async def get_threads(
 ):
     """List all threads that the user belongs to"""
     try:
-        # ARRAY comparison filter: does participants_anon_ids contain current_user.anon_id?
-        # Using any element comparison
-        stmt = select(ChatThread).where(
-            ChatThread.participants_anon_ids.any(current_user.anon_id)
-        ).order_by(desc(ChatThread.last_message_at))
+        # Indexed lookup of the user's memberships, participants aggregated per thread
+        stmt = (
+            select(ChatThread, participants_column())
+            .join(ThreadMember, ThreadMember.thread_id == ChatThread.thread_id)
+            .where(ThreadMember.anon_id == current_user.anon_id)
+            .order_by(desc(ChatThread.last_message_at))
+        )
         res = await db.execute(stmt)
-        return res.scalars().all()
+        return [thread_to_response(thread, participants) for thread, participants in res.all()]
     except Exception as e:
         print(f"Error listing threads: {e}")
         raise HTTPException(status_code=500, detail="Error listing threads")
 
 
+@router.get("/threads/{thread_id}/presence", response_model=ThreadPresenceResponse)
+async def get_thread_presence(
+    thread_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Online count and per-member presence (online / idle / offline + last seen) for a thread"""
+    try:
+        t_uuid = uuid.UUID(thread_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid thread id")
+
+    participants = await get_participants(db, t_uuid)
+
+    if current_user.anon_id not in participants:
+        raise HTTPException(status_code=403, detail="Not authorized to view this thread")
+
+    # Shared presence, so sockets held by other workers count too
+    presence = await manager.presence(participants)
+    members = [
+        MemberPresence(anon_id=anon_id, status=presence[anon_id][0], last_seen=presence[anon_id][1])
+        for anon_id in participants
+    ]
+
+    return ThreadPresenceResponse(
+        thread_id=thread_id,
+        online_count=sum(1 for m in members if m.status != "offline"),
+        members=members
+    )
+
+
+@router.post("/threads/{thread_id}/read")
+async def mark_thread_read(
+    thread_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Record that the user has read the thread up to now"""
+    try:
+        t_uuid = uuid.UUID(thread_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid thread id")
+
+    last_read_at = datetime.utcnow()
+    stmt = (
+        update(ThreadMember)
+        .where(ThreadMember.thread_id == t_uuid, ThreadMember.anon_id == current_user.anon_id)
+        .values(last_read_at=last_read_at)
+    )
+    res = await db.execute(stmt)
+    if res.rowcount == 0:
+        raise HTTPException(status_code=403, detail="Not authorized to view this thread")
+    await db.commit()
+    return {"thread_id": thread_id, "last_read_at": last_read_at}
+
+
 @router.get("/messages/{thread_id}", response_model=List[PeerMessageResponse])
 async def get_thread_messages(
     thread_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get message history for a thread (decrypted)"""
+    """
+    Get message history for a thread (decrypted), oldest first
+    - No cursor: the latest `limit` messages; the first one's `cursor` pages further back
+    - before: the page of older messages preceding that cursor (scrollback)
+    - after: messages newer than that cursor (catch-up after a reconnect);
+      repeat with the last returned cursor until fewer than `limit` come back
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
     try:
         t_uuid = uuid.UUID(thread_id)
         
         # Verify user is in thread
-        stmt_thread = select(ChatThread).where(ChatThread.thread_id == t_uuid)
-        res_thread = await db.execute(stmt_thread)
-        thread = res_thread.scalars().first()
+        thread, is_member = await load_thread_for_member(db, t_uuid, current_user.anon_id)
         
         if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
             
-        if current_user.anon_id not in thread.participants_anon_ids:
+        if not is_member:
             raise HTTPException(status_code=403, detail="Not authorized to view messages in this thread")
 
-        stmt_messages = (
-            select(PeerMessage)
-            .where(PeerMessage.thread_id == t_uuid)
-            .order_by(PeerMessage.sent_at.asc())
-        )
-        res_messages = await db.execute(stmt_messages)
+        position = tuple_(PeerMessage.sent_at, PeerMessage.message_id)
+        stmt_messages = select(PeerMessage).where(PeerMessage.thread_id == t_uuid)
+        if after:
+            stmt_messages = (
+                stmt_messages
+                .where(position > tuple_(*decode_message_cursor(after)))
+                .order_by(PeerMessage.sent_at.asc(), PeerMessage.message_id.asc())
+            )
+        else:
+            if before:
+                stmt_messages = stmt_messages.where(position < tuple_(*decode_message_cursor(before)))
+            stmt_messages = stmt_messages.order_by(PeerMessage.sent_at.desc(), PeerMessage.message_id.desc())
+        res_messages = await db.execute(stmt_messages.limit(limit))
         messages = res_messages.scalars().all()
+        if not after:
+            messages = list(reversed(messages))
+        contents = decrypt_many(msg.content for msg in messages)
 
         results = []
-        for msg in messages:
+        for msg, content in zip(messages, contents):
             results.append({
                 "message_id": str(msg.message_id),
                 "thread_id": str(msg.thread_id),
                 "sender_anon_id": msg.sender_anon_id,
-                "content": decrypt_string(msg.content) if msg.content else "",
+                "content": content or "",
                 "sent_at": msg.sent_at,
                 "flagged": msg.flagged,
                 "moderation_status": msg.moderation_status,
-                "moderation_reason": msg.moderation_reason
+                "moderation_reason": msg.moderation_reason,
+                "cursor": encode_message_cursor(msg.sent_at, msg.message_id)
             })
         return results
 
@@ -252,31 +790,30 @@ async def send_peer_message(
 ):
     """
     Send a peer message
-    - Encrypts text
-    - Runs crisis keyword detection
-    - Broadcasts over WebSockets
+    - Runs circle moderation (the only blocking check)
+    - Encrypts text and queues crisis assessment in the same commit
+    - Broadcasts over WebSockets; a CRISIS_ALERT follows if the assessment flags it
     """
     try:
         t_uuid = uuid.UUID(request.thread_id)
         
         # Verify user is in thread
-        stmt_thread = select(ChatThread).where(ChatThread.thread_id == t_uuid)
-        res_thread = await db.execute(stmt_thread)
-        thread = res_thread.scalars().first()
+        thread, is_member = await load_thread_for_member(db, t_uuid, current_user.anon_id)
         
         if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
             
-        if current_user.anon_id not in thread.participants_anon_ids:
+        if not is_member:
             raise HTTPException(status_code=403, detail="Not authorized to message this thread")
 
+        await manager.touch(current_user.anon_id)
+
         # Check if the thread is a SUPPORT_CIRCLE to run custom moderation
         moderation_status = "SAFE"
         moderation_reason = None
         
         if thread.thread_type == ChatThreadTypeEnum.SUPPORT_CIRCLE:
             from models.circle import Circle
-            from services.message_moderator import get_message_moderator
             
             stmt_circle = select(Circle).where(Circle.thread_id == thread.thread_id)
             res_circle = await db.execute(stmt_circle)
@@ -326,33 +863,17 @@ async def send_peer_message(
         # Update thread last message time
         thread.last_message_at = datetime.utcnow()
         
-        # Crisis detection
-        detector = get_crisis_detector()
-        crisis_result = await detector.assess_risk(
-            request.content,
-            source_type="chat"
+        # Crisis assessment runs after delivery; the job commits with the message
+        await enqueue_job(
+            db,
+            PEER_MESSAGE_CRISIS_JOB,
+            peer_message_crisis_payload(message, current_user.user_id),
+            idempotency_key=f"crisis:{message.message_id}"
         )
-        
-        crisis_detected = False
-        crisis_level = None
-        if crisis_result["requires_intervention"]:
-            crisis_detected = True
-            crisis_level = crisis_result["risk_level"]
-            crisis_event = CrisisEvent(
-                event_id=uuid.uuid4(),
-                user_id=current_user.user_id,
-                anon_id=current_user.anon_id,
-                source="chat",
-                source_id=message.message_id,
-                risk_level=crisis_result["risk_level"].lower(),
-                signal_text=encrypt_string(crisis_result["signal"]),
-                ai_reasoning=crisis_result.get("signal", ""),
-                triggered_at=datetime.utcnow()
-            )
-            db.add(crisis_event)
 
         await db.commit()
         await db.refresh(message)
+        notify_job_worker()
 
         # Prepare WebSocket broadcast payload
         ws_payload = {
@@ -366,17 +887,12 @@ async def send_peer_message(
                 "flagged": message.flagged,
                 "moderation_status": message.moderation_status,
                 "moderation_reason": message.moderation_reason,
-                "crisis_detected": crisis_detected,
-                "crisis_level": crisis_level
+                "cursor": encode_message_cursor(message.sent_at, message.message_id)
             }
         }
         
         # Broadcast to all connected participants in the thread
-        await manager.broadcast_to_thread(
-            str(thread.thread_id),
-            ws_payload,
-            thread.participants_anon_ids
-        )
+        await manager.broadcast_to_thread(str(thread.thread_id), ws_payload)
 
         return {
             "message_id": str(message.message_id),
@@ -386,7 +902,8 @@ async def send_peer_message(
             "sent_at": message.sent_at,
             "flagged": message.flagged,
             "moderation_status": message.moderation_status,
-            "moderation_reason": message.moderation_reason
+            "moderation_reason": message.moderation_reason,
+            "cursor": encode_message_cursor(message.sent_at, message.message_id)
         }
 
     except HTTPException as he:
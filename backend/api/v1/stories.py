@@ -10,15 +10,13 @@ from datetime import datetime
 from typing import List, Optional
 import uuid
 import random
-import re
 
 from db.session import get_db
-from api.deps import get_current_user
+from api.deps import get_current_user, get_current_user_profile
 from models.user import User
 from models.shared_story import SharedStory
-from models.checkin import CheckIn
-from models.journal_entry import JournalEntry
-from core.encryption import decrypt_string
+from services.story_index import fetch_candidates, normalize_mood, query_keys, unindex_story
+from services.affect_profile import get_affect_profiles
 
 from pydantic import BaseModel
 
@@ -53,110 +51,78 @@ RESONANCE_RESPONSES = [
 ]
 
 
+# ===== FEED SCORING =====
+
+# Stories pulled from the index per request, plus newest stories for wildcards
+CANDIDATE_LIMIT = 200
+RECENT_POOL_SIZE = 50
+
+DISTRESS_MOODS = ["sad", "anxious", "overwhelmed", "numb"]
+SOOTHING_MOODS = ["hopeful", "grateful", "calm"]
+
+
 # ===== ENDPOINTS =====
 
 @router.get("", response_model=List[StoryCardResponse])
 async def get_story_feed(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_profile)
 ):
     """
     Get personalized and anti-addictive anonymous story feed
     - Personalized blend of relevance and wildcard stories
+    - Scores a bounded candidate set drawn from the story index
     - Enforces 10-story limit
     """
     try:
-        # Fetch all active stories
-        stmt = select(SharedStory).where(SharedStory.active == True)
-        res = await db.execute(stmt)
-        all_stories = res.scalars().all()
+        # Recent moods, journal terms and check-in scores from the cached affect profile
+        profile = await get_affect_profiles().get_profile(current_user, db)
+        user_moods = [normalize_mood(m) for m in profile.moods]
+        user_journal_words = profile.terms
+        avg_checkin_score = profile.avg_checkin_score
+        
+        user_role = profile.student_role.lower() if profile.student_role else None
+
+        # Bounded candidate set from the story index instead of the full table
+        feed_moods = list(user_moods)
+        if avg_checkin_score >= 3:
+            feed_moods += DISTRESS_MOODS + SOOTHING_MOODS
+        keys = query_keys(feed_moods, user_role, user_journal_words)
+        candidates = await fetch_candidates(db, keys, CANDIDATE_LIMIT, RECENT_POOL_SIZE)
         
-        if not all_stories:
+        if not candidates:
             return []
             
-        # Fetch user's recent journal entries for mood and text matching
-        stmt_journals = (
-            select(JournalEntry)
-            .where(JournalEntry.user_id == current_user.user_id)
-            .order_by(desc(JournalEntry.created_at))
-            .limit(5)
-        )
-        res_journals = await db.execute(stmt_journals)
-        recent_journals = res_journals.scalars().all()
-        
-        # Extract user's recent moods
-        user_moods = [
-            j.mood_selected.value if hasattr(j.mood_selected, 'value') else str(j.mood_selected).lower()
-            for j in recent_journals
-        ]
-        
-        # Extract user's journal words
-        user_journal_words = set()
-        for j in recent_journals:
-            try:
-                dec_text = decrypt_string(j.entry_text)
-                if dec_text:
-                    words = re.findall(r'\b[a-zA-Z]{3,15}\b', dec_text.lower())
-                    user_journal_words.update(words)
-            except Exception:
-                pass
-                
-        # Fetch user's recent check-ins for distress scoring
-        stmt_checkins = (
-            select(CheckIn)
-            .where(CheckIn.user_id == current_user.id)
-            .order_by(desc(CheckIn.created_at))
-            .limit(5)
-        )
-        res_checkins = await db.execute(stmt_checkins)
-        recent_checkins = res_checkins.scalars().all()
-        avg_checkin_score = sum(c.score for c in recent_checkins) / len(recent_checkins) if recent_checkins else 0
-        
-        user_role = current_user.student_role.lower() if current_user.student_role else None
-        
-        # Score stories
+        # Score candidates from their precomputed feature keys
         scored_stories = []
-        for story in all_stories:
+        for story in candidates:
             score = 0.0
+            features = set(story.feature_keys or ())
             
             # A. student_role matching
             if user_role:
-                story_theme = story.theme.lower() if story.theme else ""
-                story_excerpt = story.excerpt.lower() if story.excerpt else ""
-                if user_role in story_theme or user_role in story_excerpt:
+                if f"role_exact:{user_role}" in features:
                     score += 5.0
-                    
-                role_mappings = {
-                    "burnout": ["exhaust", "tired", "burnout", "overwhelmed", "drain", "sleep", "pressure"],
-                    "exam season": ["exam", "study", "midterm", "test", "grade", "fail", "stress", "pressure", "anxious"],
-                    "placement prep": ["interview", "job", "career", "resume", "intern", "prep", "future", "placement"],
-                    "relationship stress": ["breakup", "fight", "friend", "relationship", "love", "lonely", "heartbroken", "argument"],
-                    "identity & belonging": ["identity", "belong", "fit in", "imposter", "lonely", "who am i", "diverse", "accept"],
-                    "first-year": ["transition", "dorm", "new", "freshman", "campus", "home", "adjust", "lost"]
-                }
-                if user_role in role_mappings:
-                    if any(word in story_theme or word in story_excerpt for word in role_mappings[user_role]):
-                        score += 3.0
+                if f"role:{user_role}" in features:
+                    score += 3.0
                         
             # B. Mood matching
-            story_mood = story.mood.lower() if story.mood else ""
+            story_mood = normalize_mood(story.mood)
             for mood in user_moods:
                 if mood == story_mood:
                     score += 2.0
                     
             # C. Checkin distress score matching
             if avg_checkin_score >= 3:
-                if story_mood in ["sad", "anxious", "overwhelmed", "numb"]:
+                if story_mood in DISTRESS_MOODS:
                     score += 3.0
-                elif story_mood in ["hopeful", "grateful", "calm"]:
+                elif story_mood in SOOTHING_MOODS:
                     score += 1.0
                     
             # D. Journal word overlap
             if user_journal_words:
-                story_text = f"{(story.theme or '')} {(story.resonance_hook or '')} {story.excerpt}".lower()
-                story_words = set(re.findall(r'\b[a-zA-Z]{3,15}\b', story_text))
-                overlap = user_journal_words.intersection(story_words)
-                score += min(len(overlap) * 0.5, 4.0)
+                overlap = sum(1 for w in user_journal_words if f"term:{w}" in features)
+                score += min(overlap * 0.5, 4.0)
                 
             # Random jitter to keep feed dynamic
             score += random.uniform(0, 0.5)
@@ -184,11 +150,11 @@ async def get_story_feed(
         blended = selected_relevance + selected_wildcard
         
         # If we need more to reach 10 (or up to total available)
-        remaining_needed = min(10, len(all_stories)) - len(blended)
+        remaining_needed = min(10, len(candidates)) - len(blended)
         if remaining_needed > 0:
             already_selected_ids = {s.story_id for s in blended}
-            candidates = [s for s in all_stories if s.story_id not in already_selected_ids]
-            blended += random.sample(candidates, min(len(candidates), remaining_needed))
+            leftovers = [s for s in candidates if s.story_id not in already_selected_ids]
+            blended += random.sample(leftovers, min(len(leftovers), remaining_needed))
             
         # Shuffle final blended list to keep order anti-addictive and mixed
         random.shuffle(blended)
@@ -311,6 +277,7 @@ async def delete_story(
             raise HTTPException(status_code=403, detail="Not authorized to delete this story")
         
         story.active = False
+        await unindex_story(db, story)
         await db.commit()
         
         return {"success": True, "message": "Story removed from feed"}
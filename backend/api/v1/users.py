@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, and_, case, func, or_, true, tuple_
 from db.session import get_db
 from schemas.user import UserResponse
 from models.user import User
 from models.checkin import CheckIn
 from models.journal_entry import JournalEntry
-from models.exercise import ExerciseCompletion
-from api.deps import get_current_user
+from models.daily_mood_rollup import DailyMoodRollup
+from api.deps import get_current_user, get_current_user_profile
 from datetime import datetime, timezone
+from typing import Optional, Tuple
+import base64
 import math
 
 router = APIRouter()
@@ -41,7 +43,7 @@ def get_relative_time(dt: datetime) -> str:
 
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user_profile)):
     return current_user
 
 
@@ -53,7 +55,7 @@ class UpdateStudentRoleRequest(BaseModel):
 async def update_student_role(
     request: UpdateStudentRoleRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_profile)
 ):
     if current_user.role != "student":
         raise HTTPException(status_code=403, detail="Only students can set a focus role")
@@ -80,84 +82,196 @@ async def get_pending_counsellors(
     return res.scalars().all()
 
 
+# ===== COUNSELLOR DASHBOARD =====
+
+DEFAULT_STUDENT_PAGE_SIZE = 100
+MAX_STUDENT_PAGE_SIZE = 500
+RISK_LEVELS = ("Low", "Medium", "High")
+# Sort position of students with no recorded activity (after everyone else)
+NEVER_ACTIVE = datetime(1970, 1, 1)
+
+
+def encode_student_cursor(last_active_at: Optional[datetime], student_id: int) -> str:
+    """Opaque keyset cursor for a dashboard position: (last activity, users.id)"""
+    raw = f"{(last_active_at or NEVER_ACTIVE).isoformat()}|{student_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_student_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        last_active_at, student_id = raw.split("|", 1)
+        return datetime.fromisoformat(last_active_at), int(student_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _utc_naive(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def my_students_query(risk: Optional[str] = None, after: Optional[str] = None, limit: Optional[int] = None):
+    """
+    Every student with their latest check-in, latest journal entry and last activity,
+    in one statement: LATERAL top-1 lookups per student on (user, time) indexes,
+    last activity from daily_mood_rollup, most recently active first
+    """
+    latest_checkin = (
+        select(CheckIn.score, CheckIn.created_at)
+        .where(CheckIn.user_id == User.id)
+        .order_by(desc(CheckIn.created_at))
+        .limit(1)
+        .lateral("latest_checkin")
+    )
+    latest_journal = (
+        select(JournalEntry.mood_selected, JournalEntry.created_at)
+        .where(JournalEntry.user_id == User.user_id)
+        .order_by(desc(JournalEntry.created_at))
+        .limit(1)
+        .lateral("latest_journal")
+    )
+    latest_day = (
+        select(DailyMoodRollup.last_activity_at)
+        .where(DailyMoodRollup.user_id == User.user_id)
+        .order_by(desc(DailyMoodRollup.day))
+        .limit(1)
+        .lateral("latest_day")
+    )
+
+    risk_level = case(
+        (latest_checkin.c.score >= 3, "High"),
+        (latest_checkin.c.score >= 1, "Medium"),
+        else_="Low"
+    )
+    sort_key = func.coalesce(latest_day.c.last_activity_at, NEVER_ACTIVE)
+
+    stmt = (
+        select(
+            User.id,
+            User.username,
+            User.email,
+            latest_checkin.c.score.label("checkin_score"),
+            latest_checkin.c.created_at.label("checkin_at"),
+            latest_journal.c.mood_selected.label("journal_mood"),
+            latest_journal.c.created_at.label("journal_at"),
+            latest_day.c.last_activity_at.label("last_active_at"),
+            risk_level.label("risk")
+        )
+        .select_from(User)
+        .outerjoin(latest_checkin, true())
+        .outerjoin(latest_journal, true())
+        .outerjoin(latest_day, true())
+        .where(User.role == "student")
+    )
+    if risk:
+        stmt = stmt.where(risk_level == risk)
+    if after:
+        stmt = stmt.where(tuple_(sort_key, User.id) < tuple_(*decode_student_cursor(after)))
+    stmt = stmt.order_by(sort_key.desc(), User.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def my_students_summary_query():
+    """
+    Caseload totals the dashboard cards show, aggregated in SQL over the same
+    per-student rows as my_students_query: total, recently active, per risk level
+    and per mood emoji (students whose newest signal is a journal mood have none)
+    """
+    rows = my_students_query().order_by(None).subquery()
+    journal_is_newer = and_(
+        rows.c.journal_at.isnot(None),
+        or_(rows.c.checkin_at.is_(None), rows.c.journal_at > func.timezone("UTC", rows.c.checkin_at))
+    )
+    mood = case(
+        (journal_is_newer, None),
+        (rows.c.checkin_score >= 4, "sad"),
+        (rows.c.checkin_score < 2, "positive"),
+        else_="neutral"
+    )
+    return select(
+        func.count().label("total"),
+        func.count(rows.c.last_active_at).label("active"),
+        *[func.count().filter(rows.c.risk == level).label(level) for level in RISK_LEVELS],
+        *[func.count().filter(mood == label).label(label) for label in ("sad", "neutral", "positive")]
+    )
+
+
+def student_mood_label(row) -> str:
+    """The newer of the latest journal mood and an emoji for the latest PHQ-2 score"""
+    mood_label = "😐"
+    if row.checkin_score is not None:
+        if row.checkin_score >= 4:
+            mood_label = "😔"
+        elif row.checkin_score >= 2:
+            mood_label = "😐"
+        else:
+            mood_label = "🙂"
+    if row.journal_mood is not None:
+        checkin_at = _utc_naive(row.checkin_at)
+        if checkin_at is None or row.journal_at > checkin_at:
+            mood_label = row.journal_mood.value
+    return mood_label
+
+
 @router.get("/my-students")
 async def get_my_students(
+    risk: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_STUDENT_PAGE_SIZE, ge=1, le=MAX_STUDENT_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Counsellor caseload, most recently active first, in a single query
+    - risk: only Low, Medium or High risk students (from the latest PHQ-2 check-in)
+    - limit/after: one page at a time; pass the last returned student's cursor as
+      `after` for the next page (fewer than `limit` rows means the end)
+    - Totals for the whole caseload come from /my-students/summary
+    """
     if current_user.role not in ["counsellor", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    result = await db.execute(select(User).where(User.role == "student"))
-    students = result.scalars().all()
-    
-    student_list = []
-    for s in students:
-        # Get latest check-in
-        ci_res = await db.execute(
-            select(CheckIn)
-            .where(CheckIn.user_id == s.id)
-            .order_by(desc(CheckIn.created_at))
-            .limit(1)
-        )
-        latest_ci = ci_res.scalars().first()
-        risk = "Low"
-        mood_label = "😐"
-        if latest_ci:
-            if latest_ci.score >= 3:
-                risk = "High"
-            elif latest_ci.score >= 1:
-                risk = "Medium"
-            
-            if latest_ci.score >= 4:
-                mood_label = "😔"
-            elif latest_ci.score >= 2:
-                mood_label = "😐"
-            else:
-                mood_label = "🙂"
-
-        # Get latest journal entry
-        j_res = await db.execute(
-            select(JournalEntry)
-            .where(JournalEntry.user_id == s.user_id)
-            .order_by(desc(JournalEntry.created_at))
-            .limit(1)
-        )
-        latest_j = j_res.scalars().first()
-        if latest_j:
-            if not latest_ci or latest_j.created_at > latest_ci.created_at:
-                mood_label = latest_j.mood_selected.value
-
-        # Get latest exercise completion
-        ex_res = await db.execute(
-            select(ExerciseCompletion)
-            .where(ExerciseCompletion.user_id == s.id)
-            .order_by(desc(ExerciseCompletion.completed_at))
-            .limit(1)
-        )
-        latest_ex = ex_res.scalars().first()
-        
-        times = []
-        if latest_ci:
-            times.append(latest_ci.created_at)
-        if latest_j:
-            times.append(latest_j.created_at)
-        if latest_ex:
-            times.append(latest_ex.completed_at)
-            
-        last_active_dt = max(times) if times else None
-        last_active_str = get_relative_time(last_active_dt)
-        
-        student_list.append({
-            "id": s.id,
-            "username": s.username,
-            "email": s.email,
-            "risk": risk,
-            "lastActive": last_active_str,
-            "moodLabel": mood_label
-        })
-        
-    return student_list
+    if risk:
+        risk = risk.capitalize()
+        if risk not in RISK_LEVELS:
+            raise HTTPException(status_code=400, detail="risk must be one of Low, Medium, High")
+
+    res = await db.execute(my_students_query(risk=risk, after=after, limit=limit))
+    return [
+        {
+            "id": row.id,
+            "username": row.username,
+            "email": row.email,
+            "risk": row.risk,
+            "lastActive": get_relative_time(row.last_active_at),
+            "moodLabel": student_mood_label(row),
+            "cursor": encode_student_cursor(row.last_active_at, row.id)
+        }
+        for row in res.all()
+    ]
+
+
+@router.get("/my-students/summary")
+async def get_my_students_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Caseload totals (students, recently active, per risk level and mood) without listing anyone"""
+    if current_user.role not in ["counsellor", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    res = await db.execute(my_students_summary_query())
+    row = res.one()
+    return {
+        "total": row.total,
+        "active": row.active,
+        "risk": {level: row._mapping[level] for level in RISK_LEVELS},
+        "moods": {label: row._mapping[label] for label in ("sad", "neutral", "positive")},
+    }
 
 
 @router.put("/{user_id}/approve", response_model=UserResponse)
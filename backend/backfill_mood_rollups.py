@@ -0,0 +1,60 @@
+"""
+Repair daily_mood_rollup from journal entries, check-ins and exercise completions
+(the migration that creates the table seeds it; use this after a bulk import or drift)
+Recomputes one window of days per transaction, oldest first, so it can be stopped
+and re-run safely; the API keeps today's rows current while it runs.
+
+Usage: python backfill_mood_rollups.py [days_back]   (default: all history)
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+from db.session import SessionLocal
+from models.journal_entry import JournalEntry
+from models.checkin import CheckIn
+from models.exercise import ExerciseCompletion
+from services.mood_rollup import days_ago, rebuild_mood_rollups
+
+WINDOW_DAYS = 30
+
+
+async def earliest_activity_day():
+    async with SessionLocal() as db:
+        firsts = []
+        for column in (JournalEntry.created_at, CheckIn.created_at, ExerciseCompletion.completed_at):
+            res = await db.execute(select(func.min(column)))
+            first = res.scalar()
+            if first is not None:
+                firsts.append(first.date())
+        return min(firsts, default=None)
+
+
+async def backfill(days_back=None):
+    start = days_ago(days_back) if days_back is not None else await earliest_activity_day()
+    end = datetime.utcnow().date() + timedelta(days=1)
+    if start is None:
+        print("No activity to roll up.")
+        return
+
+    print(f"=== BACKFILLING DAILY MOOD ROLLUP ({start} to {end - timedelta(days=1)}) ===")
+    total = 0
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + timedelta(days=WINDOW_DAYS), end)
+        async with SessionLocal() as db:
+            written = await rebuild_mood_rollups(db, window_start, window_end)
+            await db.commit()
+        total += written
+        print(f"{window_start} .. {window_end - timedelta(days=1)}: {written} rows")
+        window_start = window_end
+    print(f"[SUCCESS] Wrote {total} daily rollup rows.")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,153 @@
+"""
+Query-count benchmark for the counsellor dashboard (GET /api/v1/users/my-students)
+Seeds growing cohorts of students, each with a check-in, a journal entry and a
+daily rollup row, and counts the SQL statements one dashboard request issues.
+The old per-student loop issued 1 + 3 * students; the count must now stay flat.
+Needs the DATABASE_URL database (seeded rows are removed afterwards).
+
+Usage: python bench_my_students.py [cohort sizes...]   (default: 10 100 1000)
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import delete, event, select
+
+from main import app
+from api.deps import get_current_user
+from api.v1.users import DEFAULT_STUDENT_PAGE_SIZE
+from db.session import SessionLocal, engine
+from models.user import User
+from models.checkin import CheckIn
+from models.journal_entry import JournalEntry
+from models.daily_mood_rollup import DailyMoodRollup
+
+BENCH_ID_BASE = 900000
+BENCH_PREFIX = "bench_student_"
+
+counsellor = User(
+    id=BENCH_ID_BASE - 1,
+    user_id=uuid.uuid4(),
+    username="bench_counsellor",
+    email="bench_counsellor@sonder.edu",
+    password="hashedpassword",
+    role="counsellor",
+    anon_id="anon_bench_counsellor"
+)
+
+
+async def override_get_current_user():
+    return counsellor
+
+app.dependency_overrides[get_current_user] = override_get_current_user
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def seed_students(start: int, count: int):
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        for i in range(start, start + count):
+            user_id = uuid.uuid4()
+            at = now - timedelta(minutes=i)
+            db.add(User(
+                id=BENCH_ID_BASE + i,
+                user_id=user_id,
+                username=f"{BENCH_PREFIX}{i}",
+                email=f"{BENCH_PREFIX}{i}@sonder.edu",
+                password="hashedpassword",
+                role="student",
+                anon_id=f"anon_{BENCH_PREFIX}{i}"
+            ))
+            await db.flush()
+            db.add(CheckIn(user_id=BENCH_ID_BASE + i, score=i % 6, q1_score=i % 3, q2_score=i % 6 - i % 3, created_at=at))
+            db.add(JournalEntry(
+                entry_id=uuid.uuid4(),
+                user_id=user_id,
+                anon_id=f"anon_{BENCH_PREFIX}{i}",
+                mood_selected="calm",
+                prompt_category="general",
+                entry_text="dummyencryptedtext",
+                created_at=at
+            ))
+            db.add(DailyMoodRollup(
+                user_id=user_id, day=at.date(), journal_entries=1, mood_calm=1,
+                checkins=1, phq2_sum=i % 6, phq2_max=i % 6, last_activity_at=at
+            ))
+        await db.commit()
+
+
+async def cleanup():
+    async with SessionLocal() as db:
+        bench_users = User.username.like(f"{BENCH_PREFIX}%")
+        await db.execute(delete(CheckIn).where(CheckIn.user_id >= BENCH_ID_BASE))
+        await db.execute(delete(JournalEntry).where(JournalEntry.anon_id.like(f"anon_{BENCH_PREFIX}%")))
+        await db.execute(delete(DailyMoodRollup).where(
+            DailyMoodRollup.user_id.in_(select(User.user_id).where(bench_users))
+        ))
+        await db.execute(delete(User).where(bench_users))
+        await db.commit()
+
+
+async def run_benchmark(sizes):
+    print(f"=== COUNSELLOR DASHBOARD QUERY-COUNT BENCHMARK ({', '.join(map(str, sizes))} students) ===")
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    counts = []
+    seeded = 0
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for size in sizes:
+                await seed_students(seeded, size - seeded)
+                seeded = size
+
+                counter.count = 0
+                started = time.perf_counter()
+                res = await client.get("/api/v1/users/my-students")
+                elapsed = time.perf_counter() - started
+                assert res.status_code == 200, res.text
+                first_page = res.json()
+
+                dashboard_queries = counter.count
+                counts.append(dashboard_queries)
+                print(f"{size:>6} students: {dashboard_queries} queries (was {1 + 3 * size}), {elapsed * 1000:.1f} ms")
+
+                res = await client.get("/api/v1/users/my-students", params={"risk": "High", "limit": 20})
+                assert res.status_code == 200
+                assert all(s["risk"] == "High" for s in res.json())
+
+                # Cursor pages cover every student exactly once; the default page is the first of them
+                paged, params = [], {"limit": 50}
+                while True:
+                    page = (await client.get("/api/v1/users/my-students", params=params)).json()
+                    paged.extend(s["username"] for s in page)
+                    if len(page) < params["limit"]:
+                        break
+                    params["after"] = page[-1]["cursor"]
+                assert len(paged) == len(set(paged))
+                assert len([u for u in paged if u.startswith(BENCH_PREFIX)]) == size
+                assert [s["username"] for s in first_page] == paged[:DEFAULT_STUDENT_PAGE_SIZE]
+
+                # Summary counts the whole caseload without listing it
+                summary = (await client.get("/api/v1/users/my-students/summary")).json()
+                assert summary["total"] == len(paged) == sum(summary["risk"].values()), summary
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await cleanup()
+
+    assert len(set(counts)) == 1, counts
+    print("[SUCCESS] Query count is independent of the number of students.")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]))
@@ -22,11 +22,71 @@ class Settings:
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+    # =========================
+    # LLM (GROQ)
+    # =========================
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    LLM_DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "llama-3.3-70b-versatile")
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "256"))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
     # =========================
     # REDIS
     # =========================
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+    # WebSocket fan-out backplane and presence store: "memory" (single process) or "redis" (multi-worker).
+    # Use "redis" whenever worker.py runs, or its CRISIS_ALERT events are dropped
+    WS_BACKPLANE = os.getenv("WS_BACKPLANE", "memory")
+
+    # =========================
+    # AUTH PRINCIPAL CACHE
+    # =========================
+    PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    # Share cached principals across workers through REDIS_URL
+    PRINCIPAL_CACHE_REDIS = os.getenv("PRINCIPAL_CACHE_REDIS", "false").lower() == "true"
+    # Local copy lifetime when the Redis tier is on (bounds cross-worker staleness)
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL_SECONDS", "5"))
+
+    # =========================
+    # MODERATION VERDICT CACHE
+    # =========================
+    MODERATION_CACHE_TTL_SECONDS = float(os.getenv("MODERATION_CACHE_TTL_SECONDS", "3600"))
+    MODERATION_CACHE_MAX_ENTRIES = int(os.getenv("MODERATION_CACHE_MAX_ENTRIES", "20000"))
+    # Max SimHash bit difference for a near-duplicate to reuse a verdict (0 disables)
+    MODERATION_NEAR_DUPLICATE_BITS = int(os.getenv("MODERATION_NEAR_DUPLICATE_BITS", "6"))
+
+    # =========================
+    # BACKGROUND JOBS
+    # =========================
+    # Run the job worker and cron inside the API process; set false and run worker.py in production
+    JOB_WORKER_IN_API = os.getenv("JOB_WORKER_IN_API", "true").lower() == "true"
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    # Jobs one worker process runs at once, across all types
+    JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "20"))
+    # A running job whose worker has not renewed its lease in this long is picked up again
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    # How often a worker renews the lease of each job it is running
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+    # A handler still running after this long is cancelled and counts as a failed attempt
+    JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "900"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    # Retry n waits JOB_RETRY_BASE_SECONDS * 2^(n-1), capped, with jitter
+    JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "15"))
+    JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+    # Done and failed jobs older than this are deleted by the nightly purge
+    JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "14"))
+
+    # =========================
+    # WEEKLY INSIGHTS
+    # =========================
+    # Students per batch job; each chunk commits its cards and checkpoint together
+    INSIGHTS_CHUNK_SIZE = int(os.getenv("INSIGHTS_CHUNK_SIZE", "500"))
+    # Insight LLM calls in flight at once during the weekly run
+    INSIGHTS_LLM_CONCURRENCY = int(os.getenv("INSIGHTS_LLM_CONCURRENCY", "48"))
+
     # =========================
     # EMAILJS (EMAIL SERVICE)
     # =========================
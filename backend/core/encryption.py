@@ -1,34 +1,56 @@
 """
 Encryption utilities for sensitive fields (email, real_name, journal entries, crisis signals)
 Uses Fernet (symmetric encryption) for transparent field-level encryption.
+
+The cipher is built once per process. Key rotation is handled with MultiFernet:
+ENCRYPTION_KEY is the active key used for new ciphertexts, and ENCRYPTION_KEYS_PREVIOUS
+(comma-separated) lists retired keys that are still accepted for decryption.
 """
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional
 from config.settings import settings
 import base64
 import os
 
 
-# Initialize cipher with the encryption key from environment
-def get_cipher():
-    """Get Fernet cipher instance"""
+# Batches at or above this size are split across the thread pool
+PARALLEL_BATCH_THRESHOLD = 512
+POOL_WORKERS = min(8, os.cpu_count() or 1)
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _load_keys() -> List[bytes]:
     key = os.getenv("ENCRYPTION_KEY")
-    
+
     if not key:
-        # Generate a new key if one doesn't exist (development only)
+        # Generate a key once per process (development only)
         key = Fernet.generate_key().decode()
         print(f"⚠️  No ENCRYPTION_KEY found. Generated: {key}")
         print("Add this to your .env file for production use.")
-    
-    if isinstance(key, str):
-        key = key.encode()
-    
+
+    previous = os.getenv("ENCRYPTION_KEYS_PREVIOUS", "")
+    keys = [key] + [k.strip() for k in previous.split(",") if k.strip()]
+    return [k.encode() if isinstance(k, str) else k for k in keys]
+
+
+# Initialize cipher with the encryption key(s) from environment
+@lru_cache(maxsize=1)
+def get_cipher() -> MultiFernet:
+    """Get the process-wide cipher instance (built on first use)"""
     try:
-        return Fernet(key)
+        return MultiFernet([Fernet(k) for k in _load_keys()])
     except Exception as e:
         raise ValueError(f"Invalid ENCRYPTION_KEY format: {e}")
 
 
+def reset_cipher():
+    """Drop the cached cipher so the next call re-reads the keys (after rotation)"""
+    get_cipher.cache_clear()
+
+
 def encrypt_string(plaintext: str) -> str:
     """
     Encrypt a string value
@@ -68,6 +90,83 @@ def decrypt_string(ciphertext: str) -> str:
         raise ValueError(f"Decryption failed: {e}")
 
 
+def rotate_string(ciphertext: str) -> Optional[str]:
+    """Re-encrypt a ciphertext under the active key (no-op for empty values)"""
+    if not ciphertext:
+        return None
+    return get_cipher().rotate(ciphertext.encode()).decode()
+
+
+def _decrypt_or_none(ciphertext: str) -> Optional[str]:
+    try:
+        return decrypt_string(ciphertext)
+    except ValueError as e:
+        print(f"[ENCRYPTION] Skipping undecryptable value in lenient batch: {e}")
+        return None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=POOL_WORKERS,
+            thread_name_prefix="fernet"
+        )
+    return _executor
+
+
+def _map_batch(func, values: List[Optional[str]], parallel: Optional[bool]) -> List[Optional[str]]:
+    if parallel is None:
+        parallel = len(values) >= PARALLEL_BATCH_THRESHOLD
+    if not parallel:
+        return [func(v) for v in values]
+
+    executor = _get_executor()
+    chunk_size = max(1, -(-len(values) // POOL_WORKERS))
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    results = []
+    for chunk_result in executor.map(lambda chunk: [func(v) for v in chunk], chunks):
+        results.extend(chunk_result)
+    return results
+
+
+def encrypt_many(plaintexts: Iterable[str], parallel: Optional[bool] = None) -> List[Optional[str]]:
+    """
+    Encrypt a batch of strings, preserving order
+
+    Args:
+        plaintexts: Strings to encrypt (empty values map to None)
+        parallel: Force (True) or disable (False) the thread pool; by default
+            batches of PARALLEL_BATCH_THRESHOLD or more are spread across it
+
+    Returns:
+        List of encrypted strings
+    """
+    return _map_batch(encrypt_string, list(plaintexts), parallel)
+
+
+def decrypt_many(
+    ciphertexts: Iterable[str],
+    parallel: Optional[bool] = None,
+    strict: bool = True
+) -> List[Optional[str]]:
+    """
+    Decrypt a batch of strings, preserving order
+
+    Args:
+        ciphertexts: Encrypted strings (empty values map to None)
+        parallel: Force (True) or disable (False) the thread pool; by default
+            batches of PARALLEL_BATCH_THRESHOLD or more are spread across it
+        strict: Raise ValueError on the first undecryptable value (the default);
+            pass False to log it and return None in its place instead
+
+    Returns:
+        List of decrypted plaintexts
+    """
+    func = decrypt_string if strict else _decrypt_or_none
+    return _map_batch(func, list(ciphertexts), parallel)
+
+
 class EncryptedString:
     """
     SQLAlchemy custom type for transparent field encryption.
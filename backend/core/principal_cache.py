@@ -0,0 +1,247 @@
+"""
+Principal cache for authenticated requests
+Maps a token's users.id claim to the user's authorization fields so
+get_current_user does not hit the users table on every call. A per-process
+TTL/LRU tier is always on; an optional Redis tier (PRINCIPAL_CACHE_REDIS=true)
+shares entries across workers.
+
+Entries hold only PRINCIPAL_COLUMNS (no email, name, phone or password hash), never
+ORM instances: each request re-attaches a fresh User to its own session with
+merge(load=False). Other columns are not loaded on a cached principal; endpoints
+that read them depend on get_current_user_profile (api/deps.py) instead.
+
+Any ORM update or delete of a User row drops its entry once the session commits
+(the listeners at the bottom of this module). Call invalidate_principal() only
+after changing users with a bulk UPDATE/DELETE statement.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from models.user import User
+from config.settings import settings
+import asyncio
+import json
+import time
+import uuid
+
+
+# The only columns cached: what authorization checks read on every request
+PRINCIPAL_COLUMNS = ("id", "user_id", "role", "is_approved", "anon_id")
+
+# Session.info key for users.id values changed in the current transaction
+PENDING_INVALIDATIONS_KEY = "principal_invalidations"
+
+
+def _cached_columns():
+    return [User.__table__.columns[key] for key in PRINCIPAL_COLUMNS]
+
+
+def serialize_user(user: User) -> Dict:
+    """JSON-safe snapshot of a user's authorization fields"""
+    data = {}
+    for column in _cached_columns():
+        value = getattr(user, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        data[column.key] = value
+    return data
+
+
+def build_detached_user(data: Dict) -> User:
+    """Rebuild a detached User from a snapshot, ready for session.merge(load=False)"""
+    values = {}
+    for column in _cached_columns():
+        if column.key not in data:
+            continue
+        value = data[column.key]
+        if value is not None:
+            python_type = column.type.python_type
+            if python_type is datetime and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            elif python_type is uuid.UUID and isinstance(value, str):
+                value = uuid.UUID(value)
+        values[column.key] = value
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class PrincipalCache:
+    """In-process TTL/LRU tier with an optional shared Redis tier"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+        use_redis: bool = settings.PRINCIPAL_CACHE_REDIS,
+        redis_url: str = settings.REDIS_URL,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self.redis_url = redis_url
+        # With a shared tier, other workers' invalidations reach this process
+        # only through Redis, so the local copy is kept briefly
+        self.local_ttl_seconds = (
+            min(ttl_seconds, settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS) if use_redis else ttl_seconds
+        )
+        self._local: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+        self._redis = None
+        # Redis deletes started from commit hooks, kept referenced until they finish
+        self._pending_tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def redis_key(principal_id: int) -> str:
+        return f"principal:{principal_id}"
+
+    def _get_redis(self):
+        if self._redis is None:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_connect_timeout=1,
+                socket_timeout=1,
+            )
+        return self._redis
+
+    def _get_local(self, principal_id: int) -> Optional[Dict]:
+        entry = self._local.get(principal_id)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            del self._local[principal_id]
+            return None
+        self._local.move_to_end(principal_id)
+        return data
+
+    def _set_local(self, principal_id: int, data: Dict):
+        self._local[principal_id] = (time.monotonic() + self.local_ttl_seconds, data)
+        self._local.move_to_end(principal_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, principal_id: int) -> Optional[Dict]:
+        data = self._get_local(principal_id)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        if self.use_redis:
+            try:
+                raw = await self._get_redis().get(self.redis_key(principal_id))
+            except Exception as e:
+                print(f"[AUTH] Principal cache Redis read failed: {e}")
+                raw = None
+            if raw:
+                data = json.loads(raw)
+                self._set_local(principal_id, data)
+                self.redis_hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, principal_id: int, user: User):
+        data = serialize_user(user)
+        self._set_local(principal_id, data)
+        if self.use_redis:
+            try:
+                await self._get_redis().setex(
+                    self.redis_key(principal_id),
+                    int(self.ttl_seconds),
+                    json.dumps(data)
+                )
+            except Exception as e:
+                print(f"[AUTH] Principal cache Redis write failed: {e}")
+
+    async def invalidate(self, principal_id: int):
+        self._local.pop(principal_id, None)
+        if self.use_redis:
+            try:
+                await self._get_redis().delete(self.redis_key(principal_id))
+            except Exception as e:
+                print(f"[AUTH] Principal cache Redis invalidate failed: {e}")
+
+    def invalidate_soon(self, principal_ids: Iterable[int]):
+        """Drop entries now locally and in Redis in the background (for sync commit hooks)"""
+        principal_ids = list(principal_ids)
+        for principal_id in principal_ids:
+            self._local.pop(principal_id, None)
+        if not self.use_redis:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._invalidate_redis(principal_ids))
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+
+    async def _invalidate_redis(self, principal_ids: Iterable[int]):
+        try:
+            await self._get_redis().delete(*(self.redis_key(principal_id) for principal_id in principal_ids))
+        except Exception as e:
+            print(f"[AUTH] Principal cache Redis invalidate failed: {e}")
+
+    def clear(self):
+        self._local.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._local),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_principal_cache = None
+
+def get_principal_cache() -> PrincipalCache:
+    """Get or create singleton principal cache"""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
+
+
+async def invalidate_principal(principal_id: int):
+    """Drop a user's cached principal (only needed after bulk UPDATE/DELETE statements)"""
+    await get_principal_cache().invalidate(principal_id)
+
+
+# ===== INVALIDATION HOOK =====
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _record_user_change(mapper, connection, target: User):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault(PENDING_INVALIDATIONS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    principal_ids = session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    if principal_ids:
+        get_principal_cache().invalidate_soon(principal_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_users(session: Session, previous_transaction):
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
@@ -46,4 +46,26 @@ def create_access_token(
         to_encode,
         settings.SECRET_KEY,
         algorithm=settings.ALGORITHM,
+    )
+
+
+def build_token_claims(user) -> dict:
+    """
+    Identity claims signed into access tokens so WebSocket handshakes can
+    authorize from the token alone, without loading the user row
+    """
+    return {
+        "sub": user.email,
+        "role": user.role,
+        "user_id": user.id,
+        "anon_id": user.anon_id,
+    }
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify signature and expiry and return the claims (raises JWTError)"""
+    return jose.jwt.decode(
+        token,
+        settings.SECRET_KEY,
+        algorithms=[settings.ALGORITHM],
     )
\ No newline at end of file
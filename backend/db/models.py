@@ -7,13 +7,16 @@ from models.notification import Notification
 from models.rating import CounsellorRating
 # from models.journal import JournalEntry
 from models.exercise import ExerciseCompletion
+from models.exercise_streak import ExerciseStreak
 from models.checkin import CheckIn
 from models.reminder import Reminder
 from models.session_note import SessionNote
 from models.journal_entry import JournalEntry, MoodEnum, PromptCategoryEnum
-from models.peer_message import PeerMessage, ChatThread, ChatThreadTypeEnum
+from models.peer_message import PeerMessage, ChatThread, ChatThreadTypeEnum, ThreadMember
 from models.counselling_session import CounsellingSession, SessionStatusEnum
-from models.weekly_insight import WeeklyInsight
-from models.shared_story import SharedStory
+from models.weekly_insight import WeeklyInsight, WeeklyInsightRun
+from models.shared_story import SharedStory, StoryIndexTerm
 from models.crisis_event import CrisisEvent, CrisisSourceEnum, RiskLevelEnum
 from models.circle import Circle
+from models.background_job import BackgroundJob
+from models.daily_mood_rollup import DailyMoodRollup
@@ -121,10 +121,26 @@ from api.v1.circles import router as circles_router
 app.include_router(circles_router, prefix="/api/v1", tags=["circles"])
 
 from services.scheduler import start_scheduler
+from services.job_queue import get_job_worker
 
 @app.on_event("startup")
 async def startup_event():
-    start_scheduler()
+    # With JOB_WORKER_IN_API=false the API only enqueues and worker.py runs jobs and cron
+    if settings.JOB_WORKER_IN_API:
+        start_scheduler()
+        get_job_worker().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from services.backplane import get_backplane
+    from services.presence import get_presence_store
+    from services.llm_gateway import get_llm_gateway
+    if settings.JOB_WORKER_IN_API:
+        await get_job_worker().stop()
+    await get_backplane().close()
+    await get_presence_store().close()
+    await get_llm_gateway().close()
 
 
 @app.get("/")
@@ -0,0 +1,39 @@
+"""
+Background Job Model - Durable queue for work that runs after the request returns
+"""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer, Text, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from db.session import Base
+
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    # Enqueueing the same key twice is a no-op (e.g. "mood_check:<session_id>")
+    idempotency_key = Column(String(255), nullable=True)
+
+    # pending -> running -> done, or back to pending for a retry, or failed
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=5, server_default="5")
+    last_error = Column(Text, nullable=True)
+
+    # Earliest time the job may run, and when a worker claimed it (a stale lock means the worker died)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    locked_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_background_jobs_status_run_at", "status", "run_at"),
+        Index("ix_background_jobs_job_type_status", "job_type", "status"),
+        UniqueConstraint("idempotency_key", name="uq_background_jobs_idempotency_key"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Index
 from datetime import datetime
 from db.session import Base
 
@@ -13,3 +13,8 @@ class CheckIn(Base):
     alert_triggered = Column(Integer, default=0) # 0=False, 1=True
     is_resolved = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        # Latest check-in per student (counsellor dashboard)
+        Index("ix_check_ins_user_id_created_at", "user_id", "created_at"),
+    )
@@ -0,0 +1,52 @@
+"""
+Daily Mood Rollup Model - One row per student per UTC day of journal, check-in and exercise activity
+Kept current by the write paths (services/mood_rollup.py) and rebuildable from history
+"""
+
+from sqlalchemy import Column, Date, DateTime, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from db.session import Base
+
+
+class DailyMoodRollup(Base):
+    __tablename__ = "daily_mood_rollup"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    # Journal entries that day, in total and per MoodEnum value
+    journal_entries = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_calm = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_anxious = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_sad = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_frustrated = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_hopeful = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_numb = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_grateful = Column(Integer, nullable=False, default=0, server_default="0")
+    mood_overwhelmed = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # PHQ-2 check-ins: sum and count keep the average incremental
+    checkins = Column(Integer, nullable=False, default=0, server_default="0")
+    phq2_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    phq2_max = Column(Integer, nullable=True)
+
+    exercises = Column(Integer, nullable=False, default=0, server_default="0")
+    exercise_seconds = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Latest journal entry, check-in or exercise completion
+    last_activity_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Cohort-wide "who was active on day X" scans (the PK covers per-student lookups)
+        Index("ix_daily_mood_rollup_day", "day"),
+    )
+
+    @property
+    def phq2_avg(self):
+        return self.phq2_sum / self.checkins if self.checkins else None
+
+    @property
+    def exercise_minutes(self) -> float:
+        return self.exercise_seconds / 60
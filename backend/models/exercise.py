@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
 from datetime import datetime
 from db.session import Base
 
@@ -10,3 +10,8 @@ class ExerciseCompletion(Base):
     exercise_type = Column(String(50), nullable=False) # e.g., 'box_breathing', 'grounding'
     duration_seconds = Column(Integer, nullable=False, default=0)
     completed_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        # Paged history and streak rebuilds per user
+        Index("ix_exercise_completions_user_id_completed_at", "user_id", "completed_at"),
+    )
@@ -0,0 +1,22 @@
+"""
+Exercise Streak Model - One row per user with their run of consecutive exercise days
+Kept current by POST /exercises/complete (services/exercise_streaks.py) and rebuildable from history
+"""
+
+from sqlalchemy import Column, Date, DateTime, Integer, ForeignKey
+from sqlalchemy.sql import func
+from db.session import Base
+
+
+class ExerciseStreak(Base):
+    __tablename__ = "exercise_streaks"
+
+    # Keyed like exercise_completions, by users.id
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # Consecutive UTC days with a completion, ending at last_active_date; it only
+    # counts as the user's current streak while last_active_date is today or yesterday
+    current_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    longest_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    last_active_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -3,7 +3,7 @@ Journal Entry Model - Stores mood check-ins and reflective entries
 """
 
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from db.session import Base
@@ -53,3 +53,8 @@ class JournalEntry(Base):
     # Timestamps
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Per-student time-window scans (insights, streaks, dashboards)
+        Index("ix_journal_entries_user_id_created_at", "user_id", "created_at"),
+    )
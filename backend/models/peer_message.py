@@ -3,7 +3,7 @@ Peer Chat Models - Anonymous messaging system
 """
 
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, ForeignKey, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from db.session import Base
@@ -23,14 +23,33 @@ class ChatThread(Base):
     # Thread metadata
     thread_type = Column(Enum(ChatThreadTypeEnum), nullable=False)
     
-    # Participants stored as array of anon_ids (anonymous only)
-    participants_anon_ids = Column(ARRAY(String), nullable=False)
+    # Participants live in thread_members (anon_ids only)
+
+    # 1-on-1 threads only: sha256 of the sorted participant anon_ids, one thread per pair
+    participant_key = Column(String(64), unique=True, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     last_message_at = Column(DateTime, nullable=True)
 
 
+class ThreadMember(Base):
+    __tablename__ = "thread_members"
+
+    # Composite primary key doubles as the (thread_id, anon_id) membership lookup
+    thread_id = Column(UUID(as_uuid=True), ForeignKey("chat_threads.thread_id", ondelete="CASCADE"), primary_key=True)
+    anon_id = Column(String, primary_key=True)
+
+    joined_at = Column(DateTime, server_default=func.now(), nullable=False)
+    role = Column(String, default="member", nullable=False)  # owner | member
+    last_read_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # "Which threads is this anon_id in?"
+        Index("ix_thread_members_anon_id_thread_id", "anon_id", "thread_id"),
+    )
+
+
 class PeerMessage(Base):
     __tablename__ = "peer_messages"
 
@@ -55,3 +74,8 @@ class PeerMessage(Base):
     
     # Timestamps
     sent_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Keyset pagination of thread history
+        Index("ix_peer_messages_thread_id_sent_at", "thread_id", "sent_at"),
+    )
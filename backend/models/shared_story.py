@@ -3,7 +3,7 @@ Shared Stories Model - Anonymous journal entry sharing
 """
 
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Enum, ForeignKey, Integer, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from db.session import Base
@@ -28,6 +28,9 @@ class SharedStory(Base):
     # AI extracted metadata
     theme = Column(String, nullable=True)
     resonance_hook = Column(String, nullable=True)
+
+    # Feed features computed at share time (see services/story_index.py)
+    feature_keys = Column(ARRAY(String), nullable=True)
     
     # Engagement metrics
     resonance_count = Column(Integer, default=0)  # "I felt this too" counter
@@ -42,3 +45,17 @@ class SharedStory(Base):
     
     # Timestamps
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class StoryIndexTerm(Base):
+    """Inverted index posting: one row per (feature key, story)"""
+    __tablename__ = "story_index_terms"
+
+    key = Column(String, primary_key=True)  # mood:<m> | role:<r> | role_exact:<r> | term:<w>
+    story_id = Column(UUID(as_uuid=True), ForeignKey("shared_stories.story_id", ondelete="CASCADE"), primary_key=True, index=True)
+    # Copy of the story's published_at, so each key's postings can be read newest first
+    published_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_story_index_terms_key_published_at", "key", "published_at"),
+    )
@@ -3,7 +3,7 @@ Weekly Insights Model - Emotional patterns and AI-generated insights
 """
 
 import uuid
-from sqlalchemy import Column, Date, DateTime, Text, Boolean, ForeignKey, String
+from sqlalchemy import Column, Date, DateTime, Text, Boolean, ForeignKey, String, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from db.session import Base
@@ -38,3 +38,28 @@ class WeeklyInsight(Base):
     # Timestamps
     generated_at = Column(DateTime, server_default=func.now(), nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class WeeklyInsightRun(Base):
+    """Progress and resume checkpoint of one week's batch generation"""
+    __tablename__ = "weekly_insight_runs"
+
+    week_start = Column(Date, primary_key=True)
+    status = Column(String(16), nullable=False, default="running")  # running | completed
+
+    # Students with enough entries and no card yet when the run started
+    eligible_students = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    generated = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    chunks = Column(Integer, nullable=False, default=0)
+
+    # Keyset cursor: every eligible student at or below this user_id has been handled
+    last_user_id = Column(UUID(as_uuid=True), nullable=True)
+    # Set while a worker generates the next chunk outside any transaction; a claim
+    # older than JOB_LEASE_SECONDS belongs to a dead worker and may be taken over
+    claimed_at = Column(DateTime, nullable=True)
+
+    started_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime, nullable=True)
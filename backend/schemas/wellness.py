@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class ExerciseCompletionCreate(BaseModel):
     exercise_type: str = Field(..., description="Type of exercise (e.g., box_breathing, grounding)")
@@ -13,6 +13,7 @@ class ExerciseCompletionResponse(BaseModel):
     duration_seconds: int
     completed_at: datetime
     streak: int = 0  # To return streak info
+    cursor: Optional[str] = None  # Pass as ?before= for the next history page
 
     class Config:
         from_attributes = True
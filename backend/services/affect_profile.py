@@ -0,0 +1,169 @@
+"""
+Affect Profile Service - Cached per-user signals for the story feed and circle recommender
+A profile holds the last few journal moods, their lowercased text and term
+sets, the last few PHQ-2 check-in scores and the student_role. Each worker
+caches profiles keyed by a version read from the student's latest
+daily_mood_rollup row (its day and journal/check-in counts), which every
+journal and check-in write bumps in its own transaction. A read costs one primary-key lookup and only rebuilds (and
+decrypts) after a new entry, from whichever worker wrote it, so profiles are
+never stale. Profiles live in process memory only, never in Redis.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import desc
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from models.user import User
+from models.journal_entry import JournalEntry
+from models.checkin import CheckIn
+from models.daily_mood_rollup import DailyMoodRollup
+from core.encryption import decrypt_many
+from services.story_index import tokenize
+import time
+
+
+# Window sizes used by the feed and recommender
+RECENT_JOURNALS = 5
+RECENT_CHECKINS = 5
+
+# Bounds memory only; freshness comes from the version check
+PROFILE_TTL_SECONDS = 600
+MAX_PROFILES = 10000
+
+# (day, journal_entries, checkins) of the latest rollup row, or None for no activity
+ProfileVersion = Optional[Tuple]
+
+
+def _mood_value(mood) -> str:
+    return mood.value if hasattr(mood, "value") else str(mood).lower()
+
+
+@dataclass
+class AffectProfile:
+    """Recent affect signals for one user, newest first"""
+    moods: List[str] = field(default_factory=list)
+    # Lowercased text of the readable entries, for substring keyword matching
+    journal_texts: List[str] = field(default_factory=list)
+    journal_terms: List[Set[str]] = field(default_factory=list)
+    checkin_scores: List[int] = field(default_factory=list)
+    student_role: Optional[str] = None
+
+    @property
+    def terms(self) -> Set[str]:
+        """Union of terms across the recent journal window"""
+        merged = set()
+        for entry_terms in self.journal_terms:
+            merged.update(entry_terms)
+        return merged
+
+    @property
+    def avg_checkin_score(self) -> float:
+        if not self.checkin_scores:
+            return 0
+        return sum(self.checkin_scores) / len(self.checkin_scores)
+
+
+class AffectProfileCache:
+    """In-process TTL/LRU cache of affect profiles keyed by user_id and checked against a DB version"""
+
+    def __init__(self, ttl_seconds: float = PROFILE_TTL_SECONDS, max_entries: int = MAX_PROFILES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._profiles: "OrderedDict[str, Tuple[float, ProfileVersion, AffectProfile]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: str, version: ProfileVersion) -> Optional[AffectProfile]:
+        entry = self._profiles.get(key)
+        if entry is None:
+            return None
+        expires_at, cached_version, profile = entry
+        if expires_at < time.monotonic() or cached_version != version:
+            del self._profiles[key]
+            return None
+        self._profiles.move_to_end(key)
+        return profile
+
+    def _put(self, key: str, version: ProfileVersion, profile: AffectProfile):
+        self._profiles[key] = (time.monotonic() + self.ttl_seconds, version, profile)
+        self._profiles.move_to_end(key)
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    @staticmethod
+    async def current_version(user: User, db: AsyncSession) -> ProfileVersion:
+        """Changes whenever the student writes a journal entry or check-in"""
+        stmt = (
+            select(DailyMoodRollup.day, DailyMoodRollup.journal_entries, DailyMoodRollup.checkins)
+            .where(DailyMoodRollup.user_id == user.user_id)
+            .order_by(desc(DailyMoodRollup.day))
+            .limit(1)
+        )
+        res = await db.execute(stmt)
+        row = res.first()
+        return tuple(row) if row is not None else None
+
+    async def get_profile(self, user: User, db: AsyncSession) -> AffectProfile:
+        """Cached profile if still current, otherwise built from the database"""
+        key = str(user.user_id)
+        version = await self.current_version(user, db)
+        profile = self._get(key, version)
+        if profile is not None:
+            self.hits += 1
+            profile.student_role = user.student_role
+            return profile
+
+        self.misses += 1
+        profile = await self._build(user, db)
+        self._put(key, version, profile)
+        return profile
+
+    async def _build(self, user: User, db: AsyncSession) -> AffectProfile:
+        stmt_journals = (
+            select(JournalEntry.mood_selected, JournalEntry.entry_text)
+            .where(JournalEntry.user_id == user.user_id)
+            .order_by(desc(JournalEntry.created_at))
+            .limit(RECENT_JOURNALS)
+        )
+        res_journals = await db.execute(stmt_journals)
+        journals = res_journals.all()
+
+        stmt_checkins = (
+            select(CheckIn.score)
+            .where(CheckIn.user_id == user.id)
+            .order_by(desc(CheckIn.created_at))
+            .limit(RECENT_CHECKINS)
+        )
+        res_checkins = await db.execute(stmt_checkins)
+
+        # An unreadable entry only drops out of the profile's terms
+        texts = decrypt_many((j.entry_text for j in journals), strict=False)
+        return AffectProfile(
+            moods=[_mood_value(j.mood_selected) for j in journals],
+            journal_texts=[text.lower() for text in texts if text],
+            journal_terms=[tokenize(text) for text in texts],
+            checkin_scores=list(res_checkins.scalars().all()),
+            student_role=user.student_role,
+        )
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._profiles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_affect_profiles = None
+
+def get_affect_profiles() -> AffectProfileCache:
+    """Get or create singleton affect profile cache"""
+    global _affect_profiles
+    if _affect_profiles is None:
+        _affect_profiles = AffectProfileCache()
+    return _affect_profiles
@@ -0,0 +1,145 @@
+"""
+WebSocket Backplane Service - Cross-worker pub/sub for real-time fan-out
+Each worker subscribes once per channel and delivers to its own local sockets.
+In-memory backend for single-process runs, Redis pub/sub for multi-worker/multi-node.
+
+The in-memory backend only reaches handlers in its own process. The job worker
+(worker.py) runs separately, so CRISIS_ALERT events it publishes never reach
+API workers and are lost unless WS_BACKPLANE=redis.
+"""
+
+from abc import ABC, abstractmethod
+from config.settings import settings
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+
+# Handler invoked with the decoded message published on a channel
+MessageHandler = Callable[[dict], Awaitable[None]]
+
+# Channel every peer chat worker listens on for events addressed to one anon_id
+PEER_DIRECT_CHANNEL = "peer_chat:direct"
+
+
+class Backplane(ABC):
+    """Interface shared by backplane backends"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: dict):
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str):
+        ...
+
+    @abstractmethod
+    def is_subscribed(self, channel: str) -> bool:
+        ...
+
+    async def close(self):
+        pass
+
+
+class InMemoryBackplane(Backplane):
+    """Single-process backend: publish calls the local handler directly.
+    Messages published from another process (e.g. worker.py) are not delivered."""
+
+    def __init__(self):
+        self._handlers: Dict[str, MessageHandler] = {}
+
+    async def publish(self, channel: str, message: dict):
+        handler = self._handlers.get(channel)
+        if handler:
+            await handler(message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        self._handlers[channel] = handler
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+
+    def is_subscribed(self, channel: str) -> bool:
+        return channel in self._handlers
+
+
+class RedisBackplane(Backplane):
+    """Redis pub/sub backend: one subscriber connection and reader task per worker"""
+
+    def __init__(self, url: str = settings.REDIS_URL):
+        self.url = url
+        self._handlers: Dict[str, MessageHandler] = {}
+        self._redis = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def _ensure_connection(self):
+        if self._redis is None:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.url, decode_responses=True)
+            self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+
+    async def publish(self, channel: str, message: dict):
+        await self._ensure_connection()
+        await self._redis.publish(channel, json.dumps(message, default=str))
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        await self._ensure_connection()
+        first = channel not in self._handlers
+        self._handlers[channel] = handler
+        if first:
+            await self._pubsub.subscribe(channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, channel: str):
+        if self._handlers.pop(channel, None) is not None and self._pubsub is not None:
+            await self._pubsub.unsubscribe(channel)
+
+    def is_subscribed(self, channel: str) -> bool:
+        return channel in self._handlers
+
+    async def _listen(self):
+        while True:
+            try:
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if msg is None:
+                    continue
+                handler = self._handlers.get(msg["channel"])
+                if handler:
+                    await handler(json.loads(msg["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[BACKPLANE] Redis listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self._handlers.clear()
+
+
+# Singleton instance
+_backplane = None
+
+def get_backplane() -> Backplane:
+    """Get or create the process-wide backplane selected by WS_BACKPLANE"""
+    global _backplane
+    if _backplane is None:
+        if settings.WS_BACKPLANE == "redis":
+            _backplane = RedisBackplane(settings.REDIS_URL)
+        else:
+            _backplane = InMemoryBackplane()
+    return _backplane
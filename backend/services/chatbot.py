@@ -1,12 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
-from groq import Groq
-import os
 
 from models.chat_session import ChatSession
 from models.chat_message import ChatMessage
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from services.llm_gateway import get_llm_gateway
 
 async def chat_with_ai(user_id: int, user_message: str, db: AsyncSession):
     result = await db.execute(
@@ -57,13 +54,15 @@ Your goal is to make them feel heard, understood, and a little less alone."""}]
         role = "user" if msg.sender_role == "student" else "assistant"
         messages.append({"role": role, "content": msg.message})
     
-    response = client.chat.completions.create(
+    response = await get_llm_gateway().complete(
         model="llama-3.3-70b-versatile",
         temperature=0.7,
         messages=messages
     )
+    if not response.ok:
+        raise RuntimeError(f"AI chat failed: {response.error}")
     
-    ai_reply = response.choices[0].message.content
+    ai_reply = response.content
     
     db.add(ChatMessage(session_id=session.id, sender_role="ai", message=ai_reply))
     await db.commit()
@@ -2,7 +2,7 @@
 Circle Generator Service - AI-powered creation of Support Circles
 """
 
-from groq import Groq
+from services.llm_gateway import get_llm_gateway
 from config.settings import settings
 from typing import Dict
 import json
@@ -12,7 +12,7 @@ class CircleGenerator:
     """Auto-generates support circle configuration from theme + type"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
         self.model = "llama-3.3-70b-versatile"
         
     @staticmethod
@@ -53,21 +53,20 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
         """
         try:
             # Check if API key exists
-            if not getattr(settings, 'GROQ_API_KEY', None) and not self.client.api_key:
+            if not self.llm.configured:
                 raise ValueError("Groq API key not configured")
                 
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": f"Generate support circle configuration for:\nTheme: {theme}\nType/Category: {circle_type}"}
                 ],
                 max_tokens=600,
-                response_format={"type": "json_object"}
+                json_mode=True
             )
             
-            response_text = response.choices[0].message.content.strip()
-            result = json.loads(response_text)
+            result = response.json()
             
             # Ensure format is validated
             return {
@@ -4,19 +4,115 @@ Circle Recommender Service - Personalized recommendations for Support Circles
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func, or_
 from models.circle import Circle
 from models.user import User
-from models.journal_entry import JournalEntry
-from models.checkin import CheckIn
-from core.encryption import decrypt_string
+from services.affect_profile import AffectProfile, get_affect_profiles
+from services.keyword_engine import SubstringIndex
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional
 import collections
+import heapq
+
+
+TOP_K = 4
+
+# Mood -> circle attributes that earn a boost (mirrors the scoring rules below)
+AROUSED_MOODS = ["anxious", "overwhelmed", "frustrated"]
+LOW_MOODS = ["sad", "numb"]
+LOW_MOOD_TYPES = ["burnout", "relationship stress"]
+RAISED_SENSITIVITY = ["medium", "high"]
+
+
+def score_circle(
+    circle: Circle,
+    student_role: Optional[str],
+    most_common_mood: Optional[str],
+    avg_checkin_score: float,
+    keyword_matches: int,
+    is_late_night: bool
+) -> float:
+    score = 0.0
+
+    # A. Profile focus area match (student_role)
+    if student_role and circle.type.lower() == student_role.lower():
+        score += 6.0
+
+    # B. Mood matching
+    # E.g. if recent moods are anxious/sad/overwhelmed and circle matches
+    if most_common_mood:
+        if most_common_mood in AROUSED_MOODS and circle.sensitivity_level in RAISED_SENSITIVITY:
+            score += 3.0
+        if most_common_mood in LOW_MOODS and circle.type in LOW_MOOD_TYPES:
+            score += 2.0
+
+    # C. Checkin PHQ-2 score matching
+    # High score (> 3) triggers higher distress weight for high sensitivity circles
+    if avg_checkin_score >= 3 and circle.sensitivity_level == "high":
+        score += 4.0
+
+    # D. Journal keyword matching (cap keyword boost)
+    score += min(keyword_matches * 1.5, 4.5)
+
+    # E. Late night emotional boost
+    # Late night users get recommended high-sensitivity circles (burnout, crisis support)
+    if is_late_night:
+        if circle.sensitivity_level == "high":
+            score += 5.0
+        elif circle.sensitivity_level == "medium":
+            score += 3.0
+
+    # F. Tie breaker: newer circles get slightly higher priority
+    score += (circle.created_at.timestamp() / 1e10)
+    return score
+
+
+def rank_circles(
+    circles: Iterable[Circle],
+    profile: AffectProfile,
+    keyword_matches: Dict[object, int],
+    current_hour: int,
+    k: int = TOP_K
+) -> List[Circle]:
+    """Top-k circles by score, using a bounded heap instead of a full sort"""
+    most_common_mood = (
+        collections.Counter(profile.moods).most_common(1)[0][0] if profile.moods else None
+    )
+    is_late_night = current_hour >= 23 or current_hour < 4
+    scored = (
+        (
+            score_circle(
+                circle,
+                profile.student_role,
+                most_common_mood,
+                profile.avg_checkin_score,
+                keyword_matches.get(circle.circle_id, 0),
+                is_late_night
+            ),
+            circle
+        )
+        for circle in circles
+    )
+    return [circle for _, circle in heapq.nlargest(k, scored, key=lambda item: item[0])]
 
 
 class CircleRecommender:
     """Recommend circles based on student profile, mood history, journal themes, and time of day"""
-    
+
+    def __init__(self):
+        self._keyword_index: Optional[SubstringIndex] = None
+        self._keyword_index_version = None
+
+    async def _get_keyword_index(self, db: AsyncSession) -> SubstringIndex:
+        """Keyword matcher, rebuilt only when the circle set changes (circles are never edited)"""
+        res = await db.execute(select(func.count(), func.max(Circle.created_at)))
+        version = tuple(res.one())
+        if self._keyword_index is None or version != self._keyword_index_version:
+            res_keywords = await db.execute(select(Circle.circle_id, Circle.crisis_keywords))
+            self._keyword_index = SubstringIndex(res_keywords.all())
+            self._keyword_index_version = version
+        return self._keyword_index
+
     async def get_recommendations(self, user: User, db: AsyncSession) -> List[Circle]:
         """
         Get recommended support circles for a student
@@ -29,105 +125,50 @@ class CircleRecommender:
             List of recommended Circle objects
         """
         try:
-            # 1. Fetch all available circles
-            stmt = select(Circle)
-            res = await db.execute(stmt)
-            all_circles = res.scalars().all()
-            
-            if not all_circles:
-                return []
-                
-            # 2. Fetch student's recent journal entries (limit to 5)
-            stmt_journals = (
-                select(JournalEntry)
-                .where(JournalEntry.user_id == user.user_id)
-                .order_by(JournalEntry.created_at.desc())
-                .limit(5)
+            # 1. Recent moods, journal text and check-in scores from the cached affect profile
+            profile = await get_affect_profiles().get_profile(user, db)
+            most_common_mood = (
+                collections.Counter(profile.moods).most_common(1)[0][0] if profile.moods else None
             )
-            res_journals = await db.execute(stmt_journals)
-            recent_journals = res_journals.scalars().all()
-            
-            # Extract recent moods & keywords
-            recent_moods = []
-            journal_texts = []
-            for j in recent_journals:
-                recent_moods.append(j.mood_selected.value if hasattr(j.mood_selected, 'value') else str(j.mood_selected))
-                try:
-                    decrypted_text = decrypt_string(j.entry_text)
-                    if decrypted_text:
-                        journal_texts.append(decrypted_text.lower())
-                except Exception:
-                    pass
-                    
-            # 3. Fetch recent checkins
-            stmt_checkins = (
-                select(CheckIn)
-                .where(CheckIn.user_id == user.id)
-                .order_by(CheckIn.created_at.desc())
-                .limit(5)
-            )
-            res_checkins = await db.execute(stmt_checkins)
-            recent_checkins = res_checkins.scalars().all()
-            avg_checkin_score = sum(c.score for c in recent_checkins) / len(recent_checkins) if recent_checkins else 0
-            
-            # 4. Check time of day (late-night check: 11 PM to 4 AM)
+
+            # 2. Keyword matches for every circle: substrings of the journal text, one
+            #    check per distinct keyword per entry
+            keyword_matches = {}
+            if profile.journal_texts:
+                keyword_index = await self._get_keyword_index(db)
+                keyword_matches = keyword_index.match(profile.journal_texts)
+
+            # 3. Check time of day (late-night check: 11 PM to 4 AM)
             current_hour = datetime.now().hour
             is_late_night = current_hour >= 23 or current_hour < 4
-            
-            # 5. Score each circle
-            scored_circles = []
-            for circle in all_circles:
-                score = 0.0
-                
-                # Check if student is already in this circle
-                # We will handle user membership in API router, but if we have the chat thread, we can check.
-                # However, for recommendations, we suggest circles the student might be interested in.
-                
-                # A. Profile focus area match (student_role)
-                if user.student_role and circle.type.lower() == user.student_role.lower():
-                    score += 6.0
-                    
-                # B. Mood matching
-                # E.g. if recent moods are anxious/sad/overwhelmed and circle matches
-                if recent_moods:
-                    most_common_mood = collections.Counter(recent_moods).most_common(1)[0][0]
-                    if most_common_mood in ["anxious", "overwhelmed", "frustrated"] and circle.sensitivity_level in ["medium", "high"]:
-                        score += 3.0
-                    if most_common_mood in ["sad", "numb"] and circle.type in ["burnout", "relationship stress"]:
-                        score += 2.0
-                        
-                # C. Checkin PHQ-2 score matching
-                # High score (> 3) triggers higher distress weight for high sensitivity circles
-                if avg_checkin_score >= 3 and circle.sensitivity_level == "high":
-                    score += 4.0
-                    
-                # D. Journal text keyword matching
-                # See if decrypted journal entries contain any of the circle's crisis keywords
-                if journal_texts and circle.crisis_keywords:
-                    keyword_matches = 0
-                    for text in journal_texts:
-                        for kw in circle.crisis_keywords:
-                            if kw.lower() in text:
-                                keyword_matches += 1
-                    # cap keyword boost
-                    score += min(keyword_matches * 1.5, 4.5)
-                    
-                # E. Late night emotional boost
-                # Late night users get recommended high-sensitivity circles (burnout, crisis support)
-                if is_late_night:
-                    if circle.sensitivity_level == "high":
-                        score += 5.0
-                    elif circle.sensitivity_level == "medium":
-                        score += 3.0
-                        
-                # F. Tie breaker: newer circles get slightly higher priority
-                score += (circle.created_at.timestamp() / 1e10)
-                
-                scored_circles.append((circle, score))
-                
-            # 6. Sort by score descending and return circles
-            scored_circles.sort(key=lambda x: x[1], reverse=True)
-            return [item[0] for item in scored_circles[:4]]
+
+            # 4. Only circles that can earn a boost are loaded; every other circle
+            #    scores just its recency tie-breaker, so the newest few stand in for them
+            conditions = []
+            if profile.student_role:
+                conditions.append(func.lower(Circle.type) == profile.student_role.lower())
+            if most_common_mood in AROUSED_MOODS or is_late_night:
+                conditions.append(Circle.sensitivity_level.in_(RAISED_SENSITIVITY))
+            if most_common_mood in LOW_MOODS:
+                conditions.append(Circle.type.in_(LOW_MOOD_TYPES))
+            if profile.avg_checkin_score >= 3:
+                conditions.append(Circle.sensitivity_level == "high")
+            if keyword_matches:
+                conditions.append(Circle.circle_id.in_(list(keyword_matches)))
+
+            candidates = {}
+            if conditions:
+                res = await db.execute(select(Circle).where(or_(*conditions)))
+                for circle in res.scalars().all():
+                    candidates[circle.circle_id] = circle
+            res_newest = await db.execute(
+                select(Circle).order_by(Circle.created_at.desc()).limit(TOP_K)
+            )
+            for circle in res_newest.scalars().all():
+                candidates.setdefault(circle.circle_id, circle)
+
+            # 5. Top-k by score
+            return rank_circles(candidates.values(), profile, keyword_matches, current_hour)
         except Exception as e:
             print(f"Error in CircleRecommender: {e}")
             return []
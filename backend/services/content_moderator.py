@@ -3,7 +3,7 @@ Content Moderation Service - AI-powered safety checks for shared stories
 Ensures entries don't contain PII, crisis content, or hate before publishing
 """
 
-from groq import Groq
+from services.llm_gateway import get_llm_gateway
 from config.settings import settings
 from typing import Optional, Dict
 import json
@@ -13,7 +13,7 @@ class ContentModerator:
     """Content moderation for story sharing"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
         self.model = "mixtral-8x7b-32768"
     
     @staticmethod
@@ -41,18 +41,17 @@ Respond ONLY with JSON:
             Dict with safe: bool and reason: str
         """
         try:
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": f"Review this entry:\n\n{entry_text}"}
                 ],
                 max_tokens=200,
-                response_format={"type": "json_object"}
+                json_mode=True
             )
             
-            response_text = response.choices[0].message.content.strip()
-            result = json.loads(response_text)
+            result = response.json()
             
             return {
                 "safe": result.get("safe", False),
@@ -4,7 +4,7 @@ Classifies messages/entries into LOW/MEDIUM/HIGH risk categories
 Runs server-side, never shown to user during analysis
 """
 
-from groq import Groq
+from services.llm_gateway import get_llm_gateway
 from config.settings import settings
 from typing import Optional, Dict
 import json
@@ -14,7 +14,7 @@ class CrisisDetector:
     """AI crisis signal detection"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
         self.model = "mixtral-8x7b-32768"
     
     @staticmethod
@@ -30,31 +30,32 @@ Classify as: LOW / MEDIUM / HIGH.
 Respond ONLY with JSON:
 {"risk": "LOW"|"MEDIUM"|"HIGH", "signal": "brief description of what you detected"}"""
     
-    async def assess_risk(self, text: str, source_type: str = "message") -> Dict:
+    async def assess_risk(self, text: str, source_type: str = "message", timeout: Optional[float] = None) -> Dict:
         """
         Assess emotional risk level of a message
         
         Args:
             text: The message/entry to assess
             source_type: "message", "journal", or "mood_streak"
+            timeout: Deadline in seconds for the model call
         
         Returns:
             Dict with risk level and signal description
         """
         try:
             context = f"[{source_type.upper()}] "
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": f"Assess this:\n\n{context}{text}"}
                 ],
                 max_tokens=200,
-                response_format={"type": "json_object"}
+                json_mode=True,
+                timeout=timeout
             )
             
-            response_text = response.choices[0].message.content.strip()
-            result = json.loads(response_text)
+            result = response.json()
             
             risk_level = result.get("risk", "LOW").upper()
             
@@ -74,14 +75,16 @@ Respond ONLY with JSON:
             return {
                 "risk_level": "LOW",
                 "signal": "Assessment error",
-                "requires_intervention": False
+                "requires_intervention": False,
+                "error": True
             }
         except Exception as e:
             print(f"Error in crisis detection: {e}")
             return {
                 "risk_level": "LOW",
                 "signal": "Assessment error",
-                "requires_intervention": False
+                "requires_intervention": False,
+                "error": True
             }
 
 
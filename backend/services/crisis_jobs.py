@@ -0,0 +1,134 @@
+"""
+Crisis Jobs Service - Background crisis assessment for delivered chat messages and journal entries
+Peer messages are persisted and broadcast first; this job then runs the LLM risk
+assessment, records a CrisisEvent and sends the sender an out-of-band
+CRISIS_ALERT. Safe to re-run: an existing event for the message is reused.
+Journal entries are assessed inline when they are written; if that assessment
+times out or fails, the entry is saved with a job that retries it here.
+"""
+
+from sqlalchemy.future import select
+from datetime import datetime
+from db.session import SessionLocal
+from models.peer_message import PeerMessage
+from models.journal_entry import JournalEntry
+from models.crisis_event import CrisisEvent, CrisisSourceEnum
+from core.encryption import decrypt_string, encrypt_string
+from services.backplane import PEER_DIRECT_CHANNEL, get_backplane
+from services.crisis_detector import get_crisis_detector
+from services.job_queue import job_handler
+import uuid
+
+
+PEER_MESSAGE_CRISIS_JOB = "peer_message_crisis_assessment"
+JOURNAL_CRISIS_JOB = "journal_crisis_assessment"
+
+
+def peer_message_crisis_payload(message: PeerMessage, user_id) -> dict:
+    """Job payload for a just-saved message (content stays encrypted in peer_messages)"""
+    return {
+        "message_id": str(message.message_id),
+        "thread_id": str(message.thread_id),
+        "sender_anon_id": message.sender_anon_id,
+        "user_id": str(user_id),
+    }
+
+
+async def publish_crisis_alert(payload: dict, risk_level: str):
+    await get_backplane().publish(PEER_DIRECT_CHANNEL, {
+        "anon_id": payload["sender_anon_id"],
+        "message": {
+            "type": "CRISIS_ALERT",
+            "payload": {
+                "message_id": payload["message_id"],
+                "thread_id": payload["thread_id"],
+                "crisis_level": risk_level,
+            }
+        }
+    })
+
+
+@job_handler(PEER_MESSAGE_CRISIS_JOB, concurrency=8)
+async def assess_peer_message(payload: dict):
+    message_id = uuid.UUID(payload["message_id"])
+
+    async with SessionLocal() as db:
+        stmt_existing = select(CrisisEvent.risk_level).where(
+            CrisisEvent.source == CrisisSourceEnum.CHAT,
+            CrisisEvent.source_id == message_id
+        )
+        res_existing = await db.execute(stmt_existing)
+        existing_level = res_existing.scalars().first()
+        if existing_level is not None:
+            # Assessed before a restart; the alert may not have gone out yet
+            await publish_crisis_alert(payload, existing_level.value.upper())
+            return
+
+        message = await db.get(PeerMessage, message_id)
+        if message is None:
+            return
+
+        crisis_result = await get_crisis_detector().assess_risk(
+            decrypt_string(message.content),
+            source_type="chat"
+        )
+        if crisis_result.get("error"):
+            # Raise so the queue retries instead of recording a false LOW
+            raise RuntimeError("Crisis assessment unavailable")
+        if not crisis_result["requires_intervention"]:
+            return
+
+        db.add(CrisisEvent(
+            event_id=uuid.uuid4(),
+            user_id=uuid.UUID(payload["user_id"]),
+            anon_id=payload["sender_anon_id"],
+            source="chat",
+            source_id=message_id,
+            risk_level=crisis_result["risk_level"].lower(),
+            signal_text=encrypt_string(crisis_result["signal"]),
+            ai_reasoning=crisis_result.get("signal", ""),
+            triggered_at=datetime.utcnow()
+        ))
+        await db.commit()
+
+    await publish_crisis_alert(payload, crisis_result["risk_level"])
+
+
+@job_handler(JOURNAL_CRISIS_JOB, concurrency=8)
+async def assess_journal_entry(payload: dict):
+    entry_id = uuid.UUID(payload["entry_id"])
+
+    async with SessionLocal() as db:
+        stmt_existing = select(CrisisEvent.event_id).where(
+            CrisisEvent.source == CrisisSourceEnum.JOURNAL,
+            CrisisEvent.source_id == entry_id
+        )
+        res_existing = await db.execute(stmt_existing)
+        if res_existing.scalars().first() is not None:
+            return
+
+        entry = await db.get(JournalEntry, entry_id)
+        if entry is None:
+            return
+
+        crisis_result = await get_crisis_detector().assess_risk(
+            decrypt_string(entry.entry_text),
+            source_type="journal"
+        )
+        if crisis_result.get("error"):
+            raise RuntimeError("Crisis assessment unavailable")
+        if not crisis_result["requires_intervention"]:
+            return
+
+        db.add(CrisisEvent(
+            event_id=uuid.uuid4(),
+            user_id=entry.user_id,
+            anon_id=entry.anon_id,
+            source="journal",
+            source_id=entry_id,
+            risk_level=crisis_result["risk_level"].lower(),
+            signal_text=encrypt_string(crisis_result["signal"]),
+            ai_reasoning=crisis_result.get("signal", ""),
+            triggered_at=datetime.utcnow()
+        ))
+        await db.commit()
@@ -0,0 +1,155 @@
+"""
+Exercise Streaks Service - Incremental per-user streaks of consecutive exercise days
+Recording a completion updates the user's exercise_streaks row in O(1) inside the
+completion's transaction, so reading a streak no longer scans the user's whole
+exercise_completions history. rebuild_exercise_streaks recomputes rows from
+history with a gaps-and-islands query; the repair job runs it nightly.
+Days are UTC calendar days.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert as pg_insert
+from sqlalchemy.future import select
+from sqlalchemy import Date, Integer, case, cast, delete, func
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+from db.session import SessionLocal
+from models.exercise import ExerciseCompletion
+from models.exercise_streak import ExerciseStreak
+from services.job_queue import enqueue_job, job_handler, notify_job_worker
+
+
+EXERCISE_STREAK_REPAIR_JOB = "exercise_streak_repair"
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _utc_day(at: datetime) -> date:
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc)
+    return at.date()
+
+
+async def record_completion(db: AsyncSession, user_id: int, at: datetime):
+    """Fold one completion into the user's streak, in the caller's transaction"""
+    day = _utc_day(at)
+    table = ExerciseStreak.__table__
+    stmt = pg_insert(ExerciseStreak).values(
+        user_id=user_id, current_streak=1, longest_streak=1, last_active_date=day
+    )
+    # Same day (or an out-of-order older one): unchanged; the next day: +1; after a gap: restart
+    current = case(
+        (table.c.last_active_date >= day, table.c.current_streak),
+        (table.c.last_active_date == day - timedelta(days=1), table.c.current_streak + 1),
+        else_=1
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "current_streak": current,
+            "longest_streak": func.greatest(table.c.longest_streak, current),
+            "last_active_date": func.greatest(table.c.last_active_date, day),
+            "updated_at": func.now(),
+        }
+    ))
+
+
+def current_streak(state: Optional[ExerciseStreak], today: Optional[date] = None) -> int:
+    """The streak as of today: broken once a whole day passes without a completion"""
+    if state is None:
+        return 0
+    today = today or utc_today()
+    if state.last_active_date < today - timedelta(days=1):
+        return 0
+    return state.current_streak
+
+
+async def get_streak_state(db: AsyncSession, user_id: int) -> Optional[ExerciseStreak]:
+    return await db.get(ExerciseStreak, user_id, populate_existing=True)
+
+
+async def get_streak(db: AsyncSession, user_id: int) -> int:
+    return current_streak(await get_streak_state(db, user_id))
+
+
+def streak_source_query(user_ids: Optional[list] = None):
+    """
+    Per-user streak state from exercise_completions: distinct UTC days, grouped into
+    runs of consecutive days (day - row_number is constant within a run)
+    """
+    day = cast(func.timezone("UTC", ExerciseCompletion.completed_at), Date)
+    days = select(ExerciseCompletion.user_id, day.label("day")).distinct()
+    if user_ids is not None:
+        days = days.where(ExerciseCompletion.user_id.in_(user_ids))
+    days = days.subquery()
+
+    position = cast(func.row_number().over(partition_by=days.c.user_id, order_by=days.c.day), Integer)
+    islands = select(days.c.user_id, days.c.day, (days.c.day - position).label("island")).subquery()
+
+    runs = (
+        select(
+            islands.c.user_id,
+            func.count().label("length"),
+            func.max(islands.c.day).label("last_day")
+        )
+        .group_by(islands.c.user_id, islands.c.island)
+        .subquery()
+    )
+
+    # The current streak is the run ending on the user's latest day
+    latest_run = array_agg(aggregate_order_by(runs.c.length, runs.c.last_day.desc()))[1]
+    return (
+        select(
+            runs.c.user_id,
+            latest_run.label("current_streak"),
+            func.max(runs.c.length).label("longest_streak"),
+            func.max(runs.c.last_day).label("last_active_date")
+        )
+        .group_by(runs.c.user_id)
+    )
+
+
+async def rebuild_exercise_streaks(db: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute streak rows from history (all users, or just user_ids) in the caller's
+    transaction; returns how many rows were written
+    """
+    user_ids = list(user_ids) if user_ids is not None else None
+    stmt_clear = delete(ExerciseStreak)
+    if user_ids is not None:
+        stmt_clear = stmt_clear.where(ExerciseStreak.user_id.in_(user_ids))
+    await db.execute(stmt_clear)
+
+    columns = ["user_id", "current_streak", "longest_streak", "last_active_date"]
+    stmt = pg_insert(ExerciseStreak).from_select(columns, streak_source_query(user_ids))
+    # A completion may have recreated a row since the delete; history wins
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={**{name: stmt.excluded[name] for name in columns[1:]}, "updated_at": func.now()}
+    ).returning(ExerciseStreak.user_id)
+    res = await db.execute(stmt)
+    return len(res.all())
+
+
+@job_handler(EXERCISE_STREAK_REPAIR_JOB, concurrency=1)
+async def exercise_streak_repair_job(payload: dict):
+    user_ids = payload.get("user_ids")
+    async with SessionLocal() as db:
+        written = await rebuild_exercise_streaks(db, user_ids)
+        await db.commit()
+    print(f"[STREAKS] Rebuilt {written} exercise streaks from history.")
+
+
+async def enqueue_exercise_streak_repair():
+    """Cron entry: queue tonight's full repair once, however many processes run the cron"""
+    async with SessionLocal() as db:
+        await enqueue_job(
+            db,
+            EXERCISE_STREAK_REPAIR_JOB,
+            {},
+            idempotency_key=f"exercise_streak_repair:{utc_today().isoformat()}"
+        )
+        await db.commit()
+    notify_job_worker()
@@ -0,0 +1,214 @@
+"""
+Insight Analytics Service - Set-based journal aggregates for weekly insights
+One grouped query returns, for a page of eligible students (enough recent entries
+per daily_mood_rollup and no card for the week yet), their mood, prompt-category and hour-of-day
+histograms; a window-function query finds their positive streaks. Only these
+compact aggregates reach Python, never full JournalEntry rows.
+services/mood_analytics.py computes the same summaries in NumPy for offline runs.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy import Date, String, and_, case, cast, exists, func, tuple_
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+from models.user import User
+from models.journal_entry import JournalEntry, MoodEnum
+from models.weekly_insight import WeeklyInsight
+from models.daily_mood_rollup import DailyMoodRollup
+from services.mood_analytics import MAX_STREAK_GAP_DAYS, MIN_STREAK_ENTRIES, POSITIVE_MOODS
+import uuid
+
+# Insights look at this many days of entries, and need at least this many of them
+INSIGHT_LOOKBACK_DAYS = 30
+MIN_INSIGHT_ENTRIES = 3
+
+
+def lookback_start(now: Optional[datetime] = None) -> datetime:
+    """Midnight INSIGHT_LOOKBACK_DAYS ago, so the window lines up with daily_mood_rollup days"""
+    day = (now or datetime.utcnow()).date() - timedelta(days=INSIGHT_LOOKBACK_DAYS)
+    return datetime.combine(day, time.min)
+
+
+def eligible_students_query(week_start: date, since: datetime, students_only: bool = True):
+    """
+    user_ids of students with MIN_INSIGHT_ENTRIES+ entries since `since` and no card for week_start
+    Counted from daily_mood_rollup (a row per active day) rather than journal_entries
+    """
+    has_card = exists().where(
+        WeeklyInsight.user_id == DailyMoodRollup.user_id,
+        WeeklyInsight.week_start == week_start
+    )
+    stmt = (
+        select(DailyMoodRollup.user_id)
+        .where(
+            DailyMoodRollup.day >= since.date(),
+            DailyMoodRollup.journal_entries > 0,
+            ~has_card
+        )
+        .group_by(DailyMoodRollup.user_id)
+        .having(func.sum(DailyMoodRollup.journal_entries) >= MIN_INSIGHT_ENTRIES)
+    )
+    if students_only:
+        stmt = stmt.join(User, User.user_id == DailyMoodRollup.user_id).where(User.role == "student")
+    return stmt
+
+
+async def count_eligible_students(db: AsyncSession, week_start: date, since: datetime) -> int:
+    eligible = eligible_students_query(week_start, since).subquery()
+    res = await db.execute(select(func.count()).select_from(eligible))
+    return res.scalar() or 0
+
+
+async def fetch_insight_summaries(
+    db: AsyncSession,
+    week_start: date,
+    since: datetime,
+    after_user_id: Optional[uuid.UUID] = None,
+    limit: Optional[int] = None,
+    user_ids: Optional[Iterable[uuid.UUID]] = None
+) -> List[Dict]:
+    """
+    Summaries (see InsightGenerator.generate_from_summary) for the next eligible
+    students after `after_user_id`, in user_id order
+    Passing user_ids summarizes just those users, whatever their role
+    """
+    eligible = eligible_students_query(week_start, since, students_only=user_ids is None)
+    if after_user_id is not None:
+        eligible = eligible.where(DailyMoodRollup.user_id > after_user_id)
+    if user_ids is not None:
+        eligible = eligible.where(DailyMoodRollup.user_id.in_(list(user_ids)))
+    eligible = eligible.order_by(DailyMoodRollup.user_id)
+    if limit is not None:
+        eligible = eligible.limit(limit)
+    eligible = eligible.cte("eligible")
+
+    # One pass, three histograms: GROUP BY user_id, GROUPING SETS ((mood), (category), (hour))
+    hour = func.extract("hour", JournalEntry.created_at)
+    stmt = (
+        select(
+            JournalEntry.user_id,
+            JournalEntry.mood_selected,
+            JournalEntry.prompt_category,
+            hour.label("hour"),
+            func.count().label("entries")
+        )
+        .join(eligible, eligible.c.user_id == JournalEntry.user_id)
+        .where(JournalEntry.created_at >= since)
+        .group_by(
+            JournalEntry.user_id,
+            func.grouping_sets(
+                tuple_(JournalEntry.mood_selected),
+                tuple_(JournalEntry.prompt_category),
+                tuple_(hour)
+            )
+        )
+    )
+    res = await db.execute(stmt)
+
+    summaries: Dict[uuid.UUID, Dict] = {}
+    for user_id, mood, category, hour_of_day, entries in res.all():
+        summary = summaries.setdefault(user_id, {
+            "user_id": user_id,
+            "entry_count": 0,
+            "mood_frequency": {},
+            "category_frequency": {},
+            "hour_histogram": {},
+            "positive_streaks": None,
+        })
+        # Mood and category are NOT NULL, so a NULL marks the other grouping sets' rows
+        if mood is not None:
+            summary["mood_frequency"][mood.value] = entries
+            summary["entry_count"] += entries
+        elif category is not None:
+            summary["category_frequency"][category.value] = entries
+        else:
+            summary["hour_histogram"][int(hour_of_day)] = entries
+
+    streaks = await fetch_positive_streaks(db, list(summaries), since)
+    for user_id, summary in summaries.items():
+        summary["positive_streaks"] = streaks.get(user_id)
+    return [summaries[user_id] for user_id in sorted(summaries)]
+
+
+def positive_streaks_query(user_ids: List[uuid.UUID], since: datetime):
+    """
+    Gaps and islands: an entry starts a new island unless it and the previous
+    entry are both positive and at most MAX_STREAK_GAP_DAYS apart; a running
+    sum of the starts numbers the islands, and positive islands of
+    MIN_STREAK_ENTRIES+ entries are the streaks
+    """
+    # entry_id breaks created_at ties so lag() and the running sum see one order
+    window = {"partition_by": JournalEntry.user_id, "order_by": (JournalEntry.created_at, JournalEntry.entry_id)}
+    day = cast(JournalEntry.created_at, Date)
+    positive = JournalEntry.mood_selected.in_([MoodEnum(mood) for mood in POSITIVE_MOODS])
+    entries = (
+        select(
+            JournalEntry.user_id,
+            JournalEntry.entry_id,
+            JournalEntry.created_at,
+            cast(JournalEntry.mood_selected, String).label("mood"),
+            day.label("day"),
+            positive.label("positive"),
+            func.lag(day).over(**window).label("prev_day"),
+            func.lag(positive).over(**window).label("prev_positive")
+        )
+        .where(
+            JournalEntry.user_id.in_(user_ids),
+            JournalEntry.created_at >= since
+        )
+        .subquery()
+    )
+
+    starts_island = case(
+        (and_(
+            entries.c.positive,
+            entries.c.prev_positive,
+            entries.c.day - entries.c.prev_day <= MAX_STREAK_GAP_DAYS
+        ), 0),
+        else_=1
+    )
+    islands = select(
+        entries.c.user_id,
+        entries.c.created_at,
+        entries.c.mood,
+        entries.c.day,
+        entries.c.positive,
+        func.sum(starts_island).over(
+            partition_by=entries.c.user_id,
+            order_by=(entries.c.created_at, entries.c.entry_id),
+            rows=(None, 0)
+        ).label("island")
+    ).subquery()
+
+    return (
+        select(
+            islands.c.user_id,
+            array_agg(aggregate_order_by(islands.c.day, islands.c.created_at)).label("dates"),
+            array_agg(aggregate_order_by(islands.c.mood, islands.c.created_at.desc()))[1].label("mood")
+        )
+        .where(islands.c.positive)
+        .group_by(islands.c.user_id, islands.c.island)
+        .having(func.count() >= MIN_STREAK_ENTRIES)
+        .order_by(islands.c.user_id, func.min(islands.c.created_at))
+    )
+
+
+async def fetch_positive_streaks(
+    db: AsyncSession,
+    user_ids: List[uuid.UUID],
+    since: datetime
+) -> Dict[uuid.UUID, Optional[List[Dict]]]:
+    """Positive-mood streaks per student ({dates, mood} each, as in mood_analytics.positive_streaks)"""
+    if not user_ids:
+        return {}
+    res = await db.execute(positive_streaks_query(user_ids, since))
+
+    streaks: Dict[uuid.UUID, List[Dict]] = {}
+    for user_id, dates, mood in res.all():
+        streaks.setdefault(user_id, []).append({
+            "dates": [day.isoformat() for day in dates],
+            "mood": mood,
+        })
+    return streaks
@@ -3,19 +3,19 @@ Weekly Insights Service - Generates personalized emotional pattern insights
 Analyzes mood data, journal categories, and timestamps from the past 7 days
 """
 
-from groq import Groq
+from services.llm_gateway import get_llm_gateway
+from services.mood_analytics import hour_histogram, positive_streaks, summarize_history, value_counts
 from config.settings import settings
 from typing import Optional, Dict, List
 import json
 from datetime import datetime, timedelta
-from collections import Counter
 
 
 class InsightGenerator:
     """Generate weekly emotional insights"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
         self.model = "mixtral-8x7b-32768"
     
     @staticmethod
@@ -32,21 +32,26 @@ Output ONLY as JSON with no markdown:
     
     def analyze_mood_frequency(self, moods: List[str]) -> Dict[str, int]:
         """Count mood frequency"""
-        return dict(Counter(moods))
+        return value_counts(moods)
     
     def detect_time_of_day_pattern(self, timestamps: List[datetime]) -> Optional[str]:
         """Detect if entries cluster in specific hours"""
         if not timestamps:
             return None
-        
-        hours = [ts.hour for ts in timestamps]
-        hour_counter = Counter(hours)
+        return self.time_of_day_pattern_from_hours(hour_histogram(timestamps))
+    
+    @staticmethod
+    def time_of_day_pattern_from_hours(hour_counts: Dict[int, int]) -> Optional[str]:
+        """Peak time block from an hour-of-day histogram, if it holds 40%+ of entries"""
+        total = sum(hour_counts.values())
+        if not total:
+            return None
         
         # Group into time blocks
-        morning = sum(hour_counter.get(h, 0) for h in range(6, 12))
-        afternoon = sum(hour_counter.get(h, 0) for h in range(12, 18))
-        evening = sum(hour_counter.get(h, 0) for h in range(18, 24))
-        night = sum(hour_counter.get(h, 0) for h in range(0, 6))
+        morning = sum(hour_counts.get(h, 0) for h in range(6, 12))
+        afternoon = sum(hour_counts.get(h, 0) for h in range(12, 18))
+        evening = sum(hour_counts.get(h, 0) for h in range(18, 24))
+        night = sum(hour_counts.get(h, 0) for h in range(0, 6))
         
         blocks = [
             ("morning (6am-12pm)", morning),
@@ -57,38 +62,23 @@ Output ONLY as JSON with no markdown:
         
         peak_block, peak_count = max(blocks, key=lambda x: x[1])
         
-        if peak_count >= len(timestamps) * 0.4:  # 40%+ of entries
+        if peak_count >= total * 0.4:  # 40%+ of entries
             return peak_block
         
         return None
     
     def detect_positive_streaks(self, moods: List[str], timestamps: List[datetime]) -> Optional[List[Dict]]:
-        """Detect consecutive days of positive moods"""
-        positive_moods = {"hopeful", "calm", "grateful"}
-        
-        streaks = []
-        current_streak = []
-        
-        for mood, ts in zip(moods, timestamps):
-            if mood in positive_moods:
-                if not current_streak or (current_streak and (ts.date() - current_streak[-1].date()).days <= 1):
-                    current_streak.append(ts)
-                else:
-                    if len(current_streak) >= 3:
-                        streaks.append({
-                            "dates": [ts.date().isoformat() for ts in current_streak],
-                            "mood": mood
-                        })
-                    current_streak = [ts]
-            else:
-                if len(current_streak) >= 3:
-                    streaks.append({
-                        "dates": [ts.date().isoformat() for ts in current_streak],
-                        "mood": moods[timestamps.index(current_streak[-1])]
-                    })
-                current_streak = []
-        
-        return streaks if streaks else None
+        """Detect runs of 3+ positive entries no more than a day apart"""
+        return positive_streaks(moods, timestamps)
+    
+    def summarize_entries(
+        self,
+        moods: List[str],
+        timestamps: List[datetime],
+        categories: List[str]
+    ) -> Dict:
+        """Aggregate raw entries into the summary generate_from_summary expects"""
+        return summarize_history(moods, timestamps, categories)
     
     async def generate_weekly_insights(
         self,
@@ -104,15 +94,28 @@ Output ONLY as JSON with no markdown:
             timestamps: Corresponding timestamps
             categories: Prompt categories (academic, social, identity, general)
         
+        Returns:
+            Dict with observation, reframe, micro_action
+        """
+        return await self.generate_from_summary(self.summarize_entries(moods, timestamps, categories))
+    
+    async def generate_from_summary(self, summary: Dict) -> Optional[Dict]:
+        """
+        Generate weekly insights from pre-aggregated journal data
+        
+        Args:
+            summary: entry_count, mood_frequency, category_frequency, hour_histogram
+                and positive_streaks (as built by summarize_entries or services/insight_analytics)
+        
         Returns:
             Dict with observation, reframe, micro_action
         """
         try:
             # Analyze patterns
-            mood_freq = self.analyze_mood_frequency(moods)
-            category_freq = dict(Counter(categories))
-            time_pattern = self.detect_time_of_day_pattern(timestamps)
-            positive_streaks = self.detect_positive_streaks(moods, timestamps)
+            mood_freq = summary["mood_frequency"]
+            category_freq = summary["category_frequency"]
+            time_pattern = self.time_of_day_pattern_from_hours(summary["hour_histogram"])
+            positive_streaks = summary.get("positive_streaks")
             
             # Find most frequent mood
             top_mood, top_count = max(mood_freq.items(), key=lambda x: x[1]) if mood_freq else (None, 0)
@@ -123,27 +126,25 @@ Output ONLY as JSON with no markdown:
             # Build prompt
             data_summary = f"""
 Past 7 days summary:
-- Most frequent mood: {top_mood} ({top_count} of {len(moods)} entries)
+- Most frequent mood: {top_mood} ({top_count} of {summary["entry_count"]} entries)
 - Mood breakdown: {json.dumps(mood_freq)}
 - Most common journal topic: {top_category} ({top_cat_count} entries)
 - Time of day pattern: {time_pattern or 'mixed throughout day'}
 - Positive streaks: {json.dumps(positive_streaks) if positive_streaks else 'none identified'}
 """
             
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": f"Generate insights based on this data:\n{data_summary}"}
                 ],
                 max_tokens=500,
-                response_format={"type": "json_object"}
+                json_mode=True
             )
             
-            response_text = response.choices[0].message.content.strip()
-            
             # Parse JSON response
-            result = json.loads(response_text)
+            result = response.json()
             
             return {
                 "observation": result.get("observation", ""),
@@ -0,0 +1,404 @@
+"""
+Job Queue Service - Durable Postgres-backed background jobs
+Jobs are rows in background_jobs, added in the same transaction as the data they
+act on, so a committed request always has its follow-up work recorded. Workers
+claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED and renew each running
+job's lease with a heartbeat; a job whose worker dies mid-run is claimed again
+once its lease expires, so handlers must be idempotent.
+
+- Retries back off exponentially with jitter until max_attempts, then the job is failed
+- A lease expiry counts as an attempt, so a job that keeps killing its worker is failed too
+- A handler running longer than JOB_TIMEOUT_SECONDS is cancelled and retried
+- An idempotency key makes enqueueing the same logical job twice a no-op
+- Status writes are fenced on (job_id, attempts), so a worker that lost its lease
+  cannot overwrite the outcome of the worker that reclaimed the job
+- Finished rows are purged after JOB_RETENTION_DAYS, except for job types whose
+  idempotency key must outlive them (registered with retain_finished=True)
+- Each job type has a concurrency limit per worker process
+- API processes only enqueue when JOB_WORKER_IN_API is false; worker.py runs the jobs
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import and_, delete, or_, update
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from db.session import SessionLocal
+from models.background_job import BackgroundJob
+from config.settings import settings
+import asyncio
+import importlib
+import random
+import uuid
+
+# Handler invoked with the job's payload; raising schedules a retry
+JobHandler = Callable[[dict], Awaitable[None]]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+# job_type -> jobs of that type one worker runs at once
+JOB_CONCURRENCY: Dict[str, int] = {}
+# Job types whose finished rows are never purged (their key records that the work happened)
+JOB_RETAIN_FINISHED: Set[str] = set()
+
+DEFAULT_TYPE_CONCURRENCY = 4
+
+PURGE_FINISHED_JOBS_JOB = "purge_finished_jobs"
+# Rows deleted per purge transaction, so the purge never holds long locks
+PURGE_BATCH_SIZE = 5000
+
+# Modules whose import registers job handlers (loaded by every worker)
+HANDLER_MODULES = (
+    "services.crisis_jobs",
+    "services.story_jobs",
+    "services.scheduler",
+    "services.exercise_streaks",
+)
+
+
+def job_handler(job_type: str, concurrency: int = DEFAULT_TYPE_CONCURRENCY, retain_finished: bool = False):
+    """Register the coroutine that runs jobs of this type"""
+    def register(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = func
+        JOB_CONCURRENCY[job_type] = concurrency
+        if retain_finished:
+            JOB_RETAIN_FINISHED.add(job_type)
+        return func
+    return register
+
+
+def load_job_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter so failed jobs do not retry in lockstep"""
+    delay = settings.JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)) * random.uniform(0.8, 1.2)
+    return min(delay, settings.JOB_RETRY_MAX_SECONDS)
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    job_type: str,
+    payload: dict,
+    run_at: Optional[datetime] = None,
+    idempotency_key: Optional[str] = None,
+    max_attempts: int = settings.JOB_MAX_ATTEMPTS
+) -> Optional[uuid.UUID]:
+    """
+    Add a job to the caller's transaction (it becomes visible when the caller commits)
+    Returns the new job_id, or None if a job with the same idempotency key already exists
+    """
+    stmt = (
+        pg_insert(BackgroundJob)
+        .values(
+            job_id=uuid.uuid4(),
+            job_type=job_type,
+            payload=payload,
+            idempotency_key=idempotency_key,
+            run_at=run_at or datetime.utcnow(),
+            max_attempts=max_attempts
+        )
+        .on_conflict_do_nothing(constraint="uq_background_jobs_idempotency_key")
+        .returning(BackgroundJob.job_id)
+    )
+    res = await db.execute(stmt)
+    return res.scalar()
+
+
+async def claim_jobs(
+    db: AsyncSession,
+    job_type: str,
+    limit: int,
+    lease_seconds: float = settings.JOB_LEASE_SECONDS
+) -> List:
+    """Atomically mark up to `limit` due jobs of one type (or with an expired lease) as running"""
+    now = datetime.utcnow()
+    lease_expired = and_(
+        BackgroundJob.status == "running",
+        BackgroundJob.locked_at < now - timedelta(seconds=lease_seconds)
+    )
+
+    # Expired leases on the last attempt: the worker died (or hung) every time
+    exhausted = (
+        select(BackgroundJob.job_id)
+        .where(
+            BackgroundJob.job_type == job_type,
+            lease_expired,
+            BackgroundJob.attempts >= BackgroundJob.max_attempts
+        )
+        .with_for_update(skip_locked=True)
+    )
+    await db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.job_id.in_(exhausted.scalar_subquery()))
+        .values(status="failed", finished_at=now, last_error="Lease expired on the final attempt")
+        .execution_options(synchronize_session=False)
+    )
+
+    due = (
+        select(BackgroundJob.job_id)
+        .where(
+            BackgroundJob.job_type == job_type,
+            or_(
+                and_(BackgroundJob.status == "pending", BackgroundJob.run_at <= now),
+                and_(lease_expired, BackgroundJob.attempts < BackgroundJob.max_attempts),
+            )
+        )
+        .order_by(BackgroundJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(BackgroundJob)
+        .where(BackgroundJob.job_id.in_(due.scalar_subquery()))
+        .values(status="running", locked_at=now, attempts=BackgroundJob.attempts + 1)
+        .returning(
+            BackgroundJob.job_id,
+            BackgroundJob.job_type,
+            BackgroundJob.payload,
+            BackgroundJob.attempts,
+            BackgroundJob.max_attempts
+        )
+        .execution_options(synchronize_session=False)
+    )
+    res = await db.execute(stmt)
+    jobs = res.all()
+    await db.commit()
+    return jobs
+
+
+class JobWorker:
+    """Claims jobs for every registered type and runs them as tasks, within per-type limits"""
+
+    def __init__(
+        self,
+        poll_seconds: float = settings.JOB_POLL_SECONDS,
+        concurrency: int = settings.JOB_WORKER_CONCURRENCY
+    ):
+        self.poll_seconds = poll_seconds
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+        # job_type -> jobs of that type currently running here
+        self._running_by_type: Dict[str, int] = {}
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.lost_leases = 0
+
+    def start(self):
+        load_job_handlers()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            print(f"[JOBS] Worker started for: {', '.join(sorted(JOB_HANDLERS))}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # In-flight jobs are abandoned; their leases expire and another worker retries them
+        for task in list(self._running):
+            task.cancel()
+
+    def wake(self):
+        """Check for jobs now instead of at the next poll (call after committing an enqueue)"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[JOBS] Worker poll failed: {e}")
+                claimed = 0
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them; returns how many were claimed"""
+        claimed = 0
+        async with SessionLocal() as db:
+            for job_type in list(JOB_HANDLERS):
+                free = min(
+                    self.concurrency - len(self._running),
+                    JOB_CONCURRENCY[job_type] - self._running_by_type.get(job_type, 0)
+                )
+                if free <= 0:
+                    continue
+                for job in await claim_jobs(db, job_type, free):
+                    self._spawn(job)
+                    claimed += 1
+        return claimed
+
+    def _spawn(self, job):
+        self._running_by_type[job.job_type] = self._running_by_type.get(job.job_type, 0) + 1
+        task = asyncio.create_task(self._run_job(job))
+        self._running.add(task)
+
+        def done(t: asyncio.Task):
+            self._running.discard(t)
+            self._running_by_type[job.job_type] -= 1
+            # A slot opened up
+            self._wakeup.set()
+
+        task.add_done_callback(done)
+
+    async def run_until_idle(self):
+        """Run every due job, then return (tests and one-off maintenance)"""
+        load_job_handlers()
+        while await self.run_once() or self._running:
+            if self._running:
+                await asyncio.wait(set(self._running), return_when=asyncio.FIRST_COMPLETED)
+
+    async def _run_job(self, job):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await asyncio.wait_for(JOB_HANDLERS[job.job_type](job.payload), timeout=settings.JOB_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            await self._record_failure(job, TimeoutError(f"timed out after {settings.JOB_TIMEOUT_SECONDS:.0f}s"))
+            return
+        except Exception as e:
+            await self._record_failure(job, e)
+            return
+        finally:
+            heartbeat.cancel()
+        if await self._finish(job, status="done", finished_at=datetime.utcnow(), last_error=None):
+            self.completed += 1
+
+    @staticmethod
+    def _owned(job):
+        """Rows still held by this claim: a reclaim bumps attempts, so an old claim no longer matches"""
+        return and_(
+            BackgroundJob.job_id == job.job_id,
+            BackgroundJob.status == "running",
+            BackgroundJob.attempts == job.attempts
+        )
+
+    async def _heartbeat(self, job):
+        """Renew the job's lease while its handler runs, so only a dead worker loses it"""
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                async with SessionLocal() as db:
+                    res = await db.execute(
+                        update(BackgroundJob)
+                        .where(self._owned(job))
+                        .values(locked_at=datetime.utcnow())
+                    )
+                    await db.commit()
+                if res.rowcount == 0:
+                    print(f"[JOBS] Lost the lease on job {job.job_id}; its result will be discarded")
+                    return
+            except Exception as e:
+                print(f"[JOBS] Lease renewal for job {job.job_id} failed: {e}")
+
+    async def _record_failure(self, job, error: Exception):
+        print(f"[JOBS] {job.job_type} job {job.job_id} failed (attempt {job.attempts}/{job.max_attempts}): {error}")
+        if job.attempts >= job.max_attempts:
+            if await self._finish(job, status="failed", finished_at=datetime.utcnow(), last_error=str(error)):
+                self.failed += 1
+        else:
+            retry_at = datetime.utcnow() + timedelta(seconds=retry_delay_seconds(job.attempts))
+            if await self._finish(job, status="pending", run_at=retry_at, locked_at=None, last_error=str(error)):
+                self.retried += 1
+
+    async def _finish(self, job, **values) -> bool:
+        """Record the outcome if this claim still owns the job; False if it was reclaimed meanwhile"""
+        async with SessionLocal() as db:
+            res = await db.execute(update(BackgroundJob).where(self._owned(job)).values(**values))
+            await db.commit()
+        if res.rowcount == 0:
+            print(f"[JOBS] {job.job_type} job {job.job_id} was reclaimed by another worker; outcome not recorded")
+            self.lost_leases += 1
+            return False
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "in_flight": dict(self._running_by_type),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases,
+        }
+
+
+# Singleton instance
+_job_worker = None
+
+def get_job_worker() -> JobWorker:
+    """Get or create the process-wide job worker"""
+    global _job_worker
+    if _job_worker is None:
+        _job_worker = JobWorker()
+    return _job_worker
+
+
+def notify_job_worker():
+    """Wake the in-process worker after a commit that enqueued jobs (no-op when jobs run in worker.py)"""
+    if settings.JOB_WORKER_IN_API:
+        get_job_worker().wake()
+
+
+async def purge_finished_jobs(retention_days: int = settings.JOB_RETENTION_DAYS) -> int:
+    """Delete done/failed jobs finished more than retention_days ago, in batches; returns how many"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    # run_at never follows finished_at, so the run_at bound lets the (status, run_at) index narrow the scan
+    expired = (
+        select(BackgroundJob.job_id)
+        .where(
+            BackgroundJob.status.in_(("done", "failed")),
+            BackgroundJob.run_at < cutoff,
+            BackgroundJob.finished_at < cutoff,
+            BackgroundJob.job_type.notin_(sorted(JOB_RETAIN_FINISHED))
+        )
+        .limit(PURGE_BATCH_SIZE)
+    )
+    purged = 0
+    while True:
+        async with SessionLocal() as db:
+            res = await db.execute(
+                delete(BackgroundJob)
+                .where(BackgroundJob.job_id.in_(expired.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        purged += res.rowcount
+        if res.rowcount < PURGE_BATCH_SIZE:
+            return purged
+
+
+@job_handler(PURGE_FINISHED_JOBS_JOB, concurrency=1)
+async def purge_finished_jobs_job(payload: dict):
+    purged = await purge_finished_jobs()
+    print(f"[JOBS] Purged {purged} finished jobs older than {settings.JOB_RETENTION_DAYS} days")
+
+
+async def enqueue_job_purge():
+    """Cron entry: queue today's purge once, however many processes run the cron"""
+    async with SessionLocal() as db:
+        await enqueue_job(
+            db,
+            PURGE_FINISHED_JOBS_JOB,
+            {},
+            idempotency_key=f"purge_finished_jobs:{datetime.utcnow().date().isoformat()}"
+        )
+        await db.commit()
+    notify_job_worker()
@@ -0,0 +1,208 @@
+"""
+Keyword Engine Service - Shared compiled keyword matching for moderation and recommendations
+Term sets (the global crisis/distress lists or a circle's crisis_keywords) are
+compiled once into a single matcher and cached, so checking a message is one
+linear pass over its normalized text instead of a substring scan per term.
+
+Matching works on normalized text: lowercase, common leetspeak folded back to
+letters ("k1ll" -> "kill") and punctuation collapsed to single spaces, so
+"self-harm", "self harm" and "SELF_HARM" are the same term. Terms match whole
+words; a trailing "*" makes a term a word prefix ("cry*" matches "crying").
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import collections
+import hashlib
+import re
+
+
+# Crisis language that blocks a message or story outright. Stems are prefix terms
+# so inflections ("suicides", "self-harming", "overdosed") stay blocked, as they
+# were under the old substring checks
+CRISIS_TERMS = (
+    "suicid*", "kill myself", "want to die", "end my life", "self harm*", "selfharm*",
+    "cutting myself", "better off dead", "kill me", "slit my wrist*", "hanging myself",
+    "overdos*",
+)
+
+# Mild distress vocabulary that earns a soft wellness flag
+DISTRESS_TERMS = (
+    "depress*", "anxious", "stress*", "lonely", "sad", "fail*", "empty", "cry*", "cried",
+    "hopeless*", "worthless*", "panic*",
+)
+
+# Story fallback mood detection, checked in order: keyword -> (Mood, theme)
+MOOD_KEYWORDS = (
+    ("stressed", ("Stressed", "academic pressure")),
+    ("anxious", ("Anxious", "anxiety")),
+    ("sad", ("Sad", "loneliness")),
+    ("lonely", ("Lonely", "isolation")),
+    ("tired", ("Tired", "burnout")),
+    ("hopeful", ("Hopeful", "future plans")),
+    ("excited", ("Excited", "positive change")),
+)
+
+# Compiled matchers kept per distinct term set (global lists plus one per circle)
+MATCHER_CACHE_SIZE = 1024
+
+LEET_TABLE = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    "@": "a", "$": "s",
+})
+
+# Anything that is not a letter or digit separates words
+SEPARATOR_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercased, leetspeak-folded text with punctuation collapsed to single spaces"""
+    if not text:
+        return ""
+    return SEPARATOR_PATTERN.sub(" ", text.lower().translate(LEET_TABLE)).strip()
+
+
+def _normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Normalized text plus, for each of its characters, the offset in the original"""
+    chars: List[str] = []
+    offsets: List[int] = []
+    pending_space = False
+    for i, ch in enumerate(text.lower().translate(LEET_TABLE)):
+        if ch.isascii() and ch.isalnum():
+            if pending_space and chars:
+                chars.append(" ")
+                offsets.append(i)
+            chars.append(ch)
+            offsets.append(i)
+            pending_space = False
+        else:
+            pending_space = True
+    return "".join(chars), offsets
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """One matched term and its [start, end) span in the original text"""
+    term: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """A term set compiled into one alternation with word boundaries"""
+
+    def __init__(self, terms: Iterable[str]):
+        # normalized pattern -> the term as it was given (first spelling wins)
+        self.terms: Dict[str, str] = {}
+        prefixes: Set[str] = set()
+        for term in terms:
+            is_prefix = term.endswith("*")
+            pattern = normalize(term.rstrip("*"))
+            if not pattern or pattern in self.terms:
+                continue
+            self.terms[pattern] = term
+            if is_prefix:
+                prefixes.add(pattern)
+
+        if not self.terms:
+            self._regex = None
+            return
+        # Longest first so "kill myself" wins over "kill me" at the same position
+        alternatives = [
+            re.escape(p).replace(r"\ ", " ") + (r"[a-z0-9]*" if p in prefixes else "")
+            for p in sorted(self.terms, key=len, reverse=True)
+        ]
+        self._regex = re.compile(r"(?<![a-z0-9])(?:" + "|".join(
+            f"(?P<t{i}>{alt})" for i, alt in enumerate(alternatives)
+        ) + r")(?![a-z0-9])")
+        self._group_terms = {
+            f"t{i}": self.terms[p] for i, p in enumerate(sorted(self.terms, key=len, reverse=True))
+        }
+
+    def find_all(self, text: Optional[str]) -> List[KeywordMatch]:
+        """Every non-overlapping match, left to right, with spans in the original text"""
+        if self._regex is None or not text:
+            return []
+        normalized, offsets = _normalize_with_offsets(text)
+        return [
+            KeywordMatch(
+                term=self._group_terms[m.lastgroup],
+                start=offsets[m.start()],
+                end=offsets[m.end() - 1] + 1,
+            )
+            for m in self._regex.finditer(normalized)
+        ]
+
+    def first(self, text: Optional[str]) -> Optional[KeywordMatch]:
+        matches = self.find_all(text)
+        return matches[0] if matches else None
+
+    def matches(self, text: Optional[str]) -> bool:
+        if self._regex is None or not text:
+            return False
+        return self._regex.search(normalize(text)) is not None
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _compile(terms: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(terms)
+
+
+def get_matcher(terms: Optional[Iterable[str]]) -> KeywordMatcher:
+    """Compiled matcher for a term set, cached by its contents"""
+    return _compile(tuple(sorted(set(terms or ()))))
+
+
+def term_set_version(terms: Optional[Iterable[str]]) -> str:
+    """Short stable fingerprint of a term set, for keying results that depend on it"""
+    canonical = "\x1f".join(sorted({t.strip().lower() for t in terms or ()}))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+class SubstringIndex:
+    """
+    Multi-owner keyword matcher with plain substring semantics.
+    A keyword matches a document when its lowercased text occurs anywhere in the
+    lowercased document, the same test as `kw.lower() in text`, so short and
+    stopword phrases ("give up", "no sleep") and inflections ("hopelessness")
+    match exactly as before. Each distinct keyword is checked once per document
+    however many owners share it.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[object, Optional[List[str]]]]):
+        # keyword -> owners listing it (repeated if an owner lists it twice)
+        self.owners: Dict[str, List[object]] = collections.defaultdict(list)
+        for owner, keywords in rows:
+            for kw in keywords or ():
+                self.owners[kw.lower()].append(owner)
+
+    def match(self, documents: Iterable[str]) -> Dict[object, int]:
+        """owner -> number of (document, keyword) matches; documents are lowercased text"""
+        counts = collections.Counter()
+        for text in documents:
+            for kw, owners in self.owners.items():
+                if kw in text:
+                    counts.update(owners)
+        return counts
+
+
+def crisis_matcher() -> KeywordMatcher:
+    return get_matcher(CRISIS_TERMS)
+
+
+def distress_matcher() -> KeywordMatcher:
+    return get_matcher(DISTRESS_TERMS)
+
+
+def mood_matcher() -> KeywordMatcher:
+    return get_matcher(term for term, _ in MOOD_KEYWORDS)
+
+
+def detect_mood(text: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(Mood, theme) for the first mood keyword in MOOD_KEYWORDS order that appears in the text"""
+    found = {m.term for m in mood_matcher().find_all(text)}
+    for term, mood_theme in MOOD_KEYWORDS:
+        if term in found:
+            return mood_theme
+    return None
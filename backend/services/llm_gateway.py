@@ -0,0 +1,180 @@
+"""
+LLM Gateway Service - Shared, non-blocking access to Groq chat completions
+One pooled AsyncGroq client per process, bounded in-flight calls and per-call timeouts
+"""
+
+from groq import AsyncGroq, APITimeoutError
+from config.settings import settings
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import asyncio
+import httpx
+import json
+import time
+
+
+@dataclass
+class LLMResult:
+    """Structured outcome of a single chat completion call"""
+    ok: bool
+    content: Optional[str] = None
+    error: Optional[str] = None
+    model: Optional[str] = None
+    latency_ms: float = 0.0
+    timed_out: bool = False
+
+    def json(self) -> Dict:
+        """Parse the completion content as a JSON object"""
+        if not self.ok or self.content is None:
+            raise ValueError(self.error or "LLM call returned no content")
+        return json.loads(self.content.strip())
+
+
+class LLMGateway:
+    """Async Groq client shared by every AI-backed service"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        default_model: str = settings.LLM_DEFAULT_MODEL,
+        timeout_seconds: float = settings.LLM_TIMEOUT_SECONDS,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        max_connections: int = settings.LLM_MAX_CONNECTIONS,
+    ):
+        self.api_key = api_key or settings.GROQ_API_KEY
+        self.default_model = default_model
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+
+        # Client and semaphore are bound to the event loop that first uses them
+        self._client: Optional[AsyncGroq] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.in_flight = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def _ensure_client(self) -> AsyncGroq:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # A client from another loop can't be reused; release its connection pool
+            previous, self._client = self._client, None
+            if previous is not None:
+                await self._close_client(previous)
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout_seconds,
+            )
+            self._client = AsyncGroq(
+                api_key=self.api_key,
+                http_client=http_client,
+                timeout=self.timeout_seconds,
+                max_retries=1,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    async def _close_client(client: AsyncGroq):
+        try:
+            await client.close()
+        except Exception as e:
+            # Sockets opened on a loop that has since closed can't be shut down cleanly
+            print(f"[LLM] Error closing previous client: {e}")
+
+    async def close(self):
+        """Close the pooled client (shutdown hook)"""
+        if self._client is not None:
+            client, self._client, self._loop = self._client, None, None
+            await self._close_client(client)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        json_mode: bool = False,
+        timeout: Optional[float] = None,
+    ) -> LLMResult:
+        """
+        Run a chat completion without blocking the event loop
+
+        Args:
+            messages: Chat messages in OpenAI format
+            model: Model name (defaults to settings.LLM_DEFAULT_MODEL)
+            max_tokens: Completion token cap
+            temperature: Sampling temperature
+            json_mode: Request a JSON object response
+            timeout: Deadline in seconds, including time spent waiting for a slot
+
+        Returns:
+            LLMResult - never raises for API, network or timeout failures
+        """
+        model = model or self.default_model
+        timeout = timeout or self.timeout_seconds
+
+        if not self.configured:
+            return LLMResult(ok=False, error="Groq API key not configured", model=model)
+
+        client = await self._ensure_client()
+
+        params = {"model": model, "messages": messages}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        if json_mode:
+            params["response_format"] = {"type": "json_object"}
+
+        async def _call():
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    return await client.chat.completions.create(timeout=timeout, **params)
+                finally:
+                    self.in_flight -= 1
+
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(_call(), timeout=timeout)
+            return LLMResult(
+                ok=True,
+                content=response.choices[0].message.content,
+                model=model,
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+        except (asyncio.TimeoutError, APITimeoutError):
+            return LLMResult(
+                ok=False,
+                error=f"LLM call timed out after {timeout}s",
+                model=model,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                timed_out=True,
+            )
+        except Exception as e:
+            return LLMResult(
+                ok=False,
+                error=str(e),
+                model=model,
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+
+
+# Singleton instance
+_gateway = None
+
+def get_llm_gateway() -> LLMGateway:
+    """Get or create singleton gateway instance"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -2,9 +2,11 @@
 Message Moderator Service - 4-tier real-time chat moderation for Support Circles
 """
 
-from groq import Groq
-from config.settings import settings
+from services.llm_gateway import get_llm_gateway
+from services.keyword_engine import crisis_matcher, distress_matcher, get_matcher
+from services.moderation_cache import get_moderation_cache
 from typing import Dict, List
+import collections
 import json
 
 
@@ -12,7 +14,10 @@ class MessageModerator:
     """Classifies support circle messages into SAFE, SOFT_FLAG, HOLD, or BLOCK"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
+        self.cache = get_moderation_cache()
+        # Which pipeline stage decided each message
+        self.stage_counts = collections.Counter()
         self.model = "llama-3.3-70b-versatile"
         
     @staticmethod
@@ -39,7 +44,10 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
         crisis_keywords: List[str] = None
     ) -> Dict:
         """
-        Classify message using AI + keyword fallback
+        Classify message through a tiered pipeline, cheapest stage first:
+        compiled crisis keywords, the verdict cache, then the LLM, with a
+        rule-based fallback if the LLM is unavailable. Messages matching the
+        circle's own crisis keywords skip the cache.
         
         Args:
             message_content: The text of the message to moderate
@@ -50,73 +58,73 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
             Dict containing classification status and reason
         """
         # 1. Immediate local keyword checks for active crisis fallback
-        lower_content = message_content.lower()
-        
-        extreme_crisis_terms = [
-            "suicide", "kill myself", "want to die", "end my life", 
-            "self-harm", "cutting myself", "better off dead", "kill me"
-        ]
-        
-        # Check extreme triggers
-        if any(term in lower_content for term in extreme_crisis_terms):
+        if crisis_matcher().matches(message_content):
+            self.stage_counts["keyword"] += 1
             return {
                 "status": "BLOCK",
                 "reason": "Severe crisis indicators detected in message content."
             }
             
-        # 2. Call AI Moderator
+        # The circle's own crisis keywords always get a fresh review
+        first_match = get_matcher(crisis_keywords).first(message_content)
+
+        # 2. Reuse the verdict for a repeated or near-duplicate message
+        if first_match is None:
+            cached = self.cache.get(message_content, sensitivity_level, crisis_keywords)
+            if cached is not None:
+                self.stage_counts["cache"] += 1
+                return cached
+
+        # 3. Call AI Moderator
         try:
-            if not getattr(settings, 'GROQ_API_KEY', None) and not self.client.api_key:
+            if not self.llm.configured:
                 raise ValueError("Groq API key not configured")
                 
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": f"Circle Sensitivity Level: {sensitivity_level}\nCrisis Keywords (if matched): {', '.join(crisis_keywords or [])}\nMessage to moderate: \"{message_content}\""}
                 ],
                 max_tokens=150,
-                response_format={"type": "json_object"}
+                json_mode=True
             )
             
-            response_text = response.choices[0].message.content.strip()
-            result = json.loads(response_text)
+            result = response.json()
             
             status = result.get("status", "SAFE").upper()
             if status not in ["SAFE", "SOFT_FLAG", "HOLD", "BLOCK"]:
                 status = "SAFE"
                 
-            return {
+            verdict = {
                 "status": status,
                 "reason": result.get("reason", "Approved by automated moderator.")
             }
+            if first_match is None:
+                self.cache.put(message_content, sensitivity_level, crisis_keywords, verdict)
+            self.stage_counts["llm"] += 1
+            return verdict
             
         except Exception as e:
             print(f"Error in MessageModerator: {e}. Running local rule-based fallback.")
             
-            # Local rule-based fallback
-            matched_keywords = []
-            if crisis_keywords:
-                for kw in crisis_keywords:
-                    if kw.lower() in lower_content:
-                        matched_keywords.append(kw)
-                        
-            if matched_keywords:
+            # Local rule-based fallback (the circle's keyword set is compiled once and cached)
+            self.stage_counts["fallback"] += 1
+            if first_match:
                 # If high sensitivity circle, matching keywords goes to HOLD or BLOCK
                 if sensitivity_level == "high":
                     return {
                         "status": "HOLD",
-                        "reason": f"Distress keyword '{matched_keywords[0]}' detected in high-sensitivity circle."
+                        "reason": f"Distress keyword '{first_match.term}' detected in high-sensitivity circle."
                     }
                 else:
                     return {
                         "status": "SOFT_FLAG",
-                        "reason": f"Distress keyword '{matched_keywords[0]}' flagged."
+                        "reason": f"Distress keyword '{first_match.term}' flagged."
                     }
                     
             # Check standard distress terms
-            distress_terms = ["depressed", "anxious", "stress", "lonely", "sad", "fail", "empty", "cry"]
-            if any(term in lower_content for term in distress_terms):
+            if distress_matcher().matches(message_content):
                 return {
                     "status": "SOFT_FLAG",
                     "reason": "Mild distress or emotional vocabulary detected."
@@ -127,6 +135,13 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
                 "reason": "Passed rule-based checks."
             }
 
+    def stats(self) -> Dict:
+        decided = sum(self.stage_counts.values())
+        return {
+            "stages": dict(self.stage_counts),
+            "llm_rate": round(self.stage_counts["llm"] / decided, 4) if decided else 0.0,
+        }
+
 
 # Singleton instance
 _message_moderator = None
@@ -0,0 +1,216 @@
+"""
+Moderation Cache Service - Reuse LLM moderation verdicts for repeated messages
+Support Circle chatter repeats a lot ("same", "+1", "thank you", a pasted rule),
+so verdicts are cached per (normalized content, circle sensitivity, keyword-set
+version) with TTL and LRU eviction. A SimHash tier serves the verdict of a
+near-duplicate (a few words added, removed or reordered) for longer messages,
+but only when it matches exactly the same distress and circle keywords as the
+cached message, so swapping one word for "panic" or "hopeless" is a miss.
+
+Only LLM verdicts are cached. The moderator runs the global crisis check and the
+circle's own crisis_keywords before a lookup and skips the cache on any match,
+so an edit that adds crisis language is never hidden behind a cached verdict.
+"""
+
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from config.settings import settings
+from services.keyword_engine import CRISIS_TERMS, DISTRESS_TERMS, distress_matcher, get_matcher, normalize, term_set_version
+import hashlib
+import time
+
+
+SIMHASH_BITS = 64
+
+# Below this many words a message is only ever matched exactly
+NEAR_DUPLICATE_MIN_TOKENS = 6
+
+# Folded into every key so changing the global term lists drops old verdicts
+GLOBAL_TERMS_VERSION = term_set_version(CRISIS_TERMS + DISTRESS_TERMS)
+
+# (sensitivity level, keyword-set version)
+Scope = Tuple[str, str]
+
+# Distress and circle keyword terms found in a message
+Signals = FrozenSet[str]
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over a message's words (order-insensitive, so reordering is a duplicate)"""
+    weights = [0] * SIMHASH_BITS
+    for feature in tokens:
+        h = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+class ModerationCache:
+    """In-process TTL/LRU verdict cache with a SimHash near-duplicate tier"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.MODERATION_CACHE_TTL_SECONDS,
+        max_entries: int = settings.MODERATION_CACHE_MAX_ENTRIES,
+        near_duplicate_bits: int = settings.MODERATION_NEAR_DUPLICATE_BITS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.near_duplicate_bits = near_duplicate_bits
+        # Pigeonhole: two hashes within d bits agree exactly on at least one of d + 1 bands
+        self.bands = near_duplicate_bits + 1 if near_duplicate_bits > 0 else 0
+        self.band_width = SIMHASH_BITS // self.bands if self.bands else 0
+
+        # (scope, normalized content) -> (expires_at, verdict, simhash or None, signals)
+        self._entries: "OrderedDict[Tuple[Scope, str], Tuple[float, Dict, Optional[int], Signals]]" = OrderedDict()
+        # (scope, band number, band value) -> keys of entries with that band
+        self._band_index: Dict[Tuple[Scope, int, int], Set[Tuple[Scope, str]]] = {}
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def scope(sensitivity_level: str, crisis_keywords: Optional[Iterable[str]]) -> Scope:
+        version = f"{GLOBAL_TERMS_VERSION}:{term_set_version(crisis_keywords)}"
+        return ((sensitivity_level or "medium").lower(), version)
+
+    @staticmethod
+    def signals(normalized: str, crisis_keywords: Optional[Iterable[str]]) -> Signals:
+        """Terms a near-duplicate must share with the cached message to reuse its verdict"""
+        return frozenset(
+            [f"distress:{m.term}" for m in distress_matcher().find_all(normalized)]
+            + [f"circle:{m.term}" for m in get_matcher(crisis_keywords).find_all(normalized)]
+        )
+
+    def _band_keys(self, scope: Scope, fingerprint: int) -> List[Tuple[Scope, int, int]]:
+        mask = (1 << self.band_width) - 1
+        return [
+            (scope, band, (fingerprint >> (band * self.band_width)) & mask)
+            for band in range(self.bands)
+        ]
+
+    def _fingerprint(self, normalized: str) -> Optional[int]:
+        if not self.bands:
+            return None
+        tokens = normalized.split()
+        if len(tokens) < NEAR_DUPLICATE_MIN_TOKENS:
+            return None
+        return simhash(tokens)
+
+    def _remove(self, key: Tuple[Scope, str]):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[2] is None:
+            return
+        for band_key in self._band_keys(key[0], entry[2]):
+            members = self._band_index.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._band_index[band_key]
+
+    def _live(self, key: Tuple[Scope, str]) -> Optional[Tuple[float, Dict, Optional[int], Signals]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _near_duplicate(self, scope: Scope, fingerprint: int, signals: Signals) -> Optional[Dict]:
+        seen = set()
+        for band_key in self._band_keys(scope, fingerprint):
+            for key in list(self._band_index.get(band_key, ())):
+                if key in seen:
+                    continue
+                seen.add(key)
+                entry = self._live(key)
+                if (
+                    entry is not None
+                    and entry[3] == signals
+                    and bin(entry[2] ^ fingerprint).count("1") <= self.near_duplicate_bits
+                ):
+                    return entry[1]
+        return None
+
+    def get(
+        self,
+        message_content: str,
+        sensitivity_level: str,
+        crisis_keywords: Optional[Iterable[str]] = None
+    ) -> Optional[Dict]:
+        """Cached verdict for this message or a near-duplicate of it"""
+        scope = self.scope(sensitivity_level, crisis_keywords)
+        normalized = normalize(message_content)
+
+        entry = self._live((scope, normalized))
+        if entry is not None:
+            self.hits += 1
+            return dict(entry[1])
+
+        fingerprint = self._fingerprint(normalized)
+        if fingerprint is not None:
+            verdict = self._near_duplicate(scope, fingerprint, self.signals(normalized, crisis_keywords))
+            if verdict is not None:
+                self.near_hits += 1
+                return dict(verdict)
+
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        message_content: str,
+        sensitivity_level: str,
+        crisis_keywords: Optional[Iterable[str]],
+        verdict: Dict
+    ):
+        scope = self.scope(sensitivity_level, crisis_keywords)
+        normalized = normalize(message_content)
+        key = (scope, normalized)
+        self._remove(key)
+
+        fingerprint = self._fingerprint(normalized)
+        signals = self.signals(normalized, crisis_keywords) if fingerprint is not None else frozenset()
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(verdict), fingerprint, signals)
+        if fingerprint is not None:
+            for band_key in self._band_keys(scope, fingerprint):
+                self._band_index.setdefault(band_key, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self._band_index.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "near_duplicate_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+_moderation_cache = None
+
+def get_moderation_cache() -> ModerationCache:
+    """Get or create singleton moderation verdict cache"""
+    global _moderation_cache
+    if _moderation_cache is None:
+        _moderation_cache = ModerationCache()
+    return _moderation_cache
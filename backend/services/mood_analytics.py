@@ -0,0 +1,103 @@
+"""
+Mood Analytics Service - Vectorized journal aggregates for offline and in-memory runs
+The NumPy counterpart of the SQL in services/insight_analytics.py: mood, category
+and hour-of-day histograms plus positive-mood streaks (gaps and islands) over a
+student's history, computed with array operations instead of per-entry loops.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+POSITIVE_MOODS = ("hopeful", "calm", "grateful")
+# A streak is a run of at least this many positive entries...
+MIN_STREAK_ENTRIES = 3
+# ...each at most this many calendar days after the previous one
+MAX_STREAK_GAP_DAYS = 1
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def value_counts(values: Sequence[str]) -> Dict[str, int]:
+    """{value: count}, e.g. mood or prompt category frequency"""
+    if not len(values):
+        return {}
+    labels, counts = np.unique(np.asarray(values), return_counts=True)
+    return {str(label): int(count) for label, count in zip(labels, counts)}
+
+
+def epoch_seconds(timestamps: Sequence[datetime]) -> np.ndarray:
+    """Seconds since 1970 for naive UTC datetimes (much faster than np.asarray(..., "datetime64"))"""
+    return np.fromiter(
+        ((ts - EPOCH).total_seconds() for ts in timestamps),
+        dtype=np.float64,
+        count=len(timestamps)
+    ).astype(np.int64)
+
+
+def hour_histogram(timestamps: Sequence[datetime]) -> Dict[int, int]:
+    """{hour of day: entries} for the hours that have any"""
+    return _hour_histogram(epoch_seconds(timestamps))
+
+
+def _hour_histogram(seconds: np.ndarray) -> Dict[int, int]:
+    counts = np.bincount((seconds % SECONDS_PER_DAY) // 3600, minlength=24)
+    return {int(hour): int(counts[hour]) for hour in np.flatnonzero(counts)}
+
+
+def positive_streaks(moods: Sequence[str], timestamps: Sequence[datetime]) -> Optional[List[Dict]]:
+    """
+    Runs of consecutive positive entries (in time order) no more than a day apart
+    Each streak is {"dates": [entry dates], "mood": mood of its last entry}
+    """
+    if len(moods) < MIN_STREAK_ENTRIES:
+        return None
+    return _positive_streaks(np.asarray(moods), epoch_seconds(timestamps))
+
+
+def _positive_streaks(moods: np.ndarray, seconds: np.ndarray) -> Optional[List[Dict]]:
+    order = np.argsort(seconds, kind="stable")
+    days = seconds[order] // SECONDS_PER_DAY
+    mood_values = moods[order]
+    positive = np.isin(mood_values, POSITIVE_MOODS)
+
+    # An entry continues the previous one's island if both are positive and close enough
+    continues = np.zeros(len(mood_values), dtype=bool)
+    continues[1:] = positive[1:] & positive[:-1] & (np.diff(days) <= MAX_STREAK_GAP_DAYS)
+    island = np.cumsum(~continues)
+
+    # Non-positive entries always start (and end) their own island, so positive
+    # entries of one island are contiguous in positive_index
+    positive_index = np.flatnonzero(positive)
+    _, first, sizes = np.unique(island[positive_index], return_index=True, return_counts=True)
+    long_enough = sizes >= MIN_STREAK_ENTRIES
+    if not long_enough.any():
+        return None
+
+    dates = np.datetime_as_string(days.astype("datetime64[D]"))
+    streaks = []
+    for start, size in zip(first[long_enough], sizes[long_enough]):
+        members = positive_index[start:start + size]
+        streaks.append({
+            "dates": dates[members].tolist(),
+            "mood": str(mood_values[members[-1]]),
+        })
+    return streaks
+
+
+def summarize_history(
+    moods: Sequence[str],
+    timestamps: Sequence[datetime],
+    categories: Sequence[str]
+) -> Dict:
+    """Summary in the shape InsightGenerator.generate_from_summary expects"""
+    mood_values = np.asarray(moods)
+    seconds = epoch_seconds(timestamps)
+    return {
+        "entry_count": len(moods),
+        "mood_frequency": value_counts(mood_values),
+        "category_frequency": value_counts(categories),
+        "hour_histogram": _hour_histogram(seconds),
+        "positive_streaks": _positive_streaks(mood_values, seconds) if len(moods) >= MIN_STREAK_ENTRIES else None,
+    }
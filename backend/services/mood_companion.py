@@ -3,7 +3,7 @@ AI Reflection Service - Compassionate companion responses to journal entries
 Uses Groq API for fast, low-latency responses
 """
 
-from groq import Groq
+from services.llm_gateway import get_llm_gateway
 from config.settings import settings
 from typing import Optional
 import json
@@ -13,7 +13,7 @@ class MoodCompanion:
     """AI companion for journal reflection"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
         self.model = "mixtral-8x7b-32768"  # Fast, reliable
     
     @staticmethod
@@ -28,13 +28,14 @@ When a student shares a journal entry:
 - Tone: warm, peer-like, not therapist-clinical.
 - Max response: 120 words."""
     
-    async def generate_reflection(self, mood: str, entry_text: str) -> Optional[str]:
+    async def generate_reflection(self, mood: str, entry_text: str, timeout: Optional[float] = None) -> Optional[str]:
         """
         Generate AI reflection for a journal entry
         
         Args:
             mood: Selected mood (e.g., "calm", "anxious")
             entry_text: The journal entry text
+            timeout: Deadline in seconds for the model call
         
         Returns:
             AI-generated reflection text
@@ -47,16 +48,21 @@ Their journal entry:
 
 Please provide a compassionate reflection."""
             
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=300,
+                timeout=timeout,
             )
             
-            return response.choices[0].message.content
+            if not response.ok:
+                print(f"Error generating reflection: {response.error}")
+                return None
+            
+            return response.content
         
         except Exception as e:
             print(f"Error generating reflection: {e}")
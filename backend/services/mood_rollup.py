@@ -0,0 +1,182 @@
+"""
+Mood Rollup Service - Incremental daily rollups of each student's mood, check-ins and exercise
+The journal, check-in and exercise write paths add an upsert to their own
+transaction, so a day's row always matches what was committed, and readers get
+O(days) lookups instead of scanning journal_entries, check_ins and
+exercise_completions. rebuild_mood_rollups recomputes days from history
+(backfill, or repair after a bulk import; see backfill_mood_rollups.py).
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import Date, Integer, cast, delete, func, literal, null, union_all
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional
+from models.user import User
+from models.journal_entry import JournalEntry, MoodEnum
+from models.checkin import CheckIn
+from models.exercise import ExerciseCompletion
+from models.daily_mood_rollup import DailyMoodRollup
+import uuid
+
+# MoodEnum value -> rollup column
+MOOD_COLUMNS = {mood.value: f"mood_{mood.value}" for mood in MoodEnum}
+
+# Columns the rollup sums; phq2_max and last_activity_at take the greatest instead
+COUNTER_COLUMNS = (
+    "journal_entries", *MOOD_COLUMNS.values(),
+    "checkins", "phq2_sum", "exercises", "exercise_seconds",
+)
+
+
+def _utc_naive(at: datetime) -> datetime:
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+async def _add_activity(db: AsyncSession, user_id: uuid.UUID, at: datetime, **values):
+    """Fold one event into the user's row for its UTC day, in the caller's transaction"""
+    at = _utc_naive(at)
+    table = DailyMoodRollup.__table__
+    stmt = pg_insert(DailyMoodRollup).values(user_id=user_id, day=at.date(), last_activity_at=at, **values)
+    updates = {
+        name: table.c[name] + stmt.excluded[name]
+        for name in values if name in COUNTER_COLUMNS
+    }
+    if "phq2_max" in values:
+        # greatest() skips NULLs, so the first check-in of the day simply sets it
+        updates["phq2_max"] = func.greatest(table.c.phq2_max, stmt.excluded.phq2_max)
+    updates["last_activity_at"] = func.greatest(table.c.last_activity_at, stmt.excluded.last_activity_at)
+    updates["updated_at"] = func.now()
+    await db.execute(stmt.on_conflict_do_update(index_elements=["user_id", "day"], set_=updates))
+
+
+async def record_journal_entry(db: AsyncSession, user_id: uuid.UUID, mood, at: datetime):
+    mood_value = mood.value if hasattr(mood, "value") else str(mood)
+    await _add_activity(db, user_id, at, journal_entries=1, **{MOOD_COLUMNS[mood_value]: 1})
+
+
+async def record_checkin(db: AsyncSession, user_id: uuid.UUID, score: int, at: datetime):
+    await _add_activity(db, user_id, at, checkins=1, phq2_sum=score, phq2_max=score)
+
+
+async def record_exercise(db: AsyncSession, user_id: uuid.UUID, duration_seconds: int, at: datetime):
+    await _add_activity(db, user_id, at, exercises=1, exercise_seconds=duration_seconds or 0)
+
+
+def _zeros(*names: str) -> List:
+    return [literal(0, Integer).label(name) for name in names]
+
+
+def rollup_source_query(start: date, end: date, user_ids: Optional[List[uuid.UUID]] = None):
+    """Per (user_id, day) rollup values for [start, end) computed from the raw tables"""
+    start_at, end_at = _day_start(start), _day_start(end)
+    start_utc, end_utc = start_at.replace(tzinfo=timezone.utc), end_at.replace(tzinfo=timezone.utc)
+    mood_names = list(MOOD_COLUMNS.values())
+
+    journal_day = cast(JournalEntry.created_at, Date)
+    journals = (
+        select(
+            JournalEntry.user_id.label("user_id"),
+            journal_day.label("day"),
+            func.count().label("journal_entries"),
+            *[
+                func.count().filter(JournalEntry.mood_selected == MoodEnum(mood)).label(column)
+                for mood, column in MOOD_COLUMNS.items()
+            ],
+            *_zeros("checkins", "phq2_sum"),
+            cast(null(), Integer).label("phq2_max"),
+            *_zeros("exercises", "exercise_seconds"),
+            func.max(JournalEntry.created_at).label("last_activity_at")
+        )
+        .where(JournalEntry.created_at >= start_at, JournalEntry.created_at < end_at)
+        .group_by(JournalEntry.user_id, journal_day)
+    )
+
+    # check_ins and exercise_completions are keyed by users.id and store timestamptz
+    checkin_at = func.timezone("UTC", CheckIn.created_at)
+    checkins = (
+        select(
+            User.user_id,
+            cast(checkin_at, Date).label("day"),
+            *_zeros("journal_entries", *mood_names),
+            func.count().label("checkins"),
+            func.sum(CheckIn.score).label("phq2_sum"),
+            func.max(CheckIn.score).label("phq2_max"),
+            *_zeros("exercises", "exercise_seconds"),
+            func.max(checkin_at).label("last_activity_at")
+        )
+        .join(User, User.id == CheckIn.user_id)
+        .where(CheckIn.created_at >= start_utc, CheckIn.created_at < end_utc)
+        .group_by(User.user_id, cast(checkin_at, Date))
+    )
+
+    exercise_at = func.timezone("UTC", ExerciseCompletion.completed_at)
+    exercises = (
+        select(
+            User.user_id,
+            cast(exercise_at, Date).label("day"),
+            *_zeros("journal_entries", *mood_names, "checkins", "phq2_sum"),
+            cast(null(), Integer).label("phq2_max"),
+            func.count().label("exercises"),
+            func.coalesce(func.sum(ExerciseCompletion.duration_seconds), 0).label("exercise_seconds"),
+            func.max(exercise_at).label("last_activity_at")
+        )
+        .join(User, User.id == ExerciseCompletion.user_id)
+        .where(ExerciseCompletion.completed_at >= start_utc, ExerciseCompletion.completed_at < end_utc)
+        .group_by(User.user_id, cast(exercise_at, Date))
+    )
+
+    if user_ids is not None:
+        journals = journals.where(JournalEntry.user_id.in_(user_ids))
+        checkins = checkins.where(User.user_id.in_(user_ids))
+        exercises = exercises.where(User.user_id.in_(user_ids))
+
+    activity = union_all(journals, checkins, exercises).subquery()
+    return (
+        select(
+            activity.c.user_id,
+            activity.c.day,
+            *[func.sum(activity.c[name]).label(name) for name in COUNTER_COLUMNS],
+            func.max(activity.c.phq2_max).label("phq2_max"),
+            func.max(activity.c.last_activity_at).label("last_activity_at")
+        )
+        .group_by(activity.c.user_id, activity.c.day)
+    )
+
+
+async def rebuild_mood_rollups(
+    db: AsyncSession,
+    start: date,
+    end: date,
+    user_ids: Optional[Iterable[uuid.UUID]] = None
+) -> int:
+    """
+    Recompute the rollup rows for days in [start, end) from history, in the caller's
+    transaction; returns how many rows were written
+    """
+    user_ids = list(user_ids) if user_ids is not None else None
+    stmt_clear = delete(DailyMoodRollup).where(DailyMoodRollup.day >= start, DailyMoodRollup.day < end)
+    if user_ids is not None:
+        stmt_clear = stmt_clear.where(DailyMoodRollup.user_id.in_(user_ids))
+    await db.execute(stmt_clear)
+
+    columns = ["user_id", "day", *COUNTER_COLUMNS, "phq2_max", "last_activity_at"]
+    stmt = pg_insert(DailyMoodRollup).from_select(columns, rollup_source_query(start, end, user_ids))
+    # A write path may have recreated a row for today since the delete; history wins
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={**{name: stmt.excluded[name] for name in columns[2:]}, "updated_at": func.now()}
+    ).returning(DailyMoodRollup.user_id)
+    res = await db.execute(stmt)
+    return len(res.all())
+
+
+def days_ago(days: int) -> date:
+    return datetime.utcnow().date() - timedelta(days=days)
@@ -0,0 +1,202 @@
+"""
+Presence Service - Shared online/idle/offline state for peer chat identities
+Each worker registers its sockets here and refreshes them with a heartbeat, so
+any worker can answer "who is online in this thread" for sockets held by every
+other worker. In-memory backend for single-process runs, Redis hashes for
+multi-worker/multi-node (selected by WS_BACKPLANE, like the backplane itself).
+
+Per anon_id the store keeps one heartbeat timestamp per socket, the time of the
+identity's last inbound activity and its last-seen time. A socket whose worker
+died stops heartbeating and counts as gone after PRESENCE_TTL_SECONDS; its last
+heartbeat then stands in for the last-seen time.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from config.settings import settings
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import time
+
+
+# How often each worker refreshes its sockets, and when a silent socket counts as gone
+PRESENCE_HEARTBEAT_SECONDS = 30.0
+PRESENCE_TTL_SECONDS = 3 * PRESENCE_HEARTBEAT_SECONDS
+# A connected identity with no inbound frame (message or ping) for this long is idle
+IDLE_AFTER_SECONDS = 120.0
+# How long an identity's presence record (and so its last-seen time) is kept
+LAST_SEEN_RETENTION_SECONDS = 30 * 24 * 3600
+# In-memory backend: last-seen timestamps kept for identities that have gone offline
+LAST_SEEN_HISTORY_SIZE = 10000
+
+SOCKET_FIELD_PREFIX = "socket:"
+ACTIVE_FIELD = "active_at"
+LAST_SEEN_FIELD = "last_seen"
+
+# (status, last_seen) where status is online, idle or offline
+Presence = Tuple[str, Optional[datetime]]
+
+
+def resolve_presence(fields: Dict[str, float], now: float) -> Presence:
+    """Presence from one identity's record: socket heartbeats, activity and last-seen times"""
+    heartbeats = [ts for key, ts in fields.items() if key.startswith(SOCKET_FIELD_PREFIX)]
+    if any(ts > now - PRESENCE_TTL_SECONDS for ts in heartbeats):
+        idle_for = now - fields.get(ACTIVE_FIELD, 0.0)
+        return ("idle" if idle_for > IDLE_AFTER_SECONDS else "online"), None
+    last_seen = max([*heartbeats, fields.get(LAST_SEEN_FIELD, 0.0)])
+    return "offline", (datetime.utcfromtimestamp(last_seen) if last_seen else None)
+
+
+class PresenceStore(ABC):
+    """Interface shared by presence backends; timestamps are Unix seconds"""
+
+    @abstractmethod
+    async def add_socket(self, anon_id: str, connection_id: str):
+        ...
+
+    @abstractmethod
+    async def remove_socket(self, anon_id: str, connection_id: str):
+        ...
+
+    @abstractmethod
+    async def heartbeat(self, sockets: Dict[str, List[str]]):
+        """Refresh every socket this worker holds (anon_id -> connection ids)"""
+        ...
+
+    @abstractmethod
+    async def touch(self, anon_id: str):
+        """Record inbound activity from the identity"""
+        ...
+
+    @abstractmethod
+    async def lookup(self, anon_ids: Iterable[str]) -> Dict[str, Presence]:
+        ...
+
+    async def close(self):
+        pass
+
+
+class InMemoryPresenceStore(PresenceStore):
+    """Single-process backend: the records live in this worker only"""
+
+    def __init__(self):
+        self._records: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+
+    def _record(self, anon_id: str) -> Dict[str, float]:
+        record = self._records.setdefault(anon_id, {})
+        self._records.move_to_end(anon_id)
+        while len(self._records) > LAST_SEEN_HISTORY_SIZE:
+            self._records.popitem(last=False)
+        return record
+
+    async def add_socket(self, anon_id: str, connection_id: str):
+        now = time.time()
+        record = self._record(anon_id)
+        record[SOCKET_FIELD_PREFIX + connection_id] = now
+        record[ACTIVE_FIELD] = now
+
+    async def remove_socket(self, anon_id: str, connection_id: str):
+        record = self._record(anon_id)
+        record.pop(SOCKET_FIELD_PREFIX + connection_id, None)
+        record[LAST_SEEN_FIELD] = time.time()
+
+    async def heartbeat(self, sockets: Dict[str, List[str]]):
+        now = time.time()
+        for anon_id, connection_ids in sockets.items():
+            record = self._records.get(anon_id)
+            if record is not None:
+                for connection_id in connection_ids:
+                    record[SOCKET_FIELD_PREFIX + connection_id] = now
+
+    async def touch(self, anon_id: str):
+        self._record(anon_id)[ACTIVE_FIELD] = time.time()
+
+    async def lookup(self, anon_ids: Iterable[str]) -> Dict[str, Presence]:
+        now = time.time()
+        return {anon_id: resolve_presence(self._records.get(anon_id, {}), now) for anon_id in anon_ids}
+
+
+class RedisPresenceStore(PresenceStore):
+    """Redis backend: one hash per identity, shared by every worker"""
+
+    def __init__(self, url: str = settings.REDIS_URL):
+        self.url = url
+        self._redis = None
+
+    @staticmethod
+    def key(anon_id: str) -> str:
+        return f"presence:{anon_id}"
+
+    async def _client(self):
+        if self._redis is None:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.url, decode_responses=True)
+        return self._redis
+
+    async def _write(self, anon_id: str, fields: Dict[str, float], remove: Iterable[str] = ()):
+        redis = await self._client()
+        pipe = redis.pipeline(transaction=False)
+        key = self.key(anon_id)
+        if remove:
+            pipe.hdel(key, *remove)
+        if fields:
+            pipe.hset(key, mapping=fields)
+        pipe.expire(key, LAST_SEEN_RETENTION_SECONDS)
+        await pipe.execute()
+
+    async def add_socket(self, anon_id: str, connection_id: str):
+        now = time.time()
+        await self._write(anon_id, {SOCKET_FIELD_PREFIX + connection_id: now, ACTIVE_FIELD: now})
+
+    async def remove_socket(self, anon_id: str, connection_id: str):
+        await self._write(anon_id, {LAST_SEEN_FIELD: time.time()}, remove=[SOCKET_FIELD_PREFIX + connection_id])
+
+    async def heartbeat(self, sockets: Dict[str, List[str]]):
+        if not sockets:
+            return
+        now = time.time()
+        redis = await self._client()
+        pipe = redis.pipeline(transaction=False)
+        for anon_id, connection_ids in sockets.items():
+            key = self.key(anon_id)
+            pipe.hset(key, mapping={SOCKET_FIELD_PREFIX + c: now for c in connection_ids})
+            pipe.expire(key, LAST_SEEN_RETENTION_SECONDS)
+        await pipe.execute()
+
+    async def touch(self, anon_id: str):
+        await self._write(anon_id, {ACTIVE_FIELD: time.time()})
+
+    async def lookup(self, anon_ids: Iterable[str]) -> Dict[str, Presence]:
+        anon_ids = list(anon_ids)
+        if not anon_ids:
+            return {}
+        redis = await self._client()
+        pipe = redis.pipeline(transaction=False)
+        for anon_id in anon_ids:
+            pipe.hgetall(self.key(anon_id))
+        records = await pipe.execute()
+        now = time.time()
+        return {
+            anon_id: resolve_presence({k: float(v) for k, v in record.items()}, now)
+            for anon_id, record in zip(anon_ids, records)
+        }
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+# Singleton instance
+_presence_store = None
+
+def get_presence_store() -> PresenceStore:
+    """Get or create the process-wide presence store selected by WS_BACKPLANE"""
+    global _presence_store
+    if _presence_store is None:
+        if settings.WS_BACKPLANE == "redis":
+            _presence_store = RedisPresenceStore(settings.REDIS_URL)
+        else:
+            _presence_store = InMemoryPresenceStore()
+    return _presence_store
@@ -1,107 +1,274 @@
 """
 Background Scheduler Service - Manages weekly insight generation and post-session mood check-ins
-Uses APScheduler's AsyncIOScheduler to align with FastAPI's async execution loop
+Uses APScheduler's AsyncIOScheduler only for the weekly cron, which enqueues a durable
+job; the work itself runs as background jobs (see services/job_queue.py). The weekly
+digest runs as a chain of chunk jobs checkpointed in weekly_insight_runs.
 """
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import asyncio
 import uuid
-import json
 
 from db.session import SessionLocal
 from models.user import User
-from models.journal_entry import JournalEntry
-from models.weekly_insight import WeeklyInsight
+from models.weekly_insight import WeeklyInsight, WeeklyInsightRun
 from models.counselling_session import CounsellingSession, SessionStatusEnum
 from models.notification import Notification
+from services.insight_analytics import count_eligible_students, fetch_insight_summaries, lookback_start
 from services.insight_generator import get_insight_generator
+from services.exercise_streaks import enqueue_exercise_streak_repair
+from services.job_queue import enqueue_job, enqueue_job_purge, job_handler, notify_job_worker
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config.settings import settings
 
 # Initialize AsyncIOScheduler
 scheduler = AsyncIOScheduler()
 
+WEEKLY_INSIGHTS_JOB = "weekly_insights_generation"
+USER_WEEKLY_INSIGHT_JOB = "user_weekly_insight"
+POST_SESSION_MOOD_CHECK_JOB = "post_session_mood_check"
 
-async def run_weekly_insights_generation():
+# Delay between a session ending and the student's mood check-in prompt
+MOOD_CHECK_DELAY = timedelta(minutes=30)
+
+
+def current_week_start():
+    today = datetime.utcnow().date()
+    return today - timedelta(days=today.weekday())
+
+
+def weekly_insight_card(user_id, week_start, insights_data: dict) -> WeeklyInsight:
+    return WeeklyInsight(
+        insight_id=uuid.uuid4(),
+        user_id=user_id,
+        week_start=week_start,
+        observation=insights_data["observation"],
+        reframe=insights_data["reframe"],
+        micro_action=insights_data["micro_action"],
+        mood_frequency_data=insights_data.get("mood_frequency_data"),
+        trigger_categories=insights_data.get("trigger_categories"),
+        time_of_day_pattern=insights_data.get("time_of_day_pattern"),
+        positive_streaks=insights_data.get("positive_streaks"),
+        generated_at=datetime.utcnow()
+    )
+
+
+async def generate_weekly_insight_for_user(db: AsyncSession, user_id, week_start):
+    """
+    Build (but do not commit) a user's insight card for the week
+    Returns None if one already exists or there are fewer than 3 entries in 30 days
     """
-    Weekly digest generation - Runs every Sunday at 8 PM local time
-    Generates weekly insights cards for all student users
+    summaries = await fetch_insight_summaries(db, week_start, lookback_start(), user_ids=[user_id])
+    if not summaries:
+        return None
+
+    insights_data = await get_insight_generator().generate_from_summary(summaries[0])
+    if not insights_data:
+        return None
+
+    weekly_card = weekly_insight_card(user_id, week_start, insights_data)
+    db.add(weekly_card)
+    return weekly_card
+
+
+async def generate_insights_concurrently(summaries: List[Dict]) -> List[Optional[Dict]]:
+    """LLM insight for each summary, at most INSIGHTS_LLM_CONCURRENCY calls in flight (None where it failed)"""
+    generator = get_insight_generator()
+    limit = asyncio.Semaphore(settings.INSIGHTS_LLM_CONCURRENCY)
+
+    async def generate(summary: Dict) -> Optional[Dict]:
+        async with limit:
+            return await generator.generate_from_summary(summary)
+
+    return await asyncio.gather(*(generate(summary) for summary in summaries))
+
+
+def weekly_insight_run_progress(run: WeeklyInsightRun) -> Dict:
+    """Per-run progress metrics (rate in students per second, ETA in seconds)"""
+    end = run.finished_at or datetime.utcnow()
+    elapsed = max((end - run.started_at).total_seconds(), 0.0)
+    rate = run.processed / elapsed if elapsed else 0.0
+    remaining = max(run.eligible_students - run.processed, 0)
+    return {
+        "week_start": run.week_start.isoformat(),
+        "status": run.status,
+        "eligible_students": run.eligible_students,
+        "processed": run.processed,
+        "generated": run.generated,
+        "failed": run.failed,
+        "chunks": run.chunks,
+        "elapsed_seconds": round(elapsed, 1),
+        "students_per_second": round(rate, 2),
+        "eta_seconds": round(remaining / rate) if rate and run.status == "running" else None,
+    }
+
+
+async def _lock_weekly_insight_run(db: AsyncSession, week_start, skip_locked: bool = False) -> Optional[WeeklyInsightRun]:
+    stmt_run = (
+        select(WeeklyInsightRun)
+        .where(WeeklyInsightRun.week_start == week_start)
+        .with_for_update(skip_locked=skip_locked)
+    )
+    res_run = await db.execute(stmt_run)
+    return res_run.scalars().first()
+
+
+async def _claim_weekly_insights_chunk(week_start):
     """
-    print("[SCHEDULER] Starting weekly insights generation...")
+    Take the run's chunk claim and read the next chunk's summaries, in one short transaction
+    Returns (claimed_at, summaries), or None if there is nothing for this worker to do
+    """
+    async with SessionLocal() as db:
+        await db.execute(
+            pg_insert(WeeklyInsightRun)
+            .values(week_start=week_start, status="running", eligible_students=0,
+                    processed=0, generated=0, failed=0, chunks=0)
+            .on_conflict_do_nothing(index_elements=["week_start"])
+        )
+        run = await _lock_weekly_insight_run(db, week_start, skip_locked=True)
+        now = datetime.utcnow()
+        if run is None or run.status == "completed":
+            await db.rollback()
+            return None
+        if run.claimed_at is not None and run.claimed_at > now - timedelta(seconds=settings.JOB_LEASE_SECONDS):
+            print(f"[SCHEDULER] Weekly insights {week_start} chunk already running elsewhere.")
+            await db.rollback()
+            return None
+
+        since = lookback_start()
+        if run.chunks == 0:
+            run.eligible_students = await count_eligible_students(db, week_start, since)
+            print(f"[SCHEDULER] Starting weekly insights generation for {run.eligible_students} students...")
+
+        summaries = await fetch_insight_summaries(
+            db,
+            week_start,
+            since,
+            after_user_id=run.last_user_id,
+            limit=settings.INSIGHTS_CHUNK_SIZE
+        )
+        if not summaries:
+            run.status = "completed"
+            run.claimed_at = None
+            run.finished_at = run.updated_at = now
+            await db.commit()
+            print(f"[SCHEDULER] Weekly insights generation completed: {weekly_insight_run_progress(run)}")
+            return None
+
+        run.claimed_at = now
+        await db.commit()
+        return now, summaries
+
+
+async def _release_weekly_insights_claim(week_start, claimed_at):
+    """Drop our claim after a failure so the job's retry can take the chunk straight away"""
+    async with SessionLocal() as db:
+        run = await _lock_weekly_insight_run(db, week_start)
+        if run is not None and run.claimed_at == claimed_at:
+            run.claimed_at = None
+            await db.commit()
+
+
+async def run_weekly_insights_chunk(week_start) -> bool:
+    """
+    Weekly digest generation - one chunk of INSIGHTS_CHUNK_SIZE students
+    1. A short transaction claims the run's next chunk and aggregates its students' entries
+    2. The LLM calls run concurrently with no transaction or row lock held
+    3. A second short transaction commits the cards, the advanced checkpoint and the
+       job for the next chunk together, if the claim is still ours
+    A crash loses at most this chunk, and its retry picks up from the same checkpoint.
+    Returns True if another chunk was queued
+    """
+    claim = await _claim_weekly_insights_chunk(week_start)
+    if claim is None:
+        return False
+    claimed_at, summaries = claim
+
+    try:
+        results = await generate_insights_concurrently(summaries)
+    except Exception as e:
+        print(f"[SCHEDULER] Error in weekly insights task: {e}")
+        await _release_weekly_insights_claim(week_start, claimed_at)
+        raise
+
     async with SessionLocal() as db:
         try:
-            # Fetch all student users
-            stmt_students = select(User).where(User.role == "student")
-            res_students = await db.execute(stmt_students)
-            students = res_students.scalars().all()
-            
-            generator = get_insight_generator()
-            today = datetime.utcnow().date()
-            week_start = today - timedelta(days=today.weekday())
-            
-            for student in students:
-                try:
-                    # Check if weekly insight already exists
-                    stmt_exist = select(WeeklyInsight).where(
-                        WeeklyInsight.user_id == student.user_id,
-                        WeeklyInsight.week_start == week_start
-                    )
-                    res_exist = await db.execute(stmt_exist)
-                    if res_exist.scalars().first():
-                        continue
-                        
-                    # Fetch student's journal entries from last 30 days
-                    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-                    stmt_entries = (
-                        select(JournalEntry)
-                        .where(
-                            JournalEntry.user_id == student.user_id,
-                            JournalEntry.created_at >= thirty_days_ago
-                        )
-                    )
-                    res_entries = await db.execute(stmt_entries)
-                    entries = res_entries.scalars().all()
-                    
-                    if len(entries) < 3:
-                        # Need at least 3 entries to generate meaningful insights
-                        continue
-                        
-                    moods = [entry.mood_selected.value for entry in entries]
-                    timestamps = [entry.created_at for entry in entries]
-                    categories = [entry.prompt_category.value for entry in entries]
-                    
-                    insights_data = await generator.generate_weekly_insights(
-                        moods=moods,
-                        timestamps=timestamps,
-                        categories=categories
-                    )
-                    
-                    if insights_data:
-                        weekly_card = WeeklyInsight(
-                            insight_id=uuid.uuid4(),
-                            user_id=student.user_id,
-                            week_start=week_start,
-                            observation=insights_data["observation"],
-                            reframe=insights_data["reframe"],
-                            micro_action=insights_data["micro_action"],
-                            mood_frequency_data=insights_data.get("mood_frequency_data"),
-                            trigger_categories=insights_data.get("trigger_categories"),
-                            time_of_day_pattern=insights_data.get("time_of_day_pattern"),
-                            positive_streaks=insights_data.get("positive_streaks"),
-                            generated_at=datetime.utcnow()
-                        )
-                        db.add(weekly_card)
-                        
-                except Exception as se:
-                    print(f"[SCHEDULER] Failed generating weekly insight for user {student.user_id}: {se}")
-                    
+            run = await _lock_weekly_insight_run(db, week_start)
+            if run is None or run.claimed_at != claimed_at:
+                # Our claim expired and another worker took the chunk over
+                print(f"[SCHEDULER] Weekly insights {week_start} claim lost; discarding this chunk.")
+                await db.rollback()
+                return False
+
+            generated = 0
+            for summary, insights_data in zip(summaries, results):
+                if insights_data:
+                    db.add(weekly_insight_card(summary["user_id"], week_start, insights_data))
+                    generated += 1
+
+            run.processed += len(summaries)
+            run.generated += generated
+            run.failed += len(summaries) - generated
+            run.chunks += 1
+            run.last_user_id = summaries[-1]["user_id"]
+            run.claimed_at = None
+            run.updated_at = datetime.utcnow()
+
+            await enqueue_job(
+                db,
+                WEEKLY_INSIGHTS_JOB,
+                {"week_start": week_start.isoformat()},
+                idempotency_key=f"weekly_insights:{week_start.isoformat()}:{run.chunks}"
+            )
             await db.commit()
-            print("[SCHEDULER] Weekly insights generation completed successfully.")
-            
+
+            progress = weekly_insight_run_progress(run)
+            print(
+                f"[SCHEDULER] Weekly insights {progress['week_start']}: "
+                f"{progress['processed']}/{progress['eligible_students']} students "
+                f"({progress['generated']} generated, {progress['failed']} failed), "
+                f"{progress['students_per_second']}/s, ETA {progress['eta_seconds']}s"
+            )
         except Exception as e:
             await db.rollback()
             print(f"[SCHEDULER] Error in weekly insights task: {e}")
+            await _release_weekly_insights_claim(week_start, claimed_at)
+            raise
+
+    notify_job_worker()
+    return True
+
+
+@job_handler(WEEKLY_INSIGHTS_JOB, concurrency=1)
+async def weekly_insights_job(payload: dict):
+    await run_weekly_insights_chunk(datetime.strptime(payload["week_start"], "%Y-%m-%d").date())
+
+
+@job_handler(USER_WEEKLY_INSIGHT_JOB, concurrency=4)
+async def user_weekly_insight_job(payload: dict):
+    week_start = datetime.strptime(payload["week_start"], "%Y-%m-%d").date()
+    async with SessionLocal() as db:
+        await generate_weekly_insight_for_user(db, uuid.UUID(payload["user_id"]), week_start)
+        await db.commit()
+
+
+async def enqueue_weekly_insights():
+    """Cron entry: queue this week's digest once, however many processes run the cron"""
+    week_start = current_week_start()
+    async with SessionLocal() as db:
+        await enqueue_job(
+            db,
+            WEEKLY_INSIGHTS_JOB,
+            {"week_start": week_start.isoformat()},
+            idempotency_key=f"weekly_insights:{week_start.isoformat()}"
+        )
+        await db.commit()
+    notify_job_worker()
 
 
 async def send_post_session_mood_check(session_id_str: str):
@@ -149,6 +316,23 @@ async def send_post_session_mood_check(session_id_str: str):
         except Exception as e:
             await db.rollback()
             print(f"[SCHEDULER] Error sending post-session check-in: {e}")
+            raise
+
+
+@job_handler(POST_SESSION_MOOD_CHECK_JOB, concurrency=4)
+async def post_session_mood_check_job(payload: dict):
+    await send_post_session_mood_check(payload["session_id"])
+
+
+async def schedule_post_session_mood_check(db: AsyncSession, session_id):
+    """Queue the check-in in the caller's transaction, to run MOOD_CHECK_DELAY from now"""
+    return await enqueue_job(
+        db,
+        POST_SESSION_MOOD_CHECK_JOB,
+        {"session_id": str(session_id)},
+        run_at=datetime.utcnow() + MOOD_CHECK_DELAY,
+        idempotency_key=f"mood_check:{session_id}"
+    )
 
 
 def start_scheduler():
@@ -159,9 +343,23 @@ def start_scheduler():
         scheduler.start()
         # Schedule the weekly insight task for every Sunday at 8:00 PM local time (20:00)
         scheduler.add_job(
-            run_weekly_insights_generation,
+            enqueue_weekly_insights,
             trigger=CronTrigger(day_of_week="sun", hour=20, minute=0),
             id="weekly_insights_generation",
             replace_existing=True
         )
+        # Nightly rebuild of exercise streaks from history, to repair any drift
+        scheduler.add_job(
+            enqueue_exercise_streak_repair,
+            trigger=CronTrigger(hour=3, minute=30),
+            id="exercise_streak_repair",
+            replace_existing=True
+        )
+        # Nightly purge of finished background_jobs rows past their retention
+        scheduler.add_job(
+            enqueue_job_purge,
+            trigger=CronTrigger(hour=4, minute=0),
+            id="purge_finished_jobs",
+            replace_existing=True
+        )
         print("[SCHEDULER] Background scheduler started and Sunday 8PM cron scheduled.")
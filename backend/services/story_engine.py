@@ -2,7 +2,8 @@
 Story Engine Service - AI-powered processing of anonymous shared stories
 """
 
-from groq import Groq
+from services.llm_gateway import get_llm_gateway
+from services.keyword_engine import crisis_matcher, detect_mood
 from config.settings import settings
 from typing import Dict
 import json
@@ -13,7 +14,7 @@ class StoryEngine:
     """Handles safety moderation, 2nd-person reformatting, and metadata extraction for shared stories"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY if hasattr(settings, 'GROQ_API_KEY') else None)
+        self.llm = get_llm_gateway()
         self.model = "llama-3.3-70b-versatile"
         
     @staticmethod
@@ -59,21 +60,20 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
         """
         try:
             # Check if API key exists
-            if not getattr(settings, 'GROQ_API_KEY', None) and not self.client.api_key:
+            if not self.llm.configured:
                 raise ValueError("Groq API key not configured")
                 
-            response = self.client.chat.completions.create(
+            response = await self.llm.complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": self.get_system_prompt()},
                     {"role": "user", "content": f"Process the following journal entry:\n\n{entry_text}"}
                 ],
                 max_tokens=1000,
-                response_format={"type": "json_object"}
+                json_mode=True
             )
             
-            response_text = response.choices[0].message.content.strip()
-            result = json.loads(response_text)
+            result = response.json()
             
             # Extract and validate fields
             is_safe = result.get("is_safe", True)
@@ -106,12 +106,7 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
     def _run_fallback(self, entry_text: str) -> Dict:
         """Rule-based fallback for moderation, reformatting, and metadata extraction"""
         # 1. Simple crisis keyword check
-        crisis_words = [
-            "suicide", "kill myself", "end my life", "slit my wrists", "want to die",
-            "hanging myself", "overdose", "cutting myself"
-        ]
-        text_lower = entry_text.lower()
-        if any(word in text_lower for word in crisis_words):
+        if crisis_matcher().matches(entry_text):
             return {
                 "is_safe": False,
                 "reformatted_text": None,
@@ -152,21 +147,9 @@ Respond ONLY with a JSON object in this format with no markdown wrappers:
         mood = "Contemplative"
         theme = "general reflection"
         
-        moods_mapping = {
-            "stressed": ("Stressed", "academic pressure"),
-            "anxious": ("Anxious", "anxiety"),
-            "sad": ("Sad", "loneliness"),
-            "lonely": ("Lonely", "isolation"),
-            "tired": ("Tired", "burnout"),
-            "hopeful": ("Hopeful", "future plans"),
-            "excited": ("Excited", "positive change")
-        }
-        
-        for keyword, (m, t) in moods_mapping.items():
-            if keyword in text_lower:
-                mood = m
-                theme = t
-                break
+        detected = detect_mood(entry_text)
+        if detected:
+            mood, theme = detected
                 
         hook = "A quiet moment shared in anonymity."
         if mood == "Stressed":
@@ -0,0 +1,171 @@
+"""
+Story Index Service - Feature extraction and inverted index for the story feed
+Features are computed once when a story is shared and stored as index keys
+("mood:sad", "role:burnout", "role_exact:burnout", "term:exam"), so the feed
+only scores a bounded candidate set instead of re-tokenizing every story.
+Postings carry the story's published_at, so a lookup reads at most the newest
+MAX_POSTINGS_PER_KEY stories of each key off the (key, published_at) index.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import String, column, delete, desc, func, true, values
+from models.shared_story import SharedStory, StoryIndexTerm
+from typing import Dict, Iterable, List, Optional, Set
+import collections
+import re
+
+
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]{3,15}\b')
+
+# Too common to say anything about what a story is about
+STOPWORDS = {
+    "the", "and", "for", "that", "this", "with", "was", "but", "are", "not", "you",
+    "have", "had", "has", "just", "all", "its", "it's", "can", "from", "they", "them",
+    "what", "when", "been", "were", "about", "would", "could", "there", "their", "then",
+    "than", "into", "out", "our", "his", "her", "she", "him", "who", "how", "too",
+    "very", "really", "some", "because", "feel", "felt", "like", "today",
+}
+
+# Student focus areas and the words that signal them in a story
+ROLE_KEYWORDS = {
+    "burnout": ["exhaust", "tired", "burnout", "overwhelmed", "drain", "sleep", "pressure"],
+    "exam season": ["exam", "study", "midterm", "test", "grade", "fail", "stress", "pressure", "anxious"],
+    "placement prep": ["interview", "job", "career", "resume", "intern", "prep", "future", "placement"],
+    "relationship stress": ["breakup", "fight", "friend", "relationship", "love", "lonely", "heartbroken", "argument"],
+    "identity & belonging": ["identity", "belong", "fit in", "imposter", "lonely", "who am i", "diverse", "accept"],
+    "first-year": ["transition", "dorm", "new", "freshman", "campus", "home", "adjust", "lost"]
+}
+
+# Cap on term keys per story so one long story cannot bloat the index; the most
+# frequent terms are kept (ties go to the earliest in the story)
+MAX_TERMS_PER_STORY = 64
+
+# Postings read per query key, newest first; common keys ("mood:sad") would
+# otherwise pull in every story on the platform
+MAX_POSTINGS_PER_KEY = 500
+
+
+def tokenize(text: Optional[str]) -> Set[str]:
+    """Lowercased content words of 3-15 letters"""
+    if not text:
+        return set()
+    return {w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS}
+
+
+def top_terms(text: Optional[str], limit: int = MAX_TERMS_PER_STORY) -> List[str]:
+    """A story's `limit` most frequent content words, earliest first among equals"""
+    if not text:
+        return []
+    words = [w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+    counts = collections.Counter(words)
+    # Counter preserves first-occurrence order and sorted() is stable
+    return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+
+def normalize_mood(mood: Optional[str]) -> str:
+    return (mood or "").strip().lower()
+
+
+def build_feature_keys(
+    excerpt: Optional[str],
+    mood: Optional[str],
+    theme: Optional[str] = None,
+    resonance_hook: Optional[str] = None
+) -> List[str]:
+    """Index keys for a story: its mood bucket, matching student roles and content terms"""
+    keys = []
+
+    story_mood = normalize_mood(mood)
+    if story_mood:
+        keys.append(f"mood:{story_mood}")
+
+    role_text = f"{(theme or '').lower()} {(excerpt or '').lower()}"
+    for role, words in ROLE_KEYWORDS.items():
+        if role in role_text:
+            keys.append(f"role_exact:{role}")
+        if any(word in role_text for word in words):
+            keys.append(f"role:{role}")
+
+    terms = top_terms(f"{(theme or '')} {(resonance_hook or '')} {excerpt or ''}")
+    keys.extend(f"term:{t}" for t in terms)
+    return keys
+
+
+def index_story(db: AsyncSession, story: SharedStory):
+    """Compute and attach a new story's features and postings (caller commits)"""
+    story.feature_keys = build_feature_keys(story.excerpt, story.mood, story.theme, story.resonance_hook)
+    db.add_all(
+        StoryIndexTerm(key=key, story_id=story.story_id, published_at=story.published_at)
+        for key in story.feature_keys
+    )
+
+
+async def unindex_story(db: AsyncSession, story: SharedStory):
+    """Drop a removed story's postings so they stop taking per-key slots (caller commits)"""
+    await db.execute(delete(StoryIndexTerm).where(StoryIndexTerm.story_id == story.story_id))
+
+
+def query_keys(user_moods: Iterable[str], user_role: Optional[str], user_words: Iterable[str]) -> List[str]:
+    """Index keys describing what a reader should be matched against"""
+    keys = {f"mood:{normalize_mood(m)}" for m in user_moods if m}
+    if user_role:
+        keys.add(f"role:{user_role}")
+        keys.add(f"role_exact:{user_role}")
+    keys.update(f"term:{w}" for w in user_words if w not in STOPWORDS)
+    return sorted(keys)
+
+
+async def fetch_candidates(
+    db: AsyncSession,
+    keys: List[str],
+    limit: int,
+    recent_limit: int
+) -> List[SharedStory]:
+    """
+    Bounded candidate set for the feed
+    - Up to `limit` active stories sharing the most index keys with the reader,
+      counted over the newest MAX_POSTINGS_PER_KEY postings of each key
+    - Plus the `recent_limit` newest active stories, so wildcards stay available
+    """
+    candidates: Dict = {}
+
+    if keys:
+        reader_keys = values(column("key", String), name="reader_keys").data([(key,) for key in keys])
+        # LATERAL top-N per key off the (key, published_at) index
+        postings = (
+            select(StoryIndexTerm.story_id)
+            .where(StoryIndexTerm.key == reader_keys.c.key)
+            .order_by(desc(StoryIndexTerm.published_at))
+            .limit(MAX_POSTINGS_PER_KEY)
+            .lateral("postings")
+        )
+        hits = (
+            select(postings.c.story_id, func.count().label("hits"))
+            .select_from(reader_keys)
+            .join(postings, true())
+            .group_by(postings.c.story_id)
+            .subquery()
+        )
+        stmt = (
+            select(SharedStory)
+            .join(hits, hits.c.story_id == SharedStory.story_id)
+            .where(SharedStory.active == True)
+            .order_by(desc(hits.c.hits), desc(SharedStory.published_at))
+            .limit(limit)
+        )
+        res = await db.execute(stmt)
+        for story in res.scalars().all():
+            candidates[story.story_id] = story
+
+    stmt_recent = (
+        select(SharedStory)
+        .where(SharedStory.active == True)
+        .order_by(desc(SharedStory.published_at))
+        .limit(recent_limit)
+    )
+    res_recent = await db.execute(stmt_recent)
+    for story in res_recent.scalars().all():
+        candidates.setdefault(story.story_id, story)
+
+    return list(candidates.values())
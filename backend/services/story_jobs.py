@@ -0,0 +1,72 @@
+"""
+Story Jobs Service - Background Story Engine processing for anonymously shared entries
+The share endpoint marks the entry shared and queues this job; the job runs the
+Story Engine pipeline, then publishes the story or, if the entry is unsafe to
+share, un-shares it and leaves the author a notification. Safe to re-run.
+"""
+
+from sqlalchemy.future import select
+from datetime import datetime
+from db.session import SessionLocal
+from models.journal_entry import JournalEntry
+from models.shared_story import SharedStory
+from models.notification import Notification
+from core.encryption import decrypt_string
+from services.job_queue import job_handler
+from services.story_engine import get_story_engine
+from services.story_index import index_story
+import uuid
+
+
+SHARE_STORY_JOB = "share_story"
+
+DEFAULT_REJECTION_MESSAGE = "This entry is a bit too personal to share — your words are safe with us."
+
+
+# Kept after finishing: the share_story:<entry_id> key stops a turned-down entry being re-shared
+@job_handler(SHARE_STORY_JOB, concurrency=4, retain_finished=True)
+async def process_shared_entry(payload: dict):
+    entry_id = uuid.UUID(payload["entry_id"])
+
+    async with SessionLocal() as db:
+        stmt_story = select(SharedStory.story_id).where(SharedStory.journal_entry_id == entry_id)
+        res_story = await db.execute(stmt_story)
+        if res_story.scalars().first() is not None:
+            return
+
+        entry = await db.get(JournalEntry, entry_id)
+        if entry is None or not entry.shared_anonymously:
+            return
+
+        # Process through Story Engine 3-step pipeline
+        decrypted_text = decrypt_string(entry.entry_text)
+        engine_result = await get_story_engine().process_entry(decrypted_text)
+
+        if not engine_result["is_safe"]:
+            entry.shared_anonymously = False
+            db.add(Notification(
+                user_id=payload["user_id"],
+                message=engine_result.get("rejection_message") or DEFAULT_REJECTION_MESSAGE,
+                is_read=False,
+                created_at=datetime.utcnow()
+            ))
+            await db.commit()
+            return
+
+        # Create story storing the reformatted text in excerpt
+        reformatted_text = engine_result.get("reformatted_text") or decrypted_text
+        story = SharedStory(
+            story_id=uuid.uuid4(),
+            journal_entry_id=entry.entry_id,
+            author_anon_id=payload["author_anon_id"],
+            excerpt=reformatted_text,
+            mood=engine_result.get("mood") or entry.mood_selected.value,
+            theme=engine_result.get("theme"),
+            resonance_hook=engine_result.get("resonance_hook"),
+            moderated=True,
+            published_at=datetime.utcnow()
+        )
+        db.add(story)
+        # Features and inverted-index postings are computed once, here
+        index_story(db, story)
+        await db.commit()
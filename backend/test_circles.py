@@ -7,10 +7,17 @@ Verifies CircleGenerator, MessageModerator, and CircleRecommender logic.
 import asyncio
 from services.circle_generator import get_circle_generator
 from services.message_moderator import get_message_moderator
-from services.circle_recommender import get_circle_recommender
+from services.circle_recommender import get_circle_recommender, rank_circles
+from services.keyword_engine import SubstringIndex, crisis_matcher, distress_matcher, get_matcher
+from services.affect_profile import AffectProfile
+from services.moderation_cache import ModerationCache
+from services.story_index import tokenize
 from models.user import User
 from models.circle import Circle
-from datetime import datetime
+from datetime import datetime, timedelta
+import collections
+import random
+import uuid
 
 async def test_circle_generator():
     print("Testing CircleGenerator...")
@@ -35,6 +42,85 @@ async def test_circle_generator():
     print(f"Sensitivity: {preview['sensitivity_level']}")
     print()
 
+async def test_keyword_engine():
+    print("Testing KeywordEngine...")
+    text = "I w4nt to DIE, maybe self-harm. Skills meetup later"
+    spans = [(m.term, text[m.start:m.end]) for m in crisis_matcher().find_all(text)]
+    assert spans == [("want to die", "w4nt to DIE"), ("self harm*", "self-harm")], spans
+
+    # Whole words only: "kill me" must not fire inside "Skills meetup"
+    assert not crisis_matcher().matches("Skills meetup later")
+    # Prefix terms cover inflections
+    assert [m.term for m in distress_matcher().find_all("crying after I failed")] == ["cry*", "fail*"]
+    # Per-circle term sets are compiled once
+    assert get_matcher(["give up", "hopeless"]) is get_matcher(["hopeless", "give up"])
+
+    print("[SUCCESS] KeywordEngine matches normalized whole words and returns original spans.")
+    print()
+
+# The substring lists the moderator and story fallback blocked on before the keyword engine
+LEGACY_CRISIS_TERMS = [
+    "suicide", "kill myself", "want to die", "end my life", "self-harm", "cutting myself",
+    "better off dead", "kill me", "slit my wrists", "hanging myself", "overdose",
+]
+
+LEGACY_BLOCKED_MESSAGES = [
+    "thinking about suicides lately",
+    "I keep self-harming when it gets bad",
+    "self-harm again last night",
+    "I overdosed once before",
+    "maybe an overdose would fix it",
+    "some days I want to die",
+    "I will end my life",
+    "everyone would be better off dead without me",
+    "just kill me now",
+    "I want to kill myself",
+    "cutting myself helps",
+    "I thought about slit my wrists",
+    "hanging myself from the door",
+    "SUICIDE.",
+]
+
+async def test_crisis_terms_cover_legacy():
+    print("Testing crisis terms against the legacy substring checks...")
+    for message in LEGACY_BLOCKED_MESSAGES:
+        assert any(term in message.lower() for term in LEGACY_CRISIS_TERMS), message
+        assert crisis_matcher().matches(message), f"no longer blocked: {message!r}"
+    for term in LEGACY_CRISIS_TERMS:
+        assert crisis_matcher().matches(f"honestly {term} lately"), term
+
+    print(f"[SUCCESS] Every legacy-blocked phrase ({len(LEGACY_BLOCKED_MESSAGES)} messages) is still blocked.")
+    print()
+
+async def test_moderation_cache():
+    print("Testing ModerationCache...")
+    cache = ModerationCache(ttl_seconds=60, max_entries=100, near_duplicate_bits=6)
+    keywords = ["failing everything", "give up"]
+    rule = "Please remember to be kind to each other in this circle and keep names private"
+    cache.put("Thank you!", "medium", keywords, {"status": "SAFE", "reason": "Gratitude"})
+    cache.put(rule, "medium", keywords, {"status": "SAFE", "reason": "Circle rule"})
+
+    assert cache.get("thank   you", "medium", keywords)["reason"] == "Gratitude"
+    # Sensitivity and keyword set are part of the key
+    assert cache.get("thank you", "high", keywords) is None
+    assert cache.get("thank you", "medium", ["hopeless"]) is None
+    # Trivially edited copy of a longer message reuses the verdict
+    assert cache.get(rule.replace("kind", "nice"), "medium", keywords)["reason"] == "Circle rule"
+    assert cache.get("The exam tomorrow is going to be hard and I have not slept", "medium", keywords) is None
+
+    # A one-word edit that adds distress or circle keyword language is not a duplicate
+    circle_keywords = ["panic", "give up"]
+    update = "Our study group met again today and we finally worked through the last chapter together"
+    cache.put(update, "high", circle_keywords, {"status": "SAFE", "reason": "Study update"})
+    for word in ("panic", "hopeless", "worthless"):
+        edited = update.replace("finally", word)
+        assert cache.get(edited, "high", circle_keywords) is None, edited
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["near_duplicate_hits"] == 1 and stats["misses"] == 6, stats
+    print(f"[SUCCESS] ModerationCache served exact and near-duplicate verdicts (hit rate {stats['hit_rate']}).")
+    print()
+
 async def test_message_moderator():
     print("Testing MessageModerator...")
     moderator = get_message_moderator()
@@ -75,13 +161,151 @@ async def test_message_moderator():
     print(f"HOLD result: {res_hold['status']} - {res_hold['reason']}")
     assert res_hold["status"] == "HOLD"
     
+    # 5. A circle keyword bypasses the verdict cache even for an exact repeat
+    keyword_message = "Honestly I feel so much panic before every single lecture this whole semester now"
+    moderator.cache.put(keyword_message, "high", ["panic"], {"status": "SAFE", "reason": "Stale cached verdict"})
+    cache_hits = moderator.stage_counts["cache"]
+    res_keyword = await moderator.moderate_message(
+        message_content=keyword_message,
+        sensitivity_level="high",
+        crisis_keywords=["panic"]
+    )
+    print(f"Circle keyword result: {res_keyword['status']} - {res_keyword['reason']}")
+    assert res_keyword["reason"] != "Stale cached verdict"
+    assert moderator.stage_counts["cache"] == cache_hits
+
     print("[SUCCESS] MessageModerator successfully classified all 4 safety tiers.")
     print()
 
+def _recommender_fixture():
+    """Deterministic circles and affect profiles for ranking checks"""
+    rng = random.Random(42)
+    types = ["burnout", "exam season", "placement prep", "relationship stress", "identity & belonging", "first-year"]
+    keyword_pool = ["give up", "hopeless", "exhausted", "failing everything", "alone", "worthless", "panic", "no sleep"]
+    base = datetime(2026, 1, 1)
+    circles = [
+        Circle(
+            circle_id=uuid.UUID(int=i + 1),
+            name=f"Circle {i}",
+            type=rng.choice(types),
+            sensitivity_level=rng.choice(["low", "medium", "high"]),
+            crisis_keywords=rng.sample(keyword_pool, 3),
+            created_at=base + timedelta(hours=rng.randint(0, 5000))
+        )
+        for i in range(40)
+    ]
+    profiles = [
+        AffectProfile(),
+        AffectProfile(
+            moods=["anxious", "anxious", "sad"],
+            journal_texts=["i feel hopeless and exhausted, ready to give up", "panic before exams"],
+            journal_terms=[tokenize("I feel hopeless and exhausted, ready to give up"), tokenize("panic before exams")],
+            checkin_scores=[4, 3],
+            student_role="burnout"
+        ),
+        AffectProfile(
+            moods=["sad", "numb"],
+            journal_texts=["completely alone, no sleep again"],
+            journal_terms=[tokenize("completely alone, no sleep again")],
+            checkin_scores=[1],
+            student_role="first-year"
+        ),
+        # Short and stopword phrases: "give" and "sleep" appear without "give up"/"no sleep",
+        # and "hopeless" only inside a longer word
+        AffectProfile(
+            moods=["numb"],
+            journal_texts=["i give it everything but sleep never comes", "the hopelessness is back"],
+            journal_terms=[tokenize("I give it everything but sleep never comes"), tokenize("The hopelessness is back")],
+            checkin_scores=[2],
+            student_role="placement prep"
+        ),
+    ]
+    return circles, profiles
+
+
+def _legacy_top4(circles, profile, current_hour):
+    """The original full-scan scorer: substring keyword loops over journal text and a full sort"""
+    is_late_night = current_hour >= 23 or current_hour < 4
+    scored = []
+    for circle in circles:
+        score = 0.0
+        if profile.student_role and circle.type.lower() == profile.student_role.lower():
+            score += 6.0
+        if profile.moods:
+            most_common_mood = collections.Counter(profile.moods).most_common(1)[0][0]
+            if most_common_mood in ["anxious", "overwhelmed", "frustrated"] and circle.sensitivity_level in ["medium", "high"]:
+                score += 3.0
+            if most_common_mood in ["sad", "numb"] and circle.type in ["burnout", "relationship stress"]:
+                score += 2.0
+        if profile.avg_checkin_score >= 3 and circle.sensitivity_level == "high":
+            score += 4.0
+        if profile.journal_texts and circle.crisis_keywords:
+            keyword_matches = 0
+            for text in profile.journal_texts:
+                for kw in circle.crisis_keywords:
+                    if kw.lower() in text:
+                        keyword_matches += 1
+            score += min(keyword_matches * 1.5, 4.5)
+        if is_late_night:
+            if circle.sensitivity_level == "high":
+                score += 5.0
+            elif circle.sensitivity_level == "medium":
+                score += 3.0
+        score += (circle.created_at.timestamp() / 1e10)
+        scored.append((circle, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [item[0].circle_id for item in scored[:4]]
+
+
+async def test_circle_recommender_ranking():
+    print("Testing CircleRecommender ranking against the legacy scorer...")
+    circles, profiles = _recommender_fixture()
+    keyword_index = SubstringIndex((c.circle_id, c.crisis_keywords) for c in circles)
+
+    # Phrases keep substring semantics: no match on a lone "give"/"sleep", a match inside "hopelessness"
+    phrase_index = SubstringIndex([("c", ["give up", "no sleep", "hopeless"])])
+    assert phrase_index.match(["i give it everything but sleep never comes"]) == {}
+    assert phrase_index.match(["the hopelessness is back", "ready to give up, no sleep"]) == {"c": 3}
+
+    newest = sorted(circles, key=lambda c: c.created_at, reverse=True)[:4]
+
+    for profile in profiles:
+        keyword_matches = keyword_index.match(profile.journal_texts)
+        most_common_mood = collections.Counter(profile.moods).most_common(1)[0][0] if profile.moods else None
+        for hour in (14, 1):
+            expected = _legacy_top4(circles, profile, hour)
+
+            # Full set through the heap
+            ranked = [c.circle_id for c in rank_circles(circles, profile, keyword_matches, hour)]
+            assert ranked == expected, f"full set mismatch at hour {hour}: {ranked} != {expected}"
+
+            # Same pruning the SQL query applies: boostable circles plus the newest few
+            def boostable(c):
+                return (
+                    (profile.student_role and c.type.lower() == profile.student_role.lower())
+                    or ((most_common_mood in ["anxious", "overwhelmed", "frustrated"] or hour >= 23 or hour < 4)
+                        and c.sensitivity_level in ["medium", "high"])
+                    or (most_common_mood in ["sad", "numb"] and c.type in ["burnout", "relationship stress"])
+                    or (profile.avg_checkin_score >= 3 and c.sensitivity_level == "high")
+                    or c.circle_id in keyword_matches
+                )
+            pruned = {c.circle_id: c for c in circles if boostable(c)}
+            for c in newest:
+                pruned.setdefault(c.circle_id, c)
+            ranked = [c.circle_id for c in rank_circles(pruned.values(), profile, keyword_matches, hour)]
+            assert ranked == expected, f"pruned set mismatch at hour {hour}: {ranked} != {expected}"
+
+    print("[SUCCESS] CircleRecommender returns the same top 4 as the full scan for every fixture profile.")
+    print()
+
 async def run_all_tests():
     print("=== STARTING SUPPORT CIRCLES TEST SUITE ===")
     try:
+        await test_keyword_engine()
+        await test_crisis_terms_cover_legacy()
+        await test_circle_recommender_ranking()
         await test_circle_generator()
+        await test_moderation_cache()
         await test_message_moderator()
         print("ALL TESTS PASSED SUCCESSFULLY!")
     except AssertionError as ae:
@@ -0,0 +1,41 @@
+"""
+Background job worker entry point
+Runs queued jobs (crisis assessment, story processing, insights, mood check-ins)
+and the weekly cron outside the API. Start as many as needed; jobs are claimed
+with SKIP LOCKED, so workers never run the same job twice at once.
+
+Usage: python worker.py   (with JOB_WORKER_IN_API=false on the API processes)
+"""
+
+import asyncio
+import signal
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import core.principal_cache  # noqa: F401  (registers the User cache-invalidation hook)
+from services.job_queue import get_job_worker
+from services.llm_gateway import get_llm_gateway
+from services.scheduler import start_scheduler, scheduler
+
+
+async def run_worker():
+    worker = get_job_worker()
+    worker.start()
+    start_scheduler()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    print("[JOBS] Shutting down worker...")
+    scheduler.shutdown(wait=False)
+    await worker.stop()
+    await get_llm_gateway().close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -47,9 +47,9 @@ const CounsellorDashboard: React.FC<DashboardProps> = ({ setView }) => {
 
   useEffect(() => {
     // 1. Fetch caseload count
-    api.get('/users/my-students')
+    api.get('/users/my-students/summary')
       .then(res => {
-        setCaseloadCount(res.data.length);
+        setCaseloadCount(res.data.total);
       })
       .catch(err => console.error(err));
 
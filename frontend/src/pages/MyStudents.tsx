@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect } from 'react';
 import { Search, MessageSquare, AlertCircle, Heart, User, CheckCircle } from 'lucide-react';
 import api from '../services/api';
 import ChatPage from '../components/ChatPage';
@@ -11,11 +11,24 @@ interface CaseworkStudent {
   risk: 'Low' | 'Medium' | 'High';
   lastActive: string;
   moodLabel: string;
+  cursor: string;
 }
 
+interface CaseloadSummary {
+  total: number;
+  active: number;
+  risk: Record<'Low' | 'Medium' | 'High', number>;
+  moods: { sad: number; neutral: number; positive: number };
+}
+
+const STUDENT_PAGE_SIZE = 100;
+
 const MyStudents: React.FC = () => {
   const { user } = useAuth();
   const [students, setStudents] = useState<CaseworkStudent[]>([]);
+  const [summary, setSummary] = useState<CaseloadSummary | null>(null);
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState('');
   const [selectedStudent, setSelectedStudent] = useState<CaseworkStudent | null>(null);
@@ -24,40 +37,57 @@ const MyStudents: React.FC = () => {
     const fetchStudents = async () => {
       try {
         setLoading(true);
-        const res = await api.get('/users/my-students');
+        const res = await api.get('/users/my-students', { params: { limit: STUDENT_PAGE_SIZE } });
         setStudents(res.data);
+        setHasMore(res.data.length === STUDENT_PAGE_SIZE);
       } catch (err) {
         console.error(err);
       } finally {
         setLoading(false);
       }
     };
+    const fetchSummary = async () => {
+      try {
+        const res = await api.get('/users/my-students/summary');
+        setSummary(res.data);
+      } catch (err) {
+        console.error(err);
+      }
+    };
     fetchStudents();
+    fetchSummary();
   }, []);
 
+  const loadMoreStudents = async () => {
+    const last = students[students.length - 1];
+    if (!last || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const res = await api.get('/users/my-students', {
+        params: { limit: STUDENT_PAGE_SIZE, after: last.cursor }
+      });
+      setStudents(prev => [...prev, ...res.data]);
+      setHasMore(res.data.length === STUDENT_PAGE_SIZE);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filtered = students.filter(s => s.username.toLowerCase().includes(search.toLowerCase()));
 
-  const stats = useMemo(() => {
-    const total = students.length;
-    const activeCount = students.filter(s => s.lastActive !== 'never').length;
-    const highRisk = students.filter(s => s.risk === 'High').length;
-    const mediumRisk = students.filter(s => s.risk === 'Medium').length;
-    const lowRisk = students.filter(s => s.risk === 'Low').length;
-    const sadMood = students.filter(s => s.moodLabel === '😔').length;
-    const neutralMood = students.filter(s => s.moodLabel === '😐').length;
-    const positiveMood = students.filter(s => s.moodLabel === '🙂').length;
-
-    return {
-      total,
-      activeCount,
-      highRisk,
-      mediumRisk,
-      lowRisk,
-      sadMood,
-      neutralMood,
-      positiveMood,
-    };
-  }, [students]);
+  // Caseload-wide counts come from the summary endpoint, not from the pages loaded so far
+  const stats = {
+    total: summary?.total ?? 0,
+    activeCount: summary?.active ?? 0,
+    highRisk: summary?.risk.High ?? 0,
+    mediumRisk: summary?.risk.Medium ?? 0,
+    lowRisk: summary?.risk.Low ?? 0,
+    sadMood: summary?.moods.sad ?? 0,
+    neutralMood: summary?.moods.neutral ?? 0,
+    positiveMood: summary?.moods.positive ?? 0,
+  };
 
   if (selectedStudent) {
     return (
@@ -169,6 +199,18 @@ const MyStudents: React.FC = () => {
           ))}
         </div>
       )}
+
+      {!loading && hasMore && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMoreStudents}
+            disabled={loadingMore}
+            className="px-6 py-3 rounded-xl border border-zinc-200 dark:border-zinc-800 text-sm font-semibold text-zinc-600 dark:text-zinc-300 hover:bg-zinc-50 dark:hover:bg-zinc-900 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more students'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
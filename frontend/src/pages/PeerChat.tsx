@@ -25,8 +25,7 @@ interface Message {
   flagged: boolean;
   moderation_status?: string;
   moderation_reason?: string | null;
-  crisis_detected?: boolean;
-  crisis_level?: string | null;
+  cursor?: string;
 }
 
 interface CircleResponse {
@@ -43,6 +42,7 @@ interface CircleResponse {
   created_at: string;
   participants_count: number;
   is_member: boolean;
+  cursor?: string;
 }
 
 const moodMeta: Record<string, { label: string; emoji: string; bg: string; text: string }> = {
@@ -65,6 +65,18 @@ const preDefinedRoles = [
   { id: 'identity & belonging', label: 'Identity & Belonging', emoji: '🌈', desc: 'Exploring selfhood, fitting in, and finding comfort.', color: 'from-violet-500 to-fuchsia-500' }
 ];
 
+// Messages per history request; matches the backend's default page size
+const MESSAGE_PAGE_SIZE = 50;
+// Circles per discover-list request; matches the backend's default page size
+const CIRCLE_PAGE_SIZE = 50;
+const WS_RECONNECT_DELAY_MS = 3000;
+
+// Append messages not already in the list, keeping order
+const mergeNewer = (prev: Message[], incoming: Message[]) => {
+  const seen = new Set(prev.map(m => m.message_id));
+  return [...prev, ...incoming.filter(m => !seen.has(m.message_id))];
+};
+
 const PeerChat: React.FC = () => {
   const { user, updateUser } = useAuth();
   
@@ -74,6 +86,8 @@ const PeerChat: React.FC = () => {
   const [threads, setThreads] = useState<Thread[]>([]);
   const [selectedThread, setSelectedThread] = useState<Thread | null>(null);
   const [messages, setMessages] = useState<Message[]>([]);
+  const [hasOlderMessages, setHasOlderMessages] = useState(false);
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false);
   const [inputText, setInputText] = useState('');
   
   // Modals / Dropdowns
@@ -92,6 +106,10 @@ const PeerChat: React.FC = () => {
   // Discover Board states
   const [recommendedCircles, setRecommendedCircles] = useState<CircleResponse[]>([]);
   const [allCircles, setAllCircles] = useState<CircleResponse[]>([]);
+  const [hasMoreCircles, setHasMoreCircles] = useState(false);
+  const [loadingMoreCircles, setLoadingMoreCircles] = useState(false);
+  // Circles behind the user's own rooms, keyed by thread_id
+  const [threadCircles, setThreadCircles] = useState<Record<string, CircleResponse>>({});
   const [loadingCircles, setLoadingCircles] = useState(false);
   const [selectedCategoryFilter, setSelectedCategoryFilter] = useState<string>('all');
   
@@ -114,6 +132,9 @@ const PeerChat: React.FC = () => {
   
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const wsRef = useRef<WebSocket | null>(null);
+  // Latest messages for socket callbacks, and the newest id we last scrolled to
+  const messagesRef = useRef<Message[]>([]);
+  const lastMessageIdRef = useRef<string | null>(null);
 
   // Load threads and available peers on mount
   useEffect(() => {
@@ -131,66 +152,93 @@ const PeerChat: React.FC = () => {
     }
   }, [activeNavTab]);
 
-  // Set up WebSocket connection for real-time messages
+  // Set up WebSocket connection for real-time messages, reconnecting if it drops
   useEffect(() => {
     if (!user?.anon_id) return;
 
-    const wsUrl = getWebSocketUrl(`/peer_chat/ws/${user.anon_id}`);
-    const ws = new WebSocket(wsUrl);
-    wsRef.current = ws;
+    let ws: WebSocket;
+    let closed = false;
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
 
-    ws.onopen = () => {
-      console.log('[WS] Connected to peer chat network');
-    };
+    const connect = (isReconnect: boolean) => {
+      ws = new WebSocket(getWebSocketUrl(`/peer_chat/ws/${user.anon_id}`));
+      wsRef.current = ws;
+
+      ws.onopen = () => {
+        console.log('[WS] Connected to peer chat network');
+        // Pick up whatever was sent to the open thread while we were disconnected
+        if (isReconnect && selectedThread) {
+          catchUpMessages(selectedThread.thread_id);
+        }
+      };
 
-    ws.onmessage = (event) => {
-      try {
-        if (event.data === 'pong') return;
-        const msg = JSON.parse(event.data);
-        if (msg.type === 'NEW_PEER_MESSAGE') {
-          const newMsg: Message = msg.payload;
+      ws.onmessage = (event) => {
+        try {
+          if (event.data === 'pong') return;
+          const msg = JSON.parse(event.data);
+          if (msg.type === 'NEW_PEER_MESSAGE') {
+            const newMsg: Message = msg.payload;
           
-          // Append message if it belongs to selected thread
-          if (selectedThread && newMsg.thread_id === selectedThread.thread_id) {
-            setMessages((prev) => {
-              if (prev.some(m => m.message_id === newMsg.message_id)) return prev;
-              return [...prev, newMsg];
-            });
-            
-            // Trigger soft crisis banner in UI if user's own typed message contains crisis triggers
-            if (newMsg.crisis_detected && newMsg.sender_anon_id === user.anon_id) {
+            // Append message if it belongs to selected thread
+            if (selectedThread && newMsg.thread_id === selectedThread.thread_id) {
+              setMessages((prev) => mergeNewer(prev, [newMsg]));
+            }
+          
+            // Refresh threads list
+            fetchThreads();
+          } else if (msg.type === 'CRISIS_ALERT') {
+            // Sent only to the author, after the background risk assessment of their message
+            if (selectedThread && msg.payload.thread_id === selectedThread.thread_id) {
               setChatCrisisWarning(
                 "It looks like you are going through a difficult moment. Please know that you are not alone. Support is available: contact the iCall hotline at 9152987821 or Vandrevala Foundation at 9999666555."
               );
             }
           }
-          
-          // Refresh threads list
-          fetchThreads();
+        } catch (err) {
+          console.error('[WS] Parse message error:', err);
         }
-      } catch (err) {
-        console.error('[WS] Parse message error:', err);
-      }
-    };
+      };
 
-    ws.onclose = () => {
-      console.log('[WS] Peer chat connection closed');
+      ws.onclose = () => {
+        console.log('[WS] Peer chat connection closed');
+        if (!closed) {
+          reconnectTimer = setTimeout(() => connect(true), WS_RECONNECT_DELAY_MS);
+        }
+      };
     };
 
+    connect(false);
+
     return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
       ws.close();
     };
   }, [user, selectedThread]);
 
-  // Keep chat scrolled to the bottom
+  // Keep chat scrolled to the bottom when a newer message arrives (not when older pages load)
   useEffect(() => {
-    messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+    messagesRef.current = messages;
+    const lastId = messages.length ? messages[messages.length - 1].message_id : null;
+    if (lastId !== lastMessageIdRef.current) {
+      lastMessageIdRef.current = lastId;
+      messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+    }
   }, [messages]);
 
   const fetchThreads = async () => {
     try {
       const res = await api.get('/peer_chat/threads');
       setThreads(res.data);
+      const circleThreadIds = res.data
+        .filter((t: Thread) => t.thread_type === 'support_circle')
+        .map((t: Thread) => t.thread_id);
+      if (circleThreadIds.length > 0) {
+        const circlesRes = await api.get('/circles/by-thread', {
+          params: { thread_ids: circleThreadIds.join(',') }
+        });
+        setThreadCircles(Object.fromEntries(circlesRes.data.map((c: CircleResponse) => [c.thread_id, c])));
+      }
     } catch (err) {
       console.error('Error fetching chat threads:', err);
     }
@@ -213,8 +261,9 @@ const PeerChat: React.FC = () => {
     try {
       const recRes = await api.get('/circles/recommendations');
       setRecommendedCircles(recRes.data);
-      const allRes = await api.get('/circles/all');
+      const allRes = await api.get('/circles/all', { params: { limit: CIRCLE_PAGE_SIZE } });
       setAllCircles(allRes.data);
+      setHasMoreCircles(allRes.data.length === CIRCLE_PAGE_SIZE);
     } catch (err) {
       console.error('Error fetching support circles:', err);
     } finally {
@@ -222,17 +271,42 @@ const PeerChat: React.FC = () => {
     }
   };
 
+  // Discover list: fetch the page after the last loaded circle
+  const loadMoreCircles = async () => {
+    const last = allCircles[allCircles.length - 1];
+    if (!last?.cursor || loadingMoreCircles) return;
+    setLoadingMoreCircles(true);
+    try {
+      const res = await api.get('/circles/all', {
+        params: { cursor: last.cursor, limit: CIRCLE_PAGE_SIZE }
+      });
+      setAllCircles(prev => [...prev, ...res.data]);
+      setHasMoreCircles(res.data.length === CIRCLE_PAGE_SIZE);
+    } catch (err) {
+      console.error('Error loading more support circles:', err);
+    } finally {
+      setLoadingMoreCircles(false);
+    }
+  };
+
   const loadMessages = async (thread: Thread) => {
     setSelectedThread(thread);
     setChatCrisisWarning(null); // Clear warnings
     setActiveCircleInfo(null);
+    setMessages([]);
+    setHasOlderMessages(false);
     try {
-      const res = await api.get(`/peer_chat/messages/${thread.thread_id}`);
+      const res = await api.get(`/peer_chat/messages/${thread.thread_id}`, {
+        params: { limit: MESSAGE_PAGE_SIZE }
+      });
       setMessages(res.data);
+      setHasOlderMessages(res.data.length === MESSAGE_PAGE_SIZE);
 
       if (thread.thread_type === 'support_circle') {
-        const circlesRes = await api.get('/circles/all');
-        const match = circlesRes.data.find((c: any) => c.thread_id === thread.thread_id);
+        const circlesRes = await api.get('/circles/by-thread', {
+          params: { thread_ids: thread.thread_id }
+        });
+        const match = circlesRes.data[0];
         if (match) {
           setActiveCircleInfo(match);
         }
@@ -242,6 +316,46 @@ const PeerChat: React.FC = () => {
     }
   };
 
+  // Scrollback: fetch the page before the oldest loaded message
+  const loadOlderMessages = async () => {
+    const oldest = messages[0];
+    if (!selectedThread || !oldest?.cursor || loadingOlderMessages) return;
+    setLoadingOlderMessages(true);
+    try {
+      const res = await api.get(`/peer_chat/messages/${selectedThread.thread_id}`, {
+        params: { before: oldest.cursor, limit: MESSAGE_PAGE_SIZE }
+      });
+      setMessages(prev => {
+        const seen = new Set(prev.map(m => m.message_id));
+        return [...res.data.filter((m: Message) => !seen.has(m.message_id)), ...prev];
+      });
+      setHasOlderMessages(res.data.length === MESSAGE_PAGE_SIZE);
+    } catch (err) {
+      console.error('Error loading older messages:', err);
+    } finally {
+      setLoadingOlderMessages(false);
+    }
+  };
+
+  // Catch-up after a reconnect: page forward from the newest loaded message
+  const catchUpMessages = async (threadId: string) => {
+    let after = messagesRef.current[messagesRef.current.length - 1]?.cursor;
+    if (!after) return;
+    try {
+      while (after) {
+        const res = await api.get(`/peer_chat/messages/${threadId}`, {
+          params: { after, limit: MESSAGE_PAGE_SIZE }
+        });
+        const page: Message[] = res.data;
+        setMessages(prev => mergeNewer(prev, page));
+        after = page.length === MESSAGE_PAGE_SIZE ? page[page.length - 1].cursor : undefined;
+      }
+      fetchThreads();
+    } catch (err) {
+      console.error('Error catching up thread messages:', err);
+    }
+  };
+
   const handleSendMessage = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!inputText.trim() || !selectedThread) return;
@@ -500,8 +614,8 @@ const PeerChat: React.FC = () => {
                     iconBg = 'bg-purple-100/50 dark:bg-purple-950/20';
                     iconColor = 'text-[#7c3aed]';
                   } else {
-                    // Try to find Circle Name from allCircles if available
-                    const matchedCircle = allCircles.find(c => c.thread_id === t.thread_id);
+                    // Circle name from the lookup made alongside the thread list
+                    const matchedCircle = threadCircles[t.thread_id];
                     chatLabel = matchedCircle?.name || 'Support Circle';
                     iconBg = 'bg-emerald-100/50 dark:bg-emerald-950/20';
                     iconColor = 'text-emerald-600';
@@ -718,6 +832,17 @@ const PeerChat: React.FC = () => {
                       </button>
                     </div>
                   )}
+                  {hasMoreCircles && (
+                    <div className="flex justify-center">
+                      <button
+                        onClick={loadMoreCircles}
+                        disabled={loadingMoreCircles}
+                        className="px-4 py-2.5 bg-purple-50 text-[#7c3aed] text-xs font-bold rounded-xl disabled:opacity-50"
+                      >
+                        {loadingMoreCircles ? 'Loading...' : 'Load more circles'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               </>
             )}
@@ -814,6 +939,19 @@ const PeerChat: React.FC = () => {
                     </div>
                   )}
 
+                  {hasOlderMessages && (
+                    <div className="flex justify-center">
+                      <button
+                        onClick={loadOlderMessages}
+                        disabled={loadingOlderMessages}
+                        className="text-xs font-semibold text-[#7c3aed] dark:text-purple-400 px-3 py-1.5 rounded-full hover:bg-purple-50 dark:hover:bg-purple-950/30 flex items-center gap-1.5 disabled:opacity-50"
+                      >
+                        {loadingOlderMessages && <Loader2 className="w-3.5 h-3.5 animate-spin" />}
+                        Load earlier messages
+                      </button>
+                    </div>
+                  )}
+
                   {/* Message History list */}
                   {messages.map((m) => {
                     const isSelf = m.sender_anon_id === user?.anon_id;
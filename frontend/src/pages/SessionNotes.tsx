@@ -10,8 +10,11 @@ interface Note {
   date: string;
 }
 
+const STUDENT_PAGE_SIZE = 100;
+
 const SessionNotes: React.FC = () => {
   const [students, setStudents] = useState<any[]>([]);
+  const [hasMoreStudents, setHasMoreStudents] = useState(false);
   const [selectedStudentId, setSelectedStudentId] = useState<number | null>(null);
   const [noteText, setNoteText] = useState('');
   const [notes, setNotes] = useState<any[]>([]);
@@ -19,8 +22,9 @@ const SessionNotes: React.FC = () => {
 
   const fetchStudents = async () => {
     try {
-      const res = await api.get('/users/my-students');
+      const res = await api.get('/users/my-students', { params: { limit: STUDENT_PAGE_SIZE } });
       setStudents(res.data);
+      setHasMoreStudents(res.data.length === STUDENT_PAGE_SIZE);
       if (res.data.length > 0) {
         setSelectedStudentId(res.data[0].id);
       }
@@ -29,6 +33,20 @@ const SessionNotes: React.FC = () => {
     }
   };
 
+  const fetchMoreStudents = async () => {
+    const last = students[students.length - 1];
+    if (!last) return;
+    try {
+      const res = await api.get('/users/my-students', {
+        params: { limit: STUDENT_PAGE_SIZE, after: last.cursor }
+      });
+      setStudents(prev => [...prev, ...res.data]);
+      setHasMoreStudents(res.data.length === STUDENT_PAGE_SIZE);
+    } catch (err) {
+      console.error(err);
+    }
+  };
+
   const fetchNotes = async () => {
     try {
       setLoading(true);
@@ -101,6 +119,15 @@ const SessionNotes: React.FC = () => {
                   <option key={s.id} value={s.id}>{s.username}</option>
                 ))}
               </select>
+              {hasMoreStudents && (
+                <button
+                  type="button"
+                  onClick={fetchMoreStudents}
+                  className="mt-2 text-xs font-semibold text-indigo-600 dark:text-indigo-400 hover:underline"
+                >
+                  Load more students
+                </button>
+              )}
             </div>
 
             <div>
@@ -23,7 +23,13 @@ api.interceptors.request.use(
 export const getWebSocketUrl = (endpoint: string): string => {
     const baseUrl = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
     const wsUrl = baseUrl.replace(/^http/, 'ws');
-    return `${wsUrl}/api/v1${endpoint.startsWith('/') ? endpoint : `/${endpoint}`}`;
+    const url = `${wsUrl}/api/v1${endpoint.startsWith('/') ? endpoint : `/${endpoint}`}`;
+    // Browsers can't set headers on WebSocket handshakes, so the JWT travels as a query param
+    const token = localStorage.getItem('token');
+    if (!token) {
+        return url;
+    }
+    return `${url}${url.includes('?') ? '&' : '?'}token=${encodeURIComponent(token)}`;
 };
 
 export default api;